@@ -0,0 +1,66 @@
+"""asyncio pipeline API for TerraSmart.
+
+Lets a service drive many prompt -> DSL -> Terraform pipelines on a single
+event loop:
+
+    result = await plan_async("Add a CNAME record for www.example.com", config)
+"""
+
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from .cloudflare import resolve_zone_id
+from .config import Config
+from .dsl import validate_dsl
+from .llm import to_dsl_async
+from .render import render_terraform_async
+from .tfexec import AsyncTerraformExecutor
+
+__all__ = [
+    "PipelineResult",
+    "AsyncTerraformExecutor",
+    "dryrun_async",
+    "plan_async",
+    "render_terraform_async",
+    "to_dsl_async",
+]
+
+
+@dataclass
+class PipelineResult:
+    """Output of an async pipeline run."""
+    dsl_data: Dict[str, Any]
+    work_dir: Path
+    plan_output: Optional[str] = None
+
+
+async def dryrun_async(prompt: str, config: Config, output_dir: Optional[str] = None,
+                       use_cache: bool = True) -> PipelineResult:
+    """Translate, validate and render a prompt without running terraform."""
+    return await _render_prompt(prompt, config, output_dir, use_cache, resolve_zone=False)
+
+
+async def plan_async(prompt: str, config: Config, output_dir: Optional[str] = None,
+                     use_cache: bool = True) -> PipelineResult:
+    """Translate, validate, render and plan a prompt."""
+    result = await _render_prompt(prompt, config, output_dir, use_cache, resolve_zone=True)
+    
+    executor = AsyncTerraformExecutor(result.work_dir)
+    await executor.init()
+    result.plan_output = await executor.plan()
+    return result
+
+
+async def _render_prompt(prompt: str, config: Config, output_dir: Optional[str], use_cache: bool,
+                         resolve_zone: bool) -> PipelineResult:
+    """Translate, validate and render a prompt, resolving its zone ID for plans."""
+    dsl_data = await to_dsl_async(prompt, config, use_cache=use_cache)
+    validate_dsl(dsl_data)
+    zone_id = None
+    if resolve_zone:
+        # The lookup may hit the Cloudflare API; keep it off the event loop
+        zone_id = await asyncio.to_thread(resolve_zone_id, dsl_data["zone_name"], config)
+    work_dir = await render_terraform_async(dsl_data, config, output_dir, prompt=prompt, zone_id=zone_id)
+    return PipelineResult(dsl_data=dsl_data, work_dir=work_dir)
@@ -0,0 +1,160 @@
+"""Batch processing of many prompts for TerraSmart."""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, IO, List, Optional
+
+from .cloudflare import resolve_zone_id
+from .config import Config
+from .dsl import validate_dsl
+from .fleet import EXIT_ERROR
+from .llm import to_dsl
+from .plan_analysis import EXIT_NO_CHANGES, PlanSummary
+from .render import render_terraform
+from .runs import PLANNED, PLAN_FAILED, get_run_index
+from .tfexec import PLAN_FILE_NAME, TerraformExecutor
+
+
+@dataclass
+class BatchResult:
+    """Outcome of processing a single prompt in a batch."""
+    index: int
+    prompt: str
+    stage: str = "pending"
+    work_dir: Optional[Path] = None
+    dsl_data: Optional[Dict[str, Any]] = None
+    summary: Optional[PlanSummary] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        """Whether the prompt went through every stage."""
+        return self.error is None
+    
+    @property
+    def exit_code(self) -> int:
+        """Exit code for this prompt: 0, 2 or 3 like ts plan, 1 on errors."""
+        if self.error is not None:
+            return EXIT_ERROR
+        return self.summary.exit_code() if self.summary else EXIT_NO_CHANGES
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable representation."""
+        return {
+            "index": self.index,
+            "prompt": self.prompt,
+            "dir": str(self.work_dir) if self.work_dir else None,
+            "exit_code": self.exit_code,
+            "summary": self.summary.to_dict() if self.summary else None,
+            "stage": self.stage,
+            "error": self.error,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+def load_prompts(stream: IO[str]) -> List[str]:
+    """Read prompts from a file, one per line or as JSONL.
+    
+    Blank lines and lines starting with '#' are ignored. Lines that parse as
+    JSON may be either a JSON string or an object with a "prompt" key; any
+    other line, e.g. '"Blog" CNAME to example.com', is a plain prompt.
+    """
+    prompts = []
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        
+        if line[0] in '{"':
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                # A plain prompt that happens to start with a quote or brace
+                item = line
+            if isinstance(item, dict):
+                item = item.get("prompt")
+            if not isinstance(item, str) or not item.strip():
+                raise ValueError(f"Line {line_number} has no prompt")
+            line = item.strip()
+        
+        prompts.append(line)
+    return prompts
+
+
+def run_batch(
+    prompts: List[str],
+    config: Config,
+    jobs: int = 4,
+    output_dir: Optional[str] = None,
+    use_cache: bool = True,
+    run_plan: bool = True,
+    upgrade_providers: bool = False,
+    parallelism: Optional[int] = None,
+    lock_timeout: Optional[str] = None,
+    refresh: Optional[bool] = None,
+    fast: bool = False,
+) -> List[BatchResult]:
+    """Translate, validate, render and plan many prompts concurrently.
+    
+    At most ``jobs`` prompts are in flight at once. Each prompt gets its own
+    run directory; results are returned in input order. parallelism,
+    lock_timeout, refresh and fast apply to every plan as in ts plan.
+    """
+    if output_dir:
+        base_dir = Path(output_dir)
+        dir_names = [f"{i:03d}" for i in range(1, len(prompts) + 1)]
+    else:
+        base_dir = Path.cwd() / "terraform"
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        dir_names = [f"{timestamp}_{i:03d}" for i in range(1, len(prompts) + 1)]
+    
+    results = [BatchResult(index=i, prompt=prompt) for i, prompt in enumerate(prompts, 1)]
+    run_index = get_run_index()
+    
+    def process(result: BatchResult) -> BatchResult:
+        start = time.perf_counter()
+        try:
+            result.stage = "translate"
+            result.dsl_data = to_dsl(result.prompt, config, use_cache=use_cache)
+            
+            result.stage = "validate"
+            validate_dsl(result.dsl_data)
+            
+            result.stage = "render"
+            work_dir = base_dir / dir_names[result.index - 1]
+            # Dry runs stay offline; plans skip Terraform's zone lookup
+            zone_id = resolve_zone_id(result.dsl_data["zone_name"], config) if run_plan else None
+            result.work_dir = render_terraform(result.dsl_data, config, str(work_dir), prompt=result.prompt,
+                                               zone_id=zone_id)
+            
+            if run_plan:
+                result.stage = "init"
+                executor = TerraformExecutor.from_config(result.work_dir, config, parallelism, lock_timeout)
+                executor.init(upgrade=upgrade_providers)
+                
+                result.stage = "plan"
+                plan_output = executor.plan(refresh=executor.should_refresh(config, refresh, fast))
+                with open(result.work_dir / "plan.txt", 'w') as f:
+                    f.write(plan_output)
+                result.summary = executor.summarize_plan(result.work_dir / PLAN_FILE_NAME)
+                run_index.set_status(result.work_dir, PLANNED)
+            
+            result.stage = "done"
+        except SystemExit:
+            # error_exit already printed the reason to stderr
+            result.error = f"{result.stage} step aborted"
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.elapsed = time.perf_counter() - start
+        if result.error and result.stage in ("init", "plan"):
+            run_index.set_status(result.work_dir, PLAN_FAILED)
+        return result
+    
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(process, results))
@@ -0,0 +1,118 @@
+"""Disk-backed caches for TerraSmart."""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .utils import get_data_dir
+
+
+class DiskCache:
+    """Small JSON file cache with TTL and size-bounded LRU eviction.
+    
+    Each entry lives in its own file named after the key hash. Reads bump the
+    file mtime so eviction can drop the least recently used entries first.
+    """
+    
+    def __init__(self, directory: Path, ttl: int, max_entries: int):
+        """Initialize cache in the given directory."""
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+    
+    def _path(self, key: str) -> Path:
+        """Get the entry file path for a key."""
+        return self.directory / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if self.ttl > 0 and time.time() - entry.get("created_at", 0) > self.ttl:
+            self._remove(path)
+            return None
+        
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("value")
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting old entries if needed."""
+        if self.max_entries <= 0:
+            return
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"created_at": time.time(), "value": value}, f)
+        os.replace(tmp_path, path)
+        
+        self._evict()
+    
+    def clear(self) -> int:
+        """Remove all entries and return how many were deleted."""
+        removed = 0
+        if not self.directory.exists():
+            return removed
+        for path in self.directory.glob("*.json"):
+            self._remove(path)
+            removed += 1
+        return removed
+    
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond max_entries."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        
+        entries.sort()
+        for _, path in entries[:excess]:
+            self._remove(path)
+    
+    @staticmethod
+    def _remove(path: Path) -> None:
+        """Delete an entry file, ignoring races with other processes."""
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def normalize_prompt(prompt_text: str) -> str:
+    """Normalize prompt whitespace so trivial edits still hit the cache."""
+    return re.sub(r'\s+', ' ', prompt_text).strip()
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable cache key from JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_dsl_cache(config) -> DiskCache:
+    """Get the prompt to DSL cache for the given configuration."""
+    return DiskCache(
+        get_data_dir() / "cache" / "dsl",
+        ttl=config.cache_ttl,
+        max_entries=config.cache_max_entries,
+    )
@@ -1,18 +1,91 @@
 """Main CLI interface for TerraSmart."""
 
+import functools
+import json
+import sys
+import time
 import click
 from pathlib import Path
 from typing import Optional
 
 from .config import load_config, prompt_for_config
 from .utils import success_message, error_exit, info_message, warning_message
-from .llm import to_dsl
-from .dsl import validate_dsl
-from .render import render_terraform
-from .tfexec import TerraformExecutor
+from .profiling import span, start_tracing, stop_tracing
+from .runs import APPLIED, APPLY_FAILED, PLANNED, PLAN_FAILED, get_run_index
 
+# Pipeline modules pull in openai, jsonschema and jinja2, so commands import
+# them when they run; 'ts --help', 'ts runs' and friends stay fast.
 
-@click.group()
+# Terraform output of plan and apply is copied here in the run directory
+TERRAFORM_LOG_FILE_NAME = "terraform.log"
+
+# terraform -json event types shown by 'ts apply --progress'
+PROGRESS_EVENT_TYPES = {"apply_start", "apply_complete", "apply_errored", "diagnostic", "change_summary"}
+
+
+class _DaemonAwareGroup(click.Group):
+    """Command group that hands supported commands to a running 'ts serve'."""
+    
+    def main(self, args=None, **extra):
+        """Forward the command line to the daemon if one is running, else run it here.
+        
+        Only command lines taken from sys.argv are forwarded; explicit args
+        come from the daemon itself or from tests.
+        """
+        if args is None:
+            from .daemon import forward, should_forward
+            
+            if should_forward(sys.argv[1:]):
+                code = forward(sys.argv[1:])
+                if code is not None:
+                    sys.exit(code)
+        return super().main(args=args, **extra)
+
+
+def _terraform_options(command):
+    """Add terraform tuning options, defaulting to the [terraform] config."""
+    command = click.option('--lock-timeout', help='Wait this long for a state lock, e.g. 30s')(command)
+    command = click.option('--parallelism', type=click.IntRange(min=1),
+                           help='Concurrent resource operations in terraform')(command)
+    return command
+
+
+def _refresh_options(command):
+    """Add options controlling whether plans refresh state."""
+    command = click.option('--fast', is_flag=True,
+                           help='Skip refresh when the state is younger than fast_plan_max_state_age')(command)
+    command = click.option('--refresh/--no-refresh', default=None,
+                           help='Refresh state before planning (default from config)')(command)
+    return command
+
+
+def _profiled(command):
+    """Add --profile and --trace-file options timing the command's stages."""
+    @click.option('--profile', is_flag=True, help='Print how long each stage took')
+    @click.option('--trace-file', type=click.Path(dir_okay=False),
+                  help='Write stage timings as a Chrome trace (chrome://tracing, Perfetto)')
+    @functools.wraps(command)
+    def wrapper(*args, profile: bool, trace_file: Optional[str], **kwargs):
+        if not (profile or trace_file):
+            return command(*args, **kwargs)
+        
+        tracer = start_tracing()
+        try:
+            with span(command.__name__):
+                return command(*args, **kwargs)
+        finally:
+            stop_tracing()
+            if profile:
+                print("\n" + "="*50, file=sys.stderr)
+                print("PROFILE", file=sys.stderr)
+                print("="*50, file=sys.stderr)
+                print(tracer.format_table(), file=sys.stderr)
+            if trace_file:
+                tracer.write_chrome_trace(trace_file)
+    return wrapper
+
+
+@click.group(cls=_DaemonAwareGroup)
 @click.version_option(version="0.1.0")
 def main():
     """ts - Natural language to Terraform CLI for Cloudflare."""
@@ -44,74 +117,348 @@ def init():
 
 
 @main.command()
-@click.argument('prompt', required=True)
+@_profiled
+@click.argument('prompt', required=False)
 @click.option('--dir', 'output_dir', help='Output directory for generated files')
-def plan(prompt: str, output_dir: Optional[str]):
+@click.option('--no-cache', is_flag=True, help='Bypass the cached prompt translation')
+@click.option('--dsl', 'dsl_file', type=click.Path(exists=True, dir_okay=False),
+              help='Use a DSL document (JSON or YAML) instead of a prompt')
+@click.option('--content-addressed/--timestamped', 'content_addressed', default=None,
+              help='Reuse one run directory per distinct rendered config (default from config)')
+@click.option('--batch', 'batch_file', type=click.File('r'),
+              help="File with one prompt per line or JSONL ('-' for stdin)")
+@click.option('--jobs', default=4, show_default=True, help='Concurrent prompts in batch mode')
+@click.option('--upgrade-providers', is_flag=True,
+              help='Run terraform init -upgrade to pick up newer providers')
+@click.option('--summary-json', type=click.Path(dir_okay=False),
+              help='Write the change summary as JSON to this file (one entry per prompt with --batch)')
+@click.option('--detailed-exitcode', is_flag=True,
+              help='Exit with 0 for no changes, 2 for changes, 3 for destructive changes')
+@click.option('--engine', type=click.Choice(['terraform', 'api']), default='terraform', show_default=True,
+              help='Plan single DNS record changes directly against the Cloudflare API')
+@click.option('--import-block', is_flag=True,
+              help='With --engine api, write a Terraform import block for the record on apply')
+@_terraform_options
+@_refresh_options
+def plan(prompt: Optional[str], output_dir: Optional[str], no_cache: bool, dsl_file: Optional[str],
+         content_addressed: Optional[bool], batch_file, jobs: int, upgrade_providers: bool, summary_json: Optional[str],
+         detailed_exitcode: bool, engine: str, import_block: bool, parallelism: Optional[int],
+         lock_timeout: Optional[str], refresh: Optional[bool], fast: bool):
     """Generate and plan Terraform configuration from natural language."""
+    from .cloudflare import resolve_zone_id
+    from .dns_api import API_PLAN_FILE_NAME, supports_api_engine
+    from .dsl import validate_dsl
+    from .render import render_terraform
+    from .tfexec import TerraformExecutor, PLAN_FILE_NAME
+    
     config = load_config()
-    config.validate_required()
     
-    info_message(f"Processing: {prompt}")
+    if sum(bool(x) for x in (prompt, dsl_file, batch_file)) > 1:
+        error_exit("Pass only one of PROMPT, --dsl or --batch.")
+    if batch_file and engine == 'api':
+        error_exit("--engine api does not support --batch.")
+    if batch_file and content_addressed is not None:
+        error_exit("--content-addressed and --timestamped do not apply to --batch.")
+    if batch_file:
+        config.validate_required()
+        _plan_batch(batch_file, config, jobs, output_dir, no_cache, upgrade_providers, summary_json,
+                    detailed_exitcode, parallelism, lock_timeout, refresh, fast)
+        return
     
-    # Convert natural language to DSL
-    try:
-        dsl_data = to_dsl(prompt, config)
-        info_message("✓ Natural language converted to DSL")
-    except Exception as e:
-        error_exit(f"Failed to convert prompt to DSL: {e}")
+    dsl_data = _get_dsl(prompt, dsl_file, config, no_cache)
     
     # Validate DSL
     try:
-        validate_dsl(dsl_data)
+        with span("validate"):
+            validate_dsl(dsl_data)
         info_message("✓ DSL validation passed")
     except Exception as e:
         error_exit(f"DSL validation failed: {e}")
+    if engine == 'api' and not supports_api_engine(dsl_data):
+        error_exit("--engine api only supports create_dns_record and delete_dns_record.")
     
     # Render Terraform files
     try:
-        work_dir = render_terraform(dsl_data, config, output_dir)
+        with span("resolve_zone"):
+            zone_id = resolve_zone_id(dsl_data["zone_name"], config)
+        with span("render"):
+            work_dir = render_terraform(dsl_data, config, output_dir, content_addressed=content_addressed,
+                                        prompt=prompt, zone_id=zone_id)
         info_message(f"✓ Terraform files generated in: {work_dir}")
     except Exception as e:
         error_exit(f"Failed to render Terraform files: {e}")
     
+    if engine == 'api':
+        summary = _plan_dns_api(dsl_data, config, work_dir, import_block, summary_json)
+        if detailed_exitcode:
+            sys.exit(summary.exit_code())
+        return
+    
+    # A Terraform plan replaces any API plan left in a reused run directory
+    (work_dir / API_PLAN_FILE_NAME).unlink(missing_ok=True)
+    
     # Execute terraform plan
     try:
-        executor = TerraformExecutor(work_dir)
-        executor.init()
-        info_message("✓ Terraform initialized")
-        
-        plan_output = executor.plan()
-        info_message("✓ Terraform plan completed")
+        executor = TerraformExecutor.from_config(work_dir, config, parallelism, lock_timeout)
+        with span("init"):
+            executor.init(upgrade=upgrade_providers)
+        if executor.init_skipped:
+            info_message("✓ Terraform already initialized (providers unchanged)")
+        else:
+            info_message("✓ Terraform initialized")
         
         print("\n" + "="*50)
         print("TERRAFORM PLAN OUTPUT")
         print("="*50)
-        print(plan_output)
+        _stream_terraform_output(executor, work_dir)
+        with span("plan"):
+            executor.plan(refresh=executor.should_refresh(config, refresh, fast))
+        info_message("✓ Terraform plan completed")
+        
+        with span("summarize"):
+            summary = executor.summarize_plan(work_dir / PLAN_FILE_NAME)
+        _print_plan_summary(summary)
+        if summary_json:
+            with open(summary_json, 'w') as f:
+                json.dump(summary.to_dict(), f, indent=2)
         
+        get_run_index().set_status(work_dir, PLANNED)
+        _auto_gc(config, work_dir)
         success_message(f"Plan completed successfully! Files in: {work_dir}")
+        info_message("Run 'ts apply' to apply the saved plan.")
         
     except Exception as e:
+        get_run_index().set_status(work_dir, PLAN_FAILED)
         error_exit(f"Terraform plan failed: {e}")
+    
+    if detailed_exitcode:
+        sys.exit(summary.exit_code())
+
+
+def _plan_dns_api(dsl_data: dict, config, work_dir: Path, import_block: bool, summary_json: Optional[str]):
+    """Plan a single DNS record change against the Cloudflare API and save it in work_dir."""
+    from .cloudflare import get_cloudflare_client, resolve_zone_id
+    from .dns_api import plan_dns_change
+    
+    client = get_cloudflare_client(config)
+    if client is None:
+        error_exit("--engine api requires a Cloudflare API token. Run 'ts init' or set CLOUDFLARE_API_TOKEN.")
+    
+    try:
+        with span("plan"):
+            zone_id = resolve_zone_id(dsl_data["zone_name"], config)
+            if not zone_id:
+                raise ValueError(f"Could not resolve zone {dsl_data['zone_name']}")
+            dns_plan = plan_dns_change(dsl_data, client, zone_id, import_block=import_block)
+            dns_plan.save(work_dir)
+        info_message("✓ DNS change planned against the Cloudflare API")
+        
+        summary = dns_plan.summary()
+        _print_plan_summary(summary)
+        if summary_json:
+            with open(summary_json, 'w') as f:
+                json.dump(summary.to_dict(), f, indent=2)
+        
+        get_run_index().set_status(work_dir, PLANNED)
+        success_message(f"Plan completed successfully! Files in: {work_dir}")
+        info_message("Run 'ts apply' to apply the saved plan.")
+    except Exception as e:
+        get_run_index().set_status(work_dir, PLAN_FAILED)
+        error_exit(f"DNS API plan failed: {e}")
+    return summary
+
+
+def _get_dsl(prompt: Optional[str], dsl_file: Optional[str], config, no_cache: bool,
+             label: str = "Processing") -> dict:
+    """Get DSL data from a DSL file or by translating a prompt."""
+    import yaml
+    from .llm import to_dsl
+    
+    if dsl_file:
+        info_message(f"{label}: {dsl_file}")
+        try:
+            with span("load_dsl"), open(dsl_file, 'r') as f:
+                dsl_data = yaml.safe_load(f)
+        except Exception as e:
+            error_exit(f"Failed to read DSL file: {e}")
+        if not isinstance(dsl_data, dict):
+            error_exit("DSL file must contain a single document object.")
+        return dsl_data
+    
+    if not prompt:
+        error_exit("Missing PROMPT. Pass a prompt or a DSL file with --dsl.")
+    
+    config.validate_required()
+    info_message(f"{label}: {prompt}")
+    
+    # Convert natural language to DSL
+    try:
+        with span("translate"):
+            dsl_data = to_dsl(prompt, config, use_cache=not no_cache)
+        info_message("✓ Natural language converted to DSL")
+    except Exception as e:
+        error_exit(f"Failed to convert prompt to DSL: {e}")
+    return dsl_data
+
+
+def _print_plan_summary(summary) -> None:
+    """Print the change summary of a plan."""
+    print("\n" + "="*50)
+    print("CHANGE SUMMARY")
+    print("="*50)
+    print(summary.format_table())
+
+
+def _plan_batch(batch_file, config, jobs: int, output_dir: Optional[str], no_cache: bool,
+                upgrade_providers: bool, summary_json: Optional[str], detailed_exitcode: bool,
+                parallelism: Optional[int], lock_timeout: Optional[str], refresh: Optional[bool],
+                fast: bool) -> None:
+    """Run the plan pipeline for every prompt in a batch file."""
+    from .batch import load_prompts, run_batch
+    from .fleet import aggregate_exit_code
+    
+    try:
+        prompts = load_prompts(batch_file)
+    except ValueError as e:
+        error_exit(f"Failed to read batch file: {e}")
+    if not prompts:
+        error_exit("Batch file contains no prompts.")
+    
+    info_message(f"Processing {len(prompts)} prompts with up to {jobs} in parallel...")
+    start = time.perf_counter()
+    results = run_batch(prompts, config, jobs=jobs, output_dir=output_dir, use_cache=not no_cache,
+                        upgrade_providers=upgrade_providers, parallelism=parallelism,
+                        lock_timeout=lock_timeout, refresh=refresh, fast=fast)
+    wall_time = time.perf_counter() - start
+    
+    print("\n" + "="*50)
+    print("BATCH RESULTS")
+    print("="*50)
+    for result in results:
+        status = "✓" if result.ok else f"✗ {result.stage}"
+        print(f"[{result.index:03d}] {status:<12} {result.elapsed:6.1f}s  {result.prompt}")
+        if result.work_dir:
+            print(f"      dir: {result.work_dir}")
+        if result.error:
+            print(f"      error: {result.error}")
+    
+    if summary_json:
+        with open(summary_json, 'w') as f:
+            json.dump([result.to_dict() for result in results], f, indent=2)
+    
+    failed = [r for r in results if not r.ok]
+    summary = f"{len(results) - len(failed)}/{len(results)} prompts planned in {wall_time:.1f}s"
+    if failed:
+        error_exit(summary)
+    success_message(f"{summary}. Plan output saved as plan.txt in each run directory.")
+    if detailed_exitcode:
+        sys.exit(aggregate_exit_code(results))
+
+
+@main.command('plan-all')
+@click.option('--dirs', 'dirs', multiple=True, type=click.Path(exists=True, file_okay=False),
+              help='Run directory to plan (repeatable; default: every run in ./terraform)')
+@click.option('--jobs', default=4, show_default=True, help='Concurrent terraform plans')
+@click.option('--summary-json', type=click.Path(dir_okay=False),
+              help='Write per-directory results as JSON to this file')
+@_terraform_options
+@_refresh_options
+def plan_all(dirs, jobs: int, summary_json: Optional[str], parallelism: Optional[int], lock_timeout: Optional[str],
+             refresh: Optional[bool], fast: bool):
+    """Plan many existing run directories, e.g. for drift checks.
+    
+    Exits with 1 if any plan failed, otherwise 3 if any plan is destructive,
+    2 if any has changes and 0 if none do.
+    """
+    from .fleet import aggregate_exit_code, find_run_dirs, plan_dirs
+    
+    config = load_config()
+    work_dirs = [Path(d) for d in dirs] or find_run_dirs(Path.cwd() / "terraform")
+    if not work_dirs:
+        error_exit("No run directories found. Pass --dirs or run 'ts plan' first.")
+    
+    info_message(f"Planning {len(work_dirs)} directories with up to {jobs} in parallel...")
+    start = time.perf_counter()
+    results = plan_dirs(work_dirs, config, jobs=jobs, parallelism=parallelism, lock_timeout=lock_timeout,
+                        refresh=refresh, fast=fast)
+    wall_time = time.perf_counter() - start
+    
+    print("\n" + "="*50)
+    print("PLAN RESULTS")
+    print("="*50)
+    for result in results:
+        if result.error:
+            status = "error"
+        else:
+            totals = result.summary.totals()
+            status = ", ".join(f"{n} {a}" for a, n in totals.items() if n) or "no changes"
+        print(f"[{result.exit_code}] {result.elapsed:6.1f}s  {result.work_dir}  {status}")
+        if result.error:
+            print(f"      error: {result.error}")
+    
+    if summary_json:
+        with open(summary_json, 'w') as f:
+            json.dump([result.to_dict() for result in results], f, indent=2)
+    
+    code = aggregate_exit_code(results)
+    throttled = sum(result.throttled for result in results)
+    info_message(f"{len(results)} directories planned in {wall_time:.1f}s "
+                 f"({throttled:.1f}s waiting for the API rate budget)")
+    sys.exit(code)
+
+
+@main.command('import-zone')
+@click.argument('zone_file', type=click.File('r'))
+@click.option('--zone', 'zone_name', help='Zone the file describes (default from config)')
+@click.option('--dir', 'output_dir', help='Output directory for generated files')
+def import_zone(zone_file, zone_name: Optional[str], output_dir: Optional[str]):
+    """Import the records of a BIND zone file into one Terraform configuration."""
+    from .zonefile import ZoneFileError, import_zone as run_import
+    
+    config = load_config()
+    zone_name = zone_name or config.default_zone
+    if not zone_name:
+        error_exit("Missing zone. Pass --zone or set a default zone with 'ts init'.")
+    
+    info_message(f"Importing {zone_file.name} into zone {zone_name}")
+    try:
+        with span("import"):
+            result = run_import(zone_file, zone_name, config, output_dir, prompt=f"import-zone {zone_file.name}")
+    except ZoneFileError as e:
+        error_exit(f"Failed to parse zone file: {e}")
+    except Exception as e:
+        error_exit(f"Failed to import zone file: {e}")
+    
+    info_message(f"✓ {result.imported} records written to {result.work_dir}")
+    if result.skipped:
+        info_message(f"Skipped {result.skipped} records of unsupported types or the zone's own NS records")
+    if result.invalid:
+        warning_message(f"{result.invalid} invalid records were not imported:")
+        for error in result.errors:
+            print(f"  {error}", file=sys.stderr)
+        if result.invalid > len(result.errors):
+            print(f"  ... and {result.invalid - len(result.errors)} more", file=sys.stderr)
+    success_message(f"Zone imported! Files in: {result.work_dir}")
+    info_message(f"Run 'ts apply --dir {result.work_dir}' to plan and apply the records.")
 
 
 @main.command()
+@_profiled
 @click.option('--approve', is_flag=True, help='Auto-approve the apply')
 @click.option('--dir', 'work_dir', help='Working directory (uses latest if not specified)')
-def apply(approve: bool, work_dir: Optional[str]):
+@click.option('--progress', is_flag=True, help='Show one line per resource instead of the raw terraform output')
+@_terraform_options
+def apply(approve: bool, work_dir: Optional[str], progress: bool, parallelism: Optional[int],
+          lock_timeout: Optional[str]):
     """Apply the Terraform configuration."""
+    from .dns_api import DnsApiPlan
+    from .tfexec import TerraformExecutor, PLAN_FILE_NAME
+    
     config = load_config()
     config.validate_required()
     
     if not work_dir:
-        # Find the latest terraform directory in current working directory
-        terraform_dir = Path.cwd() / "terraform"
-        if not terraform_dir.exists():
-            error_exit("No terraform directory found. Run 'ts plan' first.")
-        
-        run_dirs = [d for d in terraform_dir.glob("*") if d.is_dir()]
-        if not run_dirs:
-            error_exit("No previous runs found. Run 'ts plan' first.")
-        work_dir = str(max(run_dirs, key=lambda x: x.stat().st_mtime))
+        work_dir = str(_find_latest_run_dir())
         info_message(f"Using latest run directory: {work_dir}")
     
     work_path = Path(work_dir)
@@ -119,23 +466,63 @@ def apply(approve: bool, work_dir: Optional[str]):
         error_exit(f"Working directory does not exist: {work_dir}")
     
     try:
-        executor = TerraformExecutor(work_path)
+        dns_plan = DnsApiPlan.load(work_path)
+    except (OSError, ValueError, TypeError) as e:
+        error_exit(f"Failed to read DNS API plan: {e}")
+    if dns_plan is not None:
+        _apply_dns_api(dns_plan, config, work_path, approve)
+        return
+    
+    try:
+        executor = TerraformExecutor.from_config(work_path, config, parallelism, lock_timeout)
+        
+        # Reuse the plan saved by 'ts plan' so state is only refreshed once
+        plan_file = executor.saved_plan(config.plan_max_age)
+        if plan_file:
+            info_message(f"Using saved plan: {plan_file}")
+        else:
+            info_message("No fresh saved plan found, planning...")
+            # Imported zones and pruned runs were never (or no longer) initialized
+            with span("init"):
+                executor.init()
+            with span("plan"):
+                executor.plan(refresh=config.terraform_refresh)
+            plan_file = work_path / PLAN_FILE_NAME
         
-        # Check if there are any destroys in the plan
+        with span("summarize"):
+            summary = executor.summarize_plan(plan_file)
+        _print_plan_summary(summary)
+        if not summary.has_changes:
+            success_message("No changes to apply.")
+            return
+        
+        # Show the full diff before asking for approval
         if not approve:
-            plan_output = executor.plan()
-            if "destroy" in plan_output.lower() or "delete" in plan_output.lower():
+            with span("show"):
+                print(executor.show(plan_file))
+            if summary.has_destructive:
                 if not click.confirm("⚠️  This plan contains destructive changes. Continue?"):
                     info_message("Apply cancelled.")
                     return
-        
-        apply_output = executor.apply(auto_approve=approve)
-        info_message("✓ Terraform apply completed")
+            elif not click.confirm("Apply these changes?"):
+                info_message("Apply cancelled.")
+                return
         
         print("\n" + "="*50)
         print("TERRAFORM APPLY OUTPUT")
         print("="*50)
-        print(apply_output)
+        _stream_terraform_output(executor, work_path)
+        if progress:
+            executor.on_output = None
+            executor.on_event = _print_progress_event
+        try:
+            with span("apply"):
+                executor.apply(plan_file=plan_file)
+        except Exception:
+            get_run_index().set_status(work_path, APPLY_FAILED)
+            raise
+        get_run_index().set_status(work_path, APPLIED)
+        info_message("✓ Terraform apply completed")
         
         success_message("Apply completed successfully!")
         
@@ -143,41 +530,277 @@ def apply(approve: bool, work_dir: Optional[str]):
         error_exit(f"Terraform apply failed: {e}")
 
 
+def _apply_dns_api(dns_plan, config, work_dir: Path, approve: bool) -> None:
+    """Apply a DNS change planned with --engine api."""
+    from .cloudflare import get_cloudflare_client
+    from .dns_api import apply_dns_plan, plan_dns_change
+    from .plan_analysis import DELETE
+    
+    client = get_cloudflare_client(config)
+    if client is None:
+        error_exit("Applying a DNS API plan requires a Cloudflare API token.")
+    
+    try:
+        if not dns_plan.is_fresh(config.plan_max_age):
+            info_message("No fresh saved plan found, planning...")
+            with span("plan"):
+                dns_plan = plan_dns_change(dns_plan.dsl, client, dns_plan.zone_id,
+                                           import_block=dns_plan.import_block)
+                dns_plan.save(work_dir)
+        
+        summary = dns_plan.summary()
+        _print_plan_summary(summary)
+        if not summary.has_changes:
+            success_message("No changes to apply.")
+            return
+        
+        if not approve:
+            if summary.has_destructive:
+                if not click.confirm("⚠️  This plan contains destructive changes. Continue?"):
+                    info_message("Apply cancelled.")
+                    return
+            elif not click.confirm("Apply these changes?"):
+                info_message("Apply cancelled.")
+                return
+        
+        try:
+            with span("apply"):
+                applied = apply_dns_plan(dns_plan, client, work_dir)
+        except Exception:
+            get_run_index().set_status(work_dir, APPLY_FAILED)
+            raise
+        get_run_index().set_status(work_dir, APPLIED)
+        for change in applied:
+            info_message(f"✓ {change.action}: {change.record['type']} {change.record['name']}")
+        if dns_plan.import_block and any(change.action != DELETE for change in applied):
+            info_message("✓ Import block written to imports.tf")
+        
+        success_message("Apply completed successfully!")
+        
+    except Exception as e:
+        error_exit(f"DNS API apply failed: {e}")
+
+
+def _stream_terraform_output(executor, work_dir: Path) -> None:
+    """Print terraform output as it arrives and keep a copy in the run's terraform.log."""
+    executor.on_output = _print_terraform_line
+    executor.log_file = work_dir / TERRAFORM_LOG_FILE_NAME
+
+
+def _print_terraform_line(stream: str, line: str) -> None:
+    """Print one line of terraform output to the matching stream."""
+    print(line, end="", file=sys.stderr if stream == "stderr" else sys.stdout, flush=True)
+
+
+def _print_progress_event(event: dict) -> None:
+    """Print resource progress and diagnostics from terraform -json events."""
+    if event.get("type") in PROGRESS_EVENT_TYPES:
+        print(event.get("@message", ""), flush=True)
+
+
+def _find_latest_run_dir() -> Path:
+    """Find the latest run directory, from the run index or by scanning terraform/."""
+    latest = get_run_index().latest()
+    if latest and Path(latest["path"]).is_dir():
+        return Path(latest["path"])
+    
+    # Fall back to scanning for runs made before the index existed
+    terraform_dir = Path.cwd() / "terraform"
+    if not terraform_dir.exists():
+        error_exit("No terraform directory found. Run 'ts plan' first.")
+    
+    run_dirs = [d for d in terraform_dir.glob("*") if d.is_dir()]
+    if not run_dirs:
+        error_exit("No previous runs found. Run 'ts plan' first.")
+    return max(run_dirs, key=lambda x: x.stat().st_mtime)
+
+
 @main.command()
-@click.argument('prompt', required=True)
+@_profiled
+@click.argument('prompt', required=False)
 @click.option('--dir', 'output_dir', help='Output directory for generated files')
-def dryrun(prompt: str, output_dir: Optional[str]):
+@click.option('--no-cache', is_flag=True, help='Bypass the cached prompt translation')
+@click.option('--dsl', 'dsl_file', type=click.Path(exists=True, dir_okay=False),
+              help='Use a DSL document (JSON or YAML) instead of a prompt')
+@click.option('--content-addressed/--timestamped', 'content_addressed', default=None,
+              help='Reuse one run directory per distinct rendered config (default from config)')
+def dryrun(prompt: Optional[str], output_dir: Optional[str], no_cache: bool, dsl_file: Optional[str],
+           content_addressed: Optional[bool]):
     """Generate Terraform configuration without executing it."""
+    from .dsl import validate_dsl
+    from .render import render_terraform
+    
     config = load_config()
-    config.validate_required()
     
-    info_message(f"Dry run for: {prompt}")
+    if prompt and dsl_file:
+        error_exit("Pass either a PROMPT or --dsl, not both.")
     
-    # Convert natural language to DSL
-    try:
-        dsl_data = to_dsl(prompt, config)
-        info_message("✓ Natural language converted to DSL")
-    except Exception as e:
-        error_exit(f"Failed to convert prompt to DSL: {e}")
+    dsl_data = _get_dsl(prompt, dsl_file, config, no_cache, label="Dry run for")
     
     # Validate DSL
     try:
-        validate_dsl(dsl_data)
+        with span("validate"):
+            validate_dsl(dsl_data)
         info_message("✓ DSL validation passed")
     except Exception as e:
         error_exit(f"DSL validation failed: {e}")
     
     # Render Terraform files
     try:
-        work_dir = render_terraform(dsl_data, config, output_dir)
+        with span("render"):
+            work_dir = render_terraform(dsl_data, config, output_dir, content_addressed=content_addressed,
+                                        prompt=prompt)
         info_message(f"✓ Terraform files generated in: {work_dir}")
     except Exception as e:
         error_exit(f"Failed to render Terraform files: {e}")
     
+    _auto_gc(config, work_dir)
     success_message(f"Dry run completed! Files generated in: {work_dir}")
     info_message("Run 'ts plan' with the same prompt to execute terraform plan.")
 
 
+@main.command()
+@click.option('--keep-last', type=int, help='Newest runs to always keep (default from config)')
+@click.option('--max-age', type=int, help='Prune runs older than this many seconds (default from config)')
+@click.option('--max-bytes', type=int, help='Total size budget for run directories (default from config)')
+@click.option('--no-dedupe', is_flag=True, help='Do not hardlink identical provider binaries')
+@click.option('--dry-run', is_flag=True, help='Only report what would be pruned')
+def gc(keep_last: Optional[int], max_age: Optional[int], max_bytes: Optional[int], no_dedupe: bool,
+       dry_run: bool):
+    """Prune old run directories in ./terraform."""
+    from .retention import collect_garbage
+    
+    config = load_config()
+    result = collect_garbage(
+        Path.cwd() / "terraform",
+        keep_last=config.retention_keep_last if keep_last is None else keep_last,
+        max_age=config.retention_max_age if max_age is None else max_age,
+        max_bytes=config.retention_max_bytes if max_bytes is None else max_bytes,
+        dedupe=not no_dedupe,
+        dry_run=dry_run,
+    )
+    
+    verb = "Would remove" if dry_run else "Removed"
+    for path in result.removed:
+        print(f"{verb}: {path}")
+    for path in result.pruned:
+        print(f"{verb} .terraform and saved plans (state kept): {path}")
+    if result.deduplicated:
+        print(f"{'Would hardlink' if dry_run else 'Hardlinked'} {result.deduplicated} duplicate provider files")
+    
+    reclaimed = _format_bytes(result.bytes_reclaimed)
+    if dry_run:
+        info_message(f"Dry run: {reclaimed} would be reclaimed.")
+    else:
+        success_message(f"Reclaimed {reclaimed}.")
+
+
+def _format_bytes(size: int) -> str:
+    """Format a byte count for humans."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _auto_gc(config, work_dir: Path) -> None:
+    """Apply the retention policy after a run when enabled in config."""
+    if not config.retention_auto:
+        return
+    from .retention import apply_retention
+    
+    try:
+        result = apply_retention(config, keep=[work_dir])
+    except OSError as e:
+        warning_message(f"Run directory cleanup failed: {e}")
+        return
+    if result.removed or result.pruned or result.deduplicated:
+        info_message(f"✓ Pruned old runs, reclaimed {_format_bytes(result.bytes_reclaimed)}")
+
+
+@main.group()
+def runs():
+    """Inspect previous runs in ./terraform."""
+    pass
+
+
+@runs.command('list')
+@click.option('--limit', default=20, show_default=True, help='Number of runs to show (0 for all)')
+def runs_list(limit: int):
+    """List runs, most recent first."""
+    entries = get_run_index().list(limit=limit)
+    if not entries:
+        info_message("No runs recorded. Run 'ts plan' or 'ts dryrun' first.")
+        return
+    
+    for entry in entries:
+        updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["updated_at"]))
+        print(f"{entry['run_id']:<24} {entry['status']:<13} {updated}  {entry['prompt'] or '-'}")
+
+
+@runs.command('show')
+@click.argument('run')
+def runs_show(run: str):
+    """Show a run by ID or directory."""
+    entry = get_run_index().get(run)
+    if not entry:
+        error_exit(f"Run not found: {run}")
+    print(json.dumps(entry, indent=2))
+
+
+@runs.command('latest')
+def runs_latest():
+    """Print the directory of the most recent run."""
+    entry = get_run_index().latest()
+    if not entry:
+        error_exit("No runs recorded. Run 'ts plan' or 'ts dryrun' first.")
+    print(entry["path"])
+
+
+@main.command()
+@click.option('--reset', is_flag=True, help='Refill the bucket and clear the backoff and counters')
+@click.option('--json', 'as_json', is_flag=True, help='Print the status as JSON')
+def ratelimit(reset: bool, as_json: bool):
+    """Show the Cloudflare API budget shared by all ts processes."""
+    from .ratelimit import get_rate_limiter
+    
+    limiter = get_rate_limiter(load_config())
+    if reset:
+        limiter.reset()
+        success_message("Rate limiter reset.")
+        return
+    
+    stats = limiter.stats()
+    if as_json:
+        print(json.dumps(stats.to_dict(), indent=2))
+        return
+    print(f"Budget:     {stats.rate:g} requests/s, burst {stats.capacity:g}")
+    print(f"Available:  {stats.tokens:.1f} requests")
+    if stats.paused_for > 0:
+        print(f"Paused:     {stats.paused_for:.1f}s more after a 429 (backoff {stats.backoff:g}s)")
+    print(f"Throttled:  {stats.throttled_seconds:.1f}s over {stats.waits} waits")
+    print(f"429s:       {stats.rate_limited}")
+
+
+@main.command()
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Unix socket to listen on (default: ts.sock in the data directory)')
+def serve(socket_path: Optional[str]):
+    """Run a daemon that keeps clients, schema and templates warm between commands."""
+    from .daemon import get_socket_path, serve as serve_daemon
+    
+    config = load_config()
+    path = Path(socket_path) if socket_path else get_socket_path()
+    info_message(f"Serving on {path} (Ctrl-C to stop)")
+    info_message("plan, dryrun and apply --approve are forwarded here; set TS_NO_DAEMON=1 to bypass.")
+    try:
+        serve_daemon(config, path)
+    except KeyboardInterrupt:
+        info_message("Daemon stopped.")
+    except (RuntimeError, OSError) as e:
+        error_exit(f"Failed to start daemon: {e}")
+
+
 @main.command()
 def doctor():
     """Check system requirements and configuration."""
@@ -223,8 +846,8 @@ def doctor():
     # Test OpenAI connectivity
     if config.openai_api_key:
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=config.openai_api_key)
+            from .llm import get_openai_client
+            client = get_openai_client(config)
             # Test with a simple completion
             response = client.chat.completions.create(
                 model=config.model_id,
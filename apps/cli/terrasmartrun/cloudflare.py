@@ -0,0 +1,177 @@
+"""Cloudflare API client for TerraSmart."""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import DiskCache, make_key
+from .config import Config
+from .ratelimit import get_rate_limiter
+from .utils import get_data_dir
+
+
+API_BASE_URL = "https://api.cloudflare.com/client/v4"
+
+# Keep-alive connections shared by all Cloudflare calls in a process
+POOL_SIZE = 10
+
+# Times a request rejected with 429 is retried after backing off
+MAX_RATE_LIMIT_RETRIES = 5
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class CloudflareAPIError(Exception):
+    """Error response from the Cloudflare API."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        """Initialize with the API message and HTTP status."""
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CloudflareClient:
+    """Minimal Cloudflare v4 API client on a pooled HTTP session.
+    
+    With a rate_limiter (see ratelimit.SharedTokenBucket), every request
+    takes a token first, and 429 responses pause all callers and are retried.
+    """
+    
+    def __init__(self, api_token: str, timeout: float = 30.0, session: Optional[requests.Session] = None,
+                 rate_limiter=None):
+        """Initialize client for an API token."""
+        self.api_token = api_token
+        self.timeout = timeout
+        self.session = session or get_session()
+        self.rate_limiter = rate_limiter
+    
+    def request(self, method: str, path: str, **kwargs: Any) -> Any:
+        """Call an API endpoint and return the result of a successful response."""
+        headers = {"Authorization": f"Bearer {self.api_token}"}
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.request(method, f"{API_BASE_URL}{path}", headers=headers,
+                                                timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                raise CloudflareAPIError(f"Cloudflare API request failed: {e}")
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            self._back_off(response)
+        if self.rate_limiter is not None and response.status_code != 429:
+            self.rate_limiter.report_success()
+        
+        try:
+            body = response.json()
+        except ValueError:
+            raise CloudflareAPIError(f"Invalid response from Cloudflare API (HTTP {response.status_code})",
+                                     response.status_code)
+        if not response.ok or not body.get("success", False):
+            errors = "; ".join(e.get("message", "") for e in body.get("errors", [])) or response.reason
+            raise CloudflareAPIError(f"Cloudflare API error (HTTP {response.status_code}): {errors}",
+                                     response.status_code)
+        return body.get("result")
+    
+    def _back_off(self, response: requests.Response) -> None:
+        """Wait out a 429, sharing the pause with other callers when rate limited."""
+        try:
+            retry_after = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            retry_after = None
+        if self.rate_limiter is not None:
+            # The next acquire() waits until the shared pause is over
+            self.rate_limiter.report_rate_limited(retry_after)
+        else:
+            time.sleep(retry_after or 1.0)
+    
+    def get_zone_id(self, zone_name: str) -> str:
+        """Look up the ID of a zone by name."""
+        zones = self.request("GET", "/zones", params={"name": zone_name})
+        if not zones:
+            raise CloudflareAPIError(f"Zone not found: {zone_name}")
+        return zones[0]["id"]
+    
+    def list_dns_records(self, zone_id: str, name: str, record_type: str,
+                         content: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List the DNS records of a zone matching name, type and optionally content."""
+        params = {"name": name, "type": record_type, "per_page": 100}
+        if content is not None:
+            params["content"] = content
+        return self.request("GET", f"/zones/{zone_id}/dns_records", params=params) or []
+    
+    def create_dns_record(self, zone_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a DNS record and return it."""
+        return self.request("POST", f"/zones/{zone_id}/dns_records", json=record)
+    
+    def update_dns_record(self, zone_id: str, record_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Update fields of a DNS record and return it."""
+        return self.request("PATCH", f"/zones/{zone_id}/dns_records/{record_id}", json=record)
+    
+    def delete_dns_record(self, zone_id: str, record_id: str) -> None:
+        """Delete a DNS record."""
+        self.request("DELETE", f"/zones/{zone_id}/dns_records/{record_id}")
+
+
+def get_session() -> requests.Session:
+    """Get the HTTP session shared by all Cloudflare clients in this process."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def get_api_token(config: Config) -> Optional[str]:
+    """Get the Cloudflare API token from config or environment."""
+    return config.cloudflare_api_token or os.environ.get('CLOUDFLARE_API_TOKEN') or None
+
+
+def get_cloudflare_client(config: Config) -> Optional[CloudflareClient]:
+    """Get a client for the configured token, or None without one."""
+    api_token = get_api_token(config)
+    if not api_token:
+        return None
+    return CloudflareClient(api_token, rate_limiter=get_rate_limiter(config))
+
+
+def get_zone_cache(config: Config) -> DiskCache:
+    """Get the zone name to zone ID cache."""
+    return DiskCache(
+        get_data_dir() / "cache" / "zones",
+        ttl=config.zone_cache_ttl,
+        max_entries=config.cache_max_entries,
+    )
+
+
+def resolve_zone_id(zone_name: str, config: Config) -> Optional[str]:
+    """Get the ID of a zone from the cache or the API.
+    
+    Returns None when it cannot be resolved, e.g. without an API token or
+    network access; Terraform then looks the zone up itself.
+    """
+    client = get_cloudflare_client(config)
+    if client is None:
+        return None
+    
+    # Tokens may see different zones, so cache per token
+    cache = get_zone_cache(config)
+    key = make_key(zone_name, make_key(client.api_token))
+    zone_id = cache.get(key)
+    if zone_id:
+        return zone_id
+    
+    try:
+        zone_id = client.get_zone_id(zone_name)
+    except CloudflareAPIError:
+        return None
+    cache.set(key, zone_id)
+    return zone_id
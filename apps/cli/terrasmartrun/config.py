@@ -17,6 +17,28 @@ class Config:
     account_id: Optional[str] = None
     default_zone: Optional[str] = None
     model_id: str = "gpt-4o-mini"  # Using available model instead of gpt-5-nano
+    cache_ttl: int = 7 * 24 * 3600  # Seconds before a cached prompt translation expires
+    cache_max_entries: int = 1000
+    zone_cache_ttl: int = 24 * 3600  # Seconds before a cached zone ID is looked up again
+    openai_timeout: float = 30.0  # Seconds per OpenAI request
+    openai_connect_timeout: float = 5.0
+    openai_pool_size: int = 10  # Keep-alive connections shared across calls
+    openai_max_retries: int = 3  # Retries of failed OpenAI calls before the rule-based fallback
+    openai_retry_backoff: float = 0.5  # Seconds before the first retry, doubled with jitter after
+    openai_deadline: float = 60.0  # Seconds for one translation including retries
+    openai_hedge: bool = True  # Send a second request when one is slower than the recent p95
+    plan_max_age: int = 3600  # Seconds a saved plan may be applied without replanning
+    content_addressed_runs: bool = False  # Reuse run directories for identical renders
+    terraform_parallelism: int = 0  # Concurrent resource operations, 0 for terraform's default
+    terraform_refresh: bool = True  # Refresh state from the provider when planning
+    terraform_lock_timeout: str = ""  # How long to wait for a state lock, e.g. "30s"
+    fast_plan_max_state_age: int = 300  # Seconds state stays fresh enough for --fast plans
+    retention_keep_last: int = 50  # Newest run directories always kept
+    retention_max_age: int = 30 * 24 * 3600  # Seconds before older run directories are pruned
+    retention_max_bytes: int = 0  # Total size budget for run directories, 0 for no limit
+    retention_auto: bool = False  # Prune after every plan and dry run
+    cloudflare_rate_limit: float = 4.0  # API requests per second (Cloudflare allows 1200 per 5 minutes)
+    cloudflare_burst: int = 100  # API requests allowed at once before throttling
     
     @property
     def config_file(self) -> Path:
@@ -44,6 +66,43 @@ class Config:
             self.default_zone = defaults.get("zone_name")
             self.model_id = defaults.get("model_id", self.model_id)
             
+            # Load cache section
+            cache = data.get("cache", {})
+            self.cache_ttl = int(cache.get("ttl", self.cache_ttl))
+            self.cache_max_entries = int(cache.get("max_entries", self.cache_max_entries))
+            self.zone_cache_ttl = int(cache.get("zone_ttl", self.zone_cache_ttl))
+            
+            # Load OpenAI client section
+            openai = data.get("openai", {})
+            self.openai_timeout = float(openai.get("timeout", self.openai_timeout))
+            self.openai_connect_timeout = float(openai.get("connect_timeout", self.openai_connect_timeout))
+            self.openai_pool_size = int(openai.get("pool_size", self.openai_pool_size))
+            self.openai_max_retries = int(openai.get("max_retries", self.openai_max_retries))
+            self.openai_retry_backoff = float(openai.get("retry_backoff", self.openai_retry_backoff))
+            self.openai_deadline = float(openai.get("deadline", self.openai_deadline))
+            self.openai_hedge = bool(openai.get("hedge", self.openai_hedge))
+            
+            # Load terraform section
+            terraform = data.get("terraform", {})
+            self.plan_max_age = int(terraform.get("plan_max_age", self.plan_max_age))
+            self.content_addressed_runs = bool(terraform.get("content_addressed_runs", self.content_addressed_runs))
+            self.terraform_parallelism = int(terraform.get("parallelism", self.terraform_parallelism))
+            self.terraform_refresh = bool(terraform.get("refresh", self.terraform_refresh))
+            self.terraform_lock_timeout = str(terraform.get("lock_timeout", self.terraform_lock_timeout))
+            self.fast_plan_max_state_age = int(terraform.get("fast_plan_max_state_age", self.fast_plan_max_state_age))
+            
+            # Load retention section
+            retention = data.get("retention", {})
+            self.retention_keep_last = int(retention.get("keep_last", self.retention_keep_last))
+            self.retention_max_age = int(retention.get("max_age", self.retention_max_age))
+            self.retention_max_bytes = int(retention.get("max_bytes", self.retention_max_bytes))
+            self.retention_auto = bool(retention.get("auto", self.retention_auto))
+            
+            # Load Cloudflare API section
+            cloudflare = data.get("cloudflare", {})
+            self.cloudflare_rate_limit = float(cloudflare.get("rate_limit", self.cloudflare_rate_limit))
+            self.cloudflare_burst = int(cloudflare.get("burst", self.cloudflare_burst))
+            
         except Exception as e:
             error_exit(f"Failed to load configuration: {e}")
     
@@ -58,7 +117,39 @@ class Config:
                 "account_id": self.account_id,
                 "zone_name": self.default_zone,
                 "model_id": self.model_id,
-            }
+            },
+            "cache": {
+                "ttl": self.cache_ttl,
+                "max_entries": self.cache_max_entries,
+                "zone_ttl": self.zone_cache_ttl,
+            },
+            "openai": {
+                "timeout": self.openai_timeout,
+                "connect_timeout": self.openai_connect_timeout,
+                "pool_size": self.openai_pool_size,
+                "max_retries": self.openai_max_retries,
+                "retry_backoff": self.openai_retry_backoff,
+                "deadline": self.openai_deadline,
+                "hedge": self.openai_hedge,
+            },
+            "terraform": {
+                "plan_max_age": self.plan_max_age,
+                "content_addressed_runs": self.content_addressed_runs,
+                "parallelism": self.terraform_parallelism,
+                "refresh": self.terraform_refresh,
+                "lock_timeout": self.terraform_lock_timeout,
+                "fast_plan_max_state_age": self.fast_plan_max_state_age,
+            },
+            "retention": {
+                "keep_last": self.retention_keep_last,
+                "max_age": self.retention_max_age,
+                "max_bytes": self.retention_max_bytes,
+                "auto": self.retention_auto,
+            },
+            "cloudflare": {
+                "rate_limit": self.cloudflare_rate_limit,
+                "burst": self.cloudflare_burst,
+            },
         }
         
         # Remove None values
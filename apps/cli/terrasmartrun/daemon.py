@@ -0,0 +1,274 @@
+"""Long-lived TerraSmart daemon serving CLI commands over a Unix socket.
+
+The daemon keeps the OpenAI client, compiled DSL schema and Jinja2
+environment warm between commands. The protocol is JSON lines: the client
+sends one request
+
+    {"argv": ["plan", "..."], "cwd": "/path/to/project", "env": {...}}
+
+and the daemon answers with any number of {"stdout": text} and
+{"stderr": text} lines followed by one {"exit": code} line. Commands run with the client's environment, so
+credentials and TF_VAR_* settings are the ones of the calling shell.
+"""
+
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Any, IO, List, Optional
+
+from .utils import get_data_dir
+
+
+SOCKET_FILE_NAME = "ts.sock"
+
+# Set in the environment to always run commands in-process
+NO_DAEMON_ENV = "TS_NO_DAEMON"
+
+# Commands a client may hand to the daemon; apply only with --approve since
+# the daemon cannot prompt for confirmation
+FORWARDED_COMMANDS = {"plan", "dryrun", "apply"}
+
+# Options reading stdin for '-'; the daemon would read its own stdin instead
+STDIN_OPTIONS = {"--batch"}
+
+CONNECT_TIMEOUT = 1.0
+
+
+def get_socket_path() -> Path:
+    """Get the path of the daemon socket."""
+    return get_data_dir() / SOCKET_FILE_NAME
+
+
+def should_forward(argv: List[str]) -> bool:
+    """Whether a command line can be handed to a running daemon."""
+    if os.environ.get(NO_DAEMON_ENV) or not argv:
+        return False
+    if argv[0] not in FORWARDED_COMMANDS or "--help" in argv:
+        return False
+    if argv[0] == "apply" and "--approve" not in argv:
+        return False
+    if _reads_stdin(argv):
+        return False
+    return get_socket_path().exists()
+
+
+def _reads_stdin(argv: List[str]) -> bool:
+    """Whether a command line passes '-' to an option reading stdin."""
+    for arg, next_arg in zip(argv, argv[1:] + [None]):
+        if arg in STDIN_OPTIONS and next_arg == "-":
+            return True
+        if any(arg == f"{option}=-" for option in STDIN_OPTIONS):
+            return True
+    return False
+
+
+def forward(argv: List[str], stdout: Optional[IO[str]] = None, stderr: Optional[IO[str]] = None) -> Optional[int]:
+    """Run a command in the daemon, streaming its output.
+    
+    Returns the exit code, or None when no daemon is reachable so the caller
+    can run the command itself.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(get_socket_path()))
+    except OSError:
+        sock.close()
+        return None
+    
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    with sock:
+        sock.settimeout(None)
+        request = {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+        sock.sendall((json.dumps(request) + "\n").encode('utf-8'))
+        
+        with sock.makefile('r', encoding='utf-8') as responses:
+            for line in responses:
+                message = json.loads(line)
+                if "stdout" in message:
+                    stdout.write(message["stdout"])
+                    stdout.flush()
+                elif "stderr" in message:
+                    stderr.write(message["stderr"])
+                    stderr.flush()
+                elif "exit" in message:
+                    return message["exit"]
+    # The daemon went away mid-command
+    return 1
+
+
+class _StreamWriter:
+    """File-like object sending writes to the client as JSON lines."""
+    
+    def __init__(self, wfile: IO[bytes], name: str, lock: threading.Lock):
+        """Initialize writer for one output stream of a connection."""
+        self.wfile = wfile
+        self.name = name
+        self.lock = lock
+    
+    def write(self, text: str) -> int:
+        """Send text to the client."""
+        if text:
+            self._send({self.name: text})
+        return len(text)
+    
+    def flush(self) -> None:
+        """Flush the socket."""
+        with self.lock:
+            self.wfile.flush()
+    
+    def isatty(self) -> bool:
+        """Output goes to a socket, not a terminal."""
+        return False
+    
+    def _send(self, message: Dict[str, Any]) -> None:
+        """Write one protocol message."""
+        with self.lock:
+            self.wfile.write((json.dumps(message) + "\n").encode('utf-8'))
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Run one CLI command per connection."""
+    
+    def handle(self) -> None:
+        """Read the request, run the command and report its exit code."""
+        line = self.rfile.readline()
+        if not line:
+            return
+        lock = threading.Lock()
+        stdout = _StreamWriter(self.wfile, "stdout", lock)
+        stderr = _StreamWriter(self.wfile, "stderr", lock)
+        
+        try:
+            request = json.loads(line)
+            argv = [str(arg) for arg in request["argv"]]
+            cwd = request["cwd"]
+            env = {str(name): str(value) for name, value in request["env"].items()}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            stderr.write(f"Invalid request: {e}\n")
+            stdout._send({"exit": 2})
+            return
+        
+        code = self.server.run_command(argv, cwd, env, stdout, stderr)
+        stdout._send({"exit": code})
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server running CLI commands in a warm process.
+    
+    Commands share the process working directory, environment and standard
+    streams, so they run one at a time; connections queue behind the running
+    command.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, socket_path: Path):
+        """Bind the server to socket_path."""
+        self.socket_path = Path(socket_path)
+        self._command_lock = threading.Lock()
+        super().__init__(str(self.socket_path), _RequestHandler)
+        os.chmod(self.socket_path, 0o600)
+    
+    def run_command(self, argv: List[str], cwd: str, env: Dict[str, str],
+                    stdout: IO[str], stderr: IO[str]) -> int:
+        """Run a CLI command as if invoked from cwd with env, returning its exit code."""
+        import click
+        from .cli import main
+        
+        with self._command_lock:
+            previous_cwd = os.getcwd()
+            previous_env = os.environ.copy()
+            try:
+                os.chdir(cwd)
+                os.environ.clear()
+                os.environ.update(env)
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    try:
+                        # Without standalone mode click returns ctx.exit() codes
+                        rv = main.main(args=argv, prog_name="ts", standalone_mode=False)
+                        return rv if isinstance(rv, int) else 0
+                    except SystemExit as e:
+                        return _exit_code(e.code)
+                    except click.ClickException as e:
+                        e.show(file=stderr)
+                        return e.exit_code
+                    except click.Abort:
+                        stderr.write("Aborted!\n")
+                        return 1
+                    except Exception as e:
+                        stderr.write(f"❌ Error: {e}\n")
+                        return 1
+            except OSError as e:
+                stderr.write(f"❌ Error: cannot run in {cwd}: {e}\n")
+                return 1
+            finally:
+                os.environ.clear()
+                os.environ.update(previous_env)
+                os.chdir(previous_cwd)
+    
+    def server_close(self) -> None:
+        """Close the server and remove its socket."""
+        super().server_close()
+        with contextlib.suppress(OSError):
+            self.socket_path.unlink()
+
+
+def warm_up(config) -> None:
+    """Build the expensive per-process state before the first command."""
+    from .dsl import get_validator
+    from .render import _get_template_dir, get_environment
+    
+    get_validator()
+    env = get_environment()
+    for source in _get_template_dir().glob("*.j2"):
+        env.get_template(source.name)
+    
+    if config.openai_api_key:
+        from .llm import get_openai_client
+        get_openai_client(config)
+
+
+def serve(config, socket_path: Optional[Path] = None) -> None:
+    """Run the daemon until interrupted."""
+    socket_path = Path(socket_path or get_socket_path())
+    if socket_path.exists():
+        if _is_listening(socket_path):
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+        # Left behind by a daemon that did not shut down cleanly
+        socket_path.unlink()
+    
+    warm_up(config)
+    
+    server = DaemonServer(socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _is_listening(socket_path: Path) -> bool:
+    """Check whether a daemon accepts connections on socket_path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def _exit_code(code: Any) -> int:
+    """Convert a SystemExit code to an integer exit status."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
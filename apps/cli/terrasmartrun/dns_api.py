@@ -0,0 +1,195 @@
+"""Direct Cloudflare API engine for single DNS record changes.
+
+Creating or deleting one DNS record through Terraform costs an init, a plan
+with refresh and an apply for what is a single API call. This engine plans
+the change by looking the record up by name, type and content, saves it as
+dns_api_plan.json in the run directory, and applies it with plain API calls.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .cloudflare import CloudflareClient
+from .plan_analysis import CREATE, DELETE, NO_OP, UPDATE, PlanSummary
+
+
+API_PLAN_FILE_NAME = "dns_api_plan.json"
+IMPORT_FILE_NAME = "imports.tf"
+
+# Intents the API engine can carry out
+API_INTENTS = {"create_dns_record", "delete_dns_record"}
+
+# Record types a name can only have one of, so a create updates the existing record
+SINGLE_VALUE_TYPES = {"CNAME"}
+
+# Address of the record in the rendered create_dns_record configuration
+RECORD_ADDRESS = "cloudflare_dns_record.record"
+
+
+@dataclass
+class DnsChange:
+    """One planned DNS record operation."""
+    action: str
+    record: Dict[str, Any]
+    record_id: Optional[str] = None
+
+
+@dataclass
+class DnsApiPlan:
+    """DNS record changes planned against the live zone."""
+    zone_id: str
+    dsl: Dict[str, Any]
+    changes: List[DnsChange] = field(default_factory=list)
+    import_block: bool = False
+    created_at: float = field(default_factory=time.time)
+    applied: bool = False
+    
+    def summary(self) -> PlanSummary:
+        """Get the change summary, in the same form as a Terraform plan's."""
+        summary = PlanSummary()
+        for change in self.changes:
+            summary.add("cloudflare_dns_record", change.action)
+        return summary
+    
+    def is_fresh(self, max_age: int) -> bool:
+        """Whether the plan is recent enough to apply without planning again.
+        
+        An applied plan is never fresh: replaying it would create the record
+        again or delete one that is already gone.
+        """
+        return not self.applied and time.time() - self.created_at <= max_age
+    
+    def save(self, work_dir: Path) -> Path:
+        """Write the plan to the run directory."""
+        path = Path(work_dir) / API_PLAN_FILE_NAME
+        with open(path, 'w') as f:
+            json.dump(asdict(self), f, indent=2)
+        return path
+    
+    @classmethod
+    def load(cls, work_dir: Path) -> Optional["DnsApiPlan"]:
+        """Read the plan saved in a run directory, or None if there is none."""
+        try:
+            with open(Path(work_dir) / API_PLAN_FILE_NAME, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        data["changes"] = [DnsChange(**change) for change in data.get("changes", [])]
+        return cls(**data)
+
+
+def supports_api_engine(dsl_data: Dict[str, Any]) -> bool:
+    """Whether a DSL document can be carried out by the API engine."""
+    return dsl_data.get("intent") in API_INTENTS
+
+
+def desired_record(dsl_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the API representation of the DSL's DNS record."""
+    dns_record = dsl_data.get("dns_record") or {}
+    if "type" not in dns_record:
+        raise ValueError("DNS record type is required")
+    record = {"name": dsl_data["hostname"], "type": dns_record["type"]}
+    if dns_record.get("content") is not None:
+        record["content"] = dns_record["content"]
+    if dsl_data["intent"] == "create_dns_record":
+        if "content" not in record:
+            raise ValueError("DNS record content is required")
+        record["ttl"] = dns_record.get("ttl", 300)
+        record["proxied"] = dns_record.get("proxied", False)
+        if "priority" in dns_record:
+            record["priority"] = dns_record["priority"]
+    return record
+
+
+def plan_dns_change(dsl_data: Dict[str, Any], client: CloudflareClient, zone_id: str,
+                    import_block: bool = False) -> DnsApiPlan:
+    """Plan a create_dns_record or delete_dns_record document against the zone."""
+    if not supports_api_engine(dsl_data):
+        raise ValueError(f"The API engine only supports {', '.join(sorted(API_INTENTS))}")
+    
+    record = desired_record(dsl_data)
+    plan = DnsApiPlan(zone_id=zone_id, dsl=dsl_data, import_block=import_block)
+    if dsl_data["intent"] == "create_dns_record":
+        plan.changes.append(_plan_create(record, client, zone_id))
+    else:
+        plan.changes.append(_plan_delete(record, client, zone_id))
+    return plan
+
+
+def _plan_create(record: Dict[str, Any], client: CloudflareClient, zone_id: str) -> DnsChange:
+    """Plan creating a record, or updating the one already there."""
+    existing = client.list_dns_records(zone_id, record["name"], record["type"])
+    matches = [r for r in existing if r.get("content") == record["content"]]
+    if not matches and record["type"] in SINGLE_VALUE_TYPES:
+        matches = existing
+    if not matches:
+        return DnsChange(action=CREATE, record=record)
+    
+    current = matches[0]
+    if all(current.get(key) == value for key, value in record.items()):
+        return DnsChange(action=NO_OP, record=record, record_id=current["id"])
+    return DnsChange(action=UPDATE, record=record, record_id=current["id"])
+
+
+def _plan_delete(record: Dict[str, Any], client: CloudflareClient, zone_id: str) -> DnsChange:
+    """Plan deleting the one record matching name, type and content."""
+    matches = client.list_dns_records(zone_id, record["name"], record["type"], record.get("content"))
+    if not matches:
+        return DnsChange(action=NO_OP, record=record)
+    if len(matches) > 1:
+        raise ValueError(
+            f"{len(matches)} {record['type']} records named {record['name']} exist; "
+            "specify the record content to choose one"
+        )
+    found = matches[0]
+    record = {**record, "content": found.get("content")}
+    return DnsChange(action=DELETE, record=record, record_id=found["id"])
+
+
+def apply_dns_plan(plan: DnsApiPlan, client: CloudflareClient, work_dir: Path) -> List[DnsChange]:
+    """Carry out a plan and return the changes made.
+    
+    The plan is saved back marked as applied, so the next apply plans again.
+    With plan.import_block, an import block for the created or updated record
+    is written next to the rendered configuration so Terraform adopts the
+    record instead of creating it again.
+    """
+    applied = []
+    for change in plan.changes:
+        if change.action == CREATE:
+            created = client.create_dns_record(plan.zone_id, change.record)
+            change = DnsChange(action=CREATE, record=change.record, record_id=created["id"])
+        elif change.action == UPDATE:
+            client.update_dns_record(plan.zone_id, change.record_id, change.record)
+        elif change.action == DELETE:
+            client.delete_dns_record(plan.zone_id, change.record_id)
+        applied.append(change)
+    plan.applied = True
+    plan.save(work_dir)
+    
+    if plan.import_block:
+        kept = [c for c in applied if c.action != DELETE and c.record_id]
+        if kept:
+            write_import_block(work_dir, plan.zone_id, kept[0].record_id)
+    return applied
+
+
+def import_block(zone_id: str, record_id: str, address: str = RECORD_ADDRESS) -> str:
+    """Get a Terraform import block adopting an existing DNS record."""
+    return (
+        "import {\n"
+        f"  to = {address}\n"
+        f'  id = "{zone_id}/{record_id}"\n'
+        "}\n"
+    )
+
+
+def write_import_block(work_dir: Path, zone_id: str, record_id: str) -> Path:
+    """Write the import block for a record into the run directory."""
+    path = Path(work_dir) / IMPORT_FILE_NAME
+    with open(path, 'w') as f:
+        f.write(import_block(zone_id, record_id))
+    return path
@@ -1,15 +1,86 @@
 """DSL validation and parsing for TerraSmart."""
 
+import hashlib
 import json
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import jsonschema
+from jsonschema import Draft201909Validator
+from jsonschema.exceptions import best_match
 
 from .utils import error_exit
 
 
+# Intents supported inside a multi-resource (version 2) document
+MULTI_RESOURCE_INTENTS = [
+    "create_worker_and_bind_domain",
+    "create_dns_record",
+    "create_kv_namespace",
+    "create_d1_database",
+]
+
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_HOSTNAME_RE = re.compile(r'^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?(\.[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?)*$')
+# DNS record names may also hold underscore labels (_dmarc) and a leading wildcard
+_RECORD_NAME_RE = re.compile(r'^(\*\.)?[a-z0-9_]([a-z0-9_-]{0,61}[a-z0-9_])?(\.[a-z0-9_]([a-z0-9_-]{0,61}[a-z0-9_])?)*$')
+
+# Intents whose hostname is a DNS record name
+DNS_RECORD_INTENTS = ["create_dns_record", "delete_dns_record"]
+
+# Optional dns_record fields with their defaults; records with the same name,
+# type and content must agree on them
+DNS_RECORD_SETTINGS = {"ttl": 300, "proxied": False, "priority": None}
+
+# Compiled validators keyed by schema content hash
+_validators: Dict[str, Draft201909Validator] = {}
+
+
+def is_multi_resource(dsl_data: Dict[str, Any]) -> bool:
+    """Check whether DSL data is a multi-resource (version 2) document."""
+    return "resources" in dsl_data
+
+
+def get_resources(dsl_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get the resources of a DSL document; single-intent documents have one."""
+    if is_multi_resource(dsl_data):
+        return dsl_data["resources"]
+    return [{k: v for k, v in dsl_data.items() if k != "zone_name"}]
+
+
+def dns_record_identity(hostname: str, dns_record: Dict[str, Any]) -> Tuple[str, str, Any]:
+    """Get what identifies a DNS record: its name, type and content."""
+    return hostname, dns_record.get("type"), dns_record.get("content")
+
+
+def dns_record_settings(dns_record: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Get the optional settings of a DNS record, with defaults filled in."""
+    return tuple(dns_record.get(name, default) for name, default in DNS_RECORD_SETTINGS.items())
+
+
+def dns_record_conflict(hostname: str, dns_record: Dict[str, Any], settings: Tuple[Any, ...]) -> Optional[str]:
+    """Describe how a record differs from earlier settings for the same identity, if it does."""
+    differing = [name for name, a, b in zip(DNS_RECORD_SETTINGS, dns_record_settings(dns_record), settings)
+                 if a != b]
+    if not differing:
+        return None
+    return (f"{dns_record.get('type')} record {hostname} -> {dns_record.get('content')} "
+            f"is listed twice with different {', '.join(differing)}")
+
+
 def get_schema() -> Dict[str, Any]:
-    """Load the DSL JSON schema."""
+    """Load the DSL JSON schema.
+    
+    The schema is read once per process; callers must not modify it.
+    """
+    return _load_schema()[0]
+
+
+@lru_cache(maxsize=None)
+def _load_schema() -> Tuple[Dict[str, Any], str]:
+    """Read and parse the schema file, returning it with its content hash."""
     # Try multiple possible locations for the schema file
     possible_paths = [
         Path(__file__).parent.parent.parent.parent / "schema" / "dsl.schema.json",  # From installed package
@@ -27,76 +98,173 @@ def get_schema() -> Dict[str, Any]:
         error_exit(f"Schema file not found in any of these locations: {[str(p) for p in possible_paths]}")
     
     try:
-        with open(schema_path, 'r') as f:
-            return json.load(f)
+        with open(schema_path, 'rb') as f:
+            raw = f.read()
+        return json.loads(raw), hashlib.sha256(raw).hexdigest()
     except Exception as e:
         error_exit(f"Failed to load schema: {e}")
 
 
+def get_validator(schema: Optional[Dict[str, Any]] = None) -> Draft201909Validator:
+    """Get a compiled validator for a schema (the DSL schema by default).
+    
+    Validators are built once per schema content and reused.
+    """
+    if schema is None:
+        schema, key = _load_schema()
+    else:
+        key = hashlib.sha256(json.dumps(schema, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    validator = _validators.get(key)
+    if validator is None:
+        Draft201909Validator.check_schema(schema)
+        validator = Draft201909Validator(schema)
+        _validators[key] = validator
+    return validator
+
+
 def validate_dsl(dsl_data: Dict[str, Any]) -> None:
     """Validate DSL data against the JSON schema."""
-    schema = get_schema()
-    
     try:
-        jsonschema.validate(dsl_data, schema)
-    except jsonschema.ValidationError as e:
-        raise ValueError(f"DSL validation failed: {e.message}")
+        error = best_match(get_validator().iter_errors(dsl_data))
     except Exception as e:
         raise ValueError(f"Schema validation error: {e}")
+    if error is not None:
+        raise ValueError(f"DSL validation failed: {error.message}")
     
     # Additional custom validations
-    _validate_custom_rules(dsl_data)
+    for message in _iter_custom_rule_errors(dsl_data):
+        raise ValueError(message)
+
+
+def validate_many(documents: Iterable[Dict[str, Any]]) -> List[List[str]]:
+    """Validate many DSL documents, returning every error found for each one.
+    
+    An empty list means the document at that position is valid.
+    """
+    validator = get_validator()
+    results = []
+    for dsl_data in documents:
+        errors = sorted(validator.iter_errors(dsl_data), key=lambda e: [str(part) for part in e.absolute_path])
+        if errors:
+            results.append([_format_schema_error(e) for e in errors])
+        else:
+            # Custom rules assume a schema-valid document
+            results.append(list(_iter_custom_rule_errors(dsl_data)))
+    return results
+
+
+def _format_schema_error(error: jsonschema.ValidationError) -> str:
+    """Format a schema error with the path of the offending value."""
+    path = "/".join(str(part) for part in error.absolute_path)
+    return f"{path}: {error.message}" if path else error.message
 
 
-def _validate_custom_rules(dsl_data: Dict[str, Any]) -> None:
+def _iter_custom_rule_errors(dsl_data: Dict[str, Any]) -> Iterator[str]:
+    """Yield custom rule violations for a schema-valid document."""
+    if is_multi_resource(dsl_data):
+        yield from _iter_multi_resource_errors(dsl_data)
+    else:
+        yield from _iter_single_intent_errors(dsl_data)
+
+
+def _iter_multi_resource_errors(dsl_data: Dict[str, Any]) -> Iterator[str]:
+    """Apply custom validation rules to every resource of a version 2 document."""
+    zone_name = dsl_data["zone_name"]
+    if not _is_valid_domain(zone_name):
+        yield f"Invalid zone_name format: {zone_name}"
+    
+    worker_names = set()
+    dns_records: Dict[Tuple[str, str, Any], Tuple[int, Tuple[Any, ...]]] = {}
+    for index, resource in enumerate(dsl_data["resources"]):
+        intent = resource["intent"]
+        where = f"resources[{index}]"
+        
+        if intent not in MULTI_RESOURCE_INTENTS:
+            yield f"{where}: {intent} is not supported in multi-resource documents"
+            continue
+        
+        if intent in ["create_worker_and_bind_domain", "create_dns_record"]:
+            for message in _iter_single_intent_errors({**resource, "zone_name": zone_name}, check_zone=False):
+                yield f"{where}: {message}"
+        
+        if intent == "create_dns_record":
+            record = resource.get("dns_record", {})
+            if not record.get("type") or "content" not in record:
+                yield f"{where}: dns_record.type and dns_record.content are required"
+            # Identical duplicates are rendered once; differing ones cannot both win
+            identity = dns_record_identity(resource.get("hostname"), record)
+            if identity in dns_records:
+                first_index, settings = dns_records[identity]
+                conflict = dns_record_conflict(resource.get("hostname"), record, settings)
+                if conflict:
+                    yield f"{where}: {conflict} (see resources[{first_index}])"
+            else:
+                dns_records[identity] = (index, dns_record_settings(record))
+        
+        if intent in ["create_kv_namespace", "create_d1_database"]:
+            kind = "kv" if intent == "create_kv_namespace" else "d1"
+            if not resource.get("bindings", {}).get(kind):
+                yield f"{where}: bindings.{kind} must list the names to create"
+        
+        if intent == "create_worker_and_bind_domain" and "worker" in resource:
+            name = resource["worker"]["name"]
+            if name in worker_names:
+                yield f"{where}: duplicate worker name {name}"
+            worker_names.add(name)
+
+
+def _iter_single_intent_errors(dsl_data: Dict[str, Any], check_zone: bool = True) -> Iterator[str]:
     """Apply custom validation rules beyond JSON schema."""
     intent = dsl_data.get("intent")
     
     # Worker is required for create_worker_and_bind_domain
     if intent == "create_worker_and_bind_domain":
         if "worker" not in dsl_data:
-            raise ValueError("Worker configuration is required for create_worker_and_bind_domain intent")
-        
-        worker = dsl_data["worker"]
-        
-        # Validate worker name length (Cloudflare limits)
-        if len(worker.get("name", "")) > 63:
-            raise ValueError("Worker name must be 63 characters or less")
-        
-        # Validate compatibility date format
-        compat_date = worker.get("compatibility_date", "")
-        if not _is_valid_date_format(compat_date):
-            raise ValueError("Worker compatibility_date must be in YYYY-MM-DD format")
+            yield "Worker configuration is required for create_worker_and_bind_domain intent"
+        else:
+            worker = dsl_data["worker"]
+            
+            # Validate worker name length (Cloudflare limits)
+            if len(worker.get("name", "")) > 63:
+                yield "Worker name must be 63 characters or less"
+            
+            # Validate compatibility date format
+            compat_date = worker.get("compatibility_date", "")
+            if not _is_valid_date_format(compat_date):
+                yield "Worker compatibility_date must be in YYYY-MM-DD format"
     
     # Validate hostname is a valid FQDN
     hostname = dsl_data.get("hostname", "")
-    if not _is_valid_hostname(hostname):
-        raise ValueError(f"Invalid hostname format: {hostname}")
+    if intent in DNS_RECORD_INTENTS:
+        if not _is_valid_record_name(hostname):
+            yield f"Invalid hostname format: {hostname}"
+    elif not _is_valid_hostname(hostname):
+        yield f"Invalid hostname format: {hostname}"
     
     # Validate zone_name is a valid domain
     zone_name = dsl_data.get("zone_name", "")
-    if not _is_valid_domain(zone_name):
-        raise ValueError(f"Invalid zone_name format: {zone_name}")
+    if check_zone and not _is_valid_domain(zone_name):
+        yield f"Invalid zone_name format: {zone_name}"
 
 
 def _is_valid_date_format(date_str: str) -> bool:
     """Check if date string is in YYYY-MM-DD format."""
-    import re
-    pattern = r'^\d{4}-\d{2}-\d{2}$'
-    return bool(re.match(pattern, date_str))
+    return bool(_DATE_RE.match(date_str))
 
 
 def _is_valid_hostname(hostname: str) -> bool:
     """Check if hostname is a valid FQDN."""
-    import re
     # Basic hostname validation
-    pattern = r'^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?(\.[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?)*$'
-    return bool(re.match(pattern, hostname.lower()))
+    return bool(_HOSTNAME_RE.match(hostname.lower()))
+
+
+def _is_valid_record_name(name: str) -> bool:
+    """Check if name is a valid DNS record name."""
+    return bool(_RECORD_NAME_RE.match(name.lower()))
 
 
 def _is_valid_domain(domain: str) -> bool:
     """Check if domain is valid."""
-    import re
     # Basic domain validation
-    pattern = r'^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?(\.[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?)*$'
-    return bool(re.match(pattern, domain.lower())) and '.' in domain
+    return bool(_HOSTNAME_RE.match(domain.lower())) and '.' in domain
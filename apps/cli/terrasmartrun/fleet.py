@@ -0,0 +1,95 @@
+"""Plans across many existing run directories for TerraSmart."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import Config
+from .plan_analysis import EXIT_CHANGES, EXIT_DESTRUCTIVE, EXIT_NO_CHANGES, PlanSummary
+from .tfexec import PLAN_FILE_NAME, TerraformExecutor
+
+# Exit code of a directory whose plan failed
+EXIT_ERROR = 1
+
+
+@dataclass
+class DirPlanResult:
+    """Outcome of planning one run directory."""
+    work_dir: Path
+    summary: Optional[PlanSummary] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    throttled: float = 0.0
+    
+    @property
+    def exit_code(self) -> int:
+        """Exit code for this directory: 0, 2 or 3 like ts plan, 1 on errors."""
+        if self.error is not None:
+            return EXIT_ERROR
+        return self.summary.exit_code()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable representation."""
+        return {
+            "dir": str(self.work_dir),
+            "exit_code": self.exit_code,
+            "summary": self.summary.to_dict() if self.summary else None,
+            "error": self.error,
+            "elapsed": round(self.elapsed, 3),
+            "throttled": round(self.throttled, 3),
+        }
+
+
+def find_run_dirs(terraform_dir: Path) -> List[Path]:
+    """List run directories that contain Terraform configuration."""
+    if not terraform_dir.is_dir():
+        return []
+    return sorted(d for d in terraform_dir.iterdir() if d.is_dir() and any(d.glob("*.tf")))
+
+
+def plan_dirs(work_dirs: List[Path], config: Config, jobs: int = 4, parallelism: Optional[int] = None,
+              lock_timeout: Optional[str] = None, refresh: Optional[bool] = None,
+              fast: bool = False) -> List[DirPlanResult]:
+    """Plan many run directories concurrently.
+    
+    At most jobs terraform processes run at once, all sharing the plugin
+    cache. Each plan waits for its estimated share of the Cloudflare API
+    budget (config.cloudflare_rate_limit), which is shared with every other
+    ts process; plans that skip refresh cost nothing. Results are returned in
+    input order.
+    """
+    def process(work_dir: Path) -> DirPlanResult:
+        result = DirPlanResult(work_dir=work_dir)
+        start = time.perf_counter()
+        try:
+            executor = TerraformExecutor.from_config(work_dir, config, parallelism, lock_timeout)
+            executor.init()
+            try:
+                executor.plan(refresh=executor.should_refresh(config, refresh, fast))
+            finally:
+                result.throttled = executor.throttled
+            result.summary = executor.summarize_plan(work_dir / PLAN_FILE_NAME)
+        except SystemExit:
+            # error_exit already printed the reason to stderr
+            result.error = "aborted"
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.elapsed = time.perf_counter() - start
+        return result
+    
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(process, work_dirs))
+
+
+def aggregate_exit_code(results: List[DirPlanResult]) -> int:
+    """Combine per-directory exit codes: 1 if any plan failed, else the most severe."""
+    codes = {result.exit_code for result in results}
+    if EXIT_ERROR in codes:
+        return EXIT_ERROR
+    for code in (EXIT_DESTRUCTIVE, EXIT_CHANGES):
+        if code in codes:
+            return code
+    return EXIT_NO_CHANGES
@@ -1,11 +1,30 @@
 """LLM integration for converting natural language to DSL."""
 
+import asyncio
+import copy
+import hashlib
 import json
 import re
-from typing import Dict, Any
-from openai import OpenAI
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional, Tuple
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    OpenAI,
+    AsyncOpenAI,
+    DefaultHttpxClient,
+    DefaultAsyncHttpxClient,
+    DEFAULT_CONNECTION_LIMITS,
+    Timeout,
+)
 
+from .cache import get_dsl_cache, make_key, normalize_prompt
 from .config import Config
+from .dsl import validate_dsl
+from .profiling import span
+from .retries import LatencyHistory, RetryPolicy, call_with_retries, call_with_retries_async
 from .utils import error_exit, warning_message
 
 
@@ -32,54 +51,293 @@ Para delete_dns_record:
 No inventes campos fuera del esquema. Usa defaults sensatos."""
 
 
-def to_dsl(prompt_text: str, config: Config) -> Dict[str, Any]:
+SYSTEM_PROMPT_HASH = hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()
+
+# Latency percentile after which a second request is sent
+HEDGE_PERCENTILE = 95
+
+# HTTP statuses worth retrying besides server errors
+RETRYABLE_STATUSES = {408, 409, 429}
+
+# OpenAI clients shared across the process, keyed by their settings
+_clients: Dict[Tuple, OpenAI] = {}
+_clients_lock = threading.Lock()
+
+# Async clients hold loop-bound connections, so they are pooled per event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_openai_client(config: Config) -> OpenAI:
+    """Get a pooled OpenAI client for the given configuration.
+    
+    Clients are created once per API key and connection settings and then
+    reused, so keep-alive connections survive across calls.
+    """
+    key = _client_key(config)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            timeout = _client_timeout(config)
+            client = OpenAI(
+                api_key=config.openai_api_key,
+                timeout=timeout,
+                # _call_openai retries with its own backoff and deadline
+                max_retries=0,
+                http_client=DefaultHttpxClient(
+                    timeout=timeout,
+                    limits=_connection_limits(config.openai_pool_size),
+                ),
+            )
+            _clients[key] = client
+    return client
+
+
+def get_async_openai_client(config: Config) -> AsyncOpenAI:
+    """Get a pooled AsyncOpenAI client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    key = _client_key(config)
+    loop_clients = _async_clients.setdefault(loop, {})
+    client = loop_clients.get(key)
+    if client is None:
+        timeout = _client_timeout(config)
+        client = AsyncOpenAI(
+            api_key=config.openai_api_key,
+            timeout=timeout,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                timeout=timeout,
+                limits=_connection_limits(config.openai_pool_size),
+            ),
+        )
+        loop_clients[key] = client
+    return client
+
+
+def close_openai_clients() -> None:
+    """Close all pooled OpenAI clients."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _client_key(config: Config) -> Tuple:
+    """Get the settings that distinguish pooled clients."""
+    return (
+        config.openai_api_key,
+        config.openai_timeout,
+        config.openai_connect_timeout,
+        config.openai_pool_size,
+    )
+
+
+def _client_timeout(config: Config) -> Timeout:
+    """Build the request timeout for OpenAI clients."""
+    return Timeout(config.openai_timeout, connect=config.openai_connect_timeout)
+
+
+def _connection_limits(pool_size: int):
+    """Build connection limits for the HTTP backend bundled with openai."""
+    # Reuse the Limits class of the installed backend instead of importing httpx
+    limits_cls = type(DEFAULT_CONNECTION_LIMITS)
+    return limits_cls(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=DEFAULT_CONNECTION_LIMITS.keepalive_expiry,
+    )
+
+
+def to_dsl(prompt_text: str, config: Config, use_cache: bool = True) -> Dict[str, Any]:
     """Convert natural language prompt to DSL using OpenAI."""
+    cache = get_dsl_cache(config) if use_cache else None
+    cache_key = _cache_key(prompt_text, config)
+    
+    cached = _load_cached(cache, cache_key, config)
+    if cached is not None:
+        return cached
     try:
-        dsl_data = _call_openai(prompt_text, config)
-        # Post-process the DSL to fix common issues
-        dsl_data = _post_process_dsl(dsl_data, config)
-        return dsl_data
+        answer = _call_openai(prompt_text, config)
     except Exception as e:
         warning_message(f"OpenAI call failed: {e}")
         warning_message("Falling back to rule-based parser...")
         return _fallback_parser(prompt_text, config)
+    
+    # Post-process the DSL to fix common issues
+    dsl_data = _post_process_dsl(copy.deepcopy(answer), config)
+    _store_cached(cache, cache_key, answer, dsl_data)
+    return dsl_data
+
+
+async def to_dsl_async(prompt_text: str, config: Config, use_cache: bool = True) -> Dict[str, Any]:
+    """Convert natural language prompt to DSL using AsyncOpenAI."""
+    cache = get_dsl_cache(config) if use_cache else None
+    cache_key = _cache_key(prompt_text, config)
+    
+    cached = _load_cached(cache, cache_key, config)
+    if cached is not None:
+        return cached
+    try:
+        answer = await _call_openai_async(prompt_text, config)
+    except Exception as e:
+        warning_message(f"OpenAI call failed: {e}")
+        warning_message("Falling back to rule-based parser...")
+        return _fallback_parser(prompt_text, config)
+    
+    dsl_data = _post_process_dsl(copy.deepcopy(answer), config)
+    _store_cached(cache, cache_key, answer, dsl_data)
+    return dsl_data
+
+
+def _load_cached(cache, cache_key: str, config: Config) -> Optional[Dict[str, Any]]:
+    """Get the post-processed DSL for a cached model answer, if there is a valid one."""
+    answer = cache.get(cache_key) if cache else None
+    if answer is None:
+        return None
+    dsl_data = _post_process_dsl(copy.deepcopy(answer), config)
+    # Entries written before answers were validated may be invalid; ask the model again
+    return dsl_data if _is_valid(dsl_data) else None
+
+
+def _store_cached(cache, cache_key: str, answer: Dict[str, Any], dsl_data: Dict[str, Any]) -> None:
+    """Save a model answer in the DSL cache, if caching is enabled.
+    
+    dsl_data is the post-processed answer; answers that do not validate are
+    not cached, so a bad translation is not replayed until the entry expires.
+    """
+    # Only successful model answers are cached, never fallback output
+    if not cache or not _is_valid(dsl_data):
+        return
+    try:
+        cache.set(cache_key, answer)
+    except OSError as e:
+        warning_message(f"Could not write DSL cache: {e}")
+
+
+def _is_valid(dsl_data: Dict[str, Any]) -> bool:
+    """Check DSL data against the schema and custom rules."""
+    try:
+        validate_dsl(dsl_data)
+    except ValueError:
+        return False
+    return True
+
+
+def _cache_key(prompt_text: str, config: Config) -> str:
+    """Build the DSL cache key for a prompt under the current configuration."""
+    return make_key(
+        normalize_prompt(prompt_text),
+        config.model_id,
+        config.default_zone,
+        SYSTEM_PROMPT_HASH,
+    )
 
 
 def _call_openai(prompt_text: str, config: Config) -> Dict[str, Any]:
-    """Call OpenAI API to convert prompt to DSL."""
-    client = OpenAI(api_key=config.openai_api_key)
+    """Call OpenAI API to convert prompt to DSL.
     
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": prompt_text}
-    ]
+    Transient failures are retried with jittered exponential backoff within
+    config.openai_deadline, and a request slower than the model's recent p95
+    latency is hedged with a second one.
+    """
+    client = get_openai_client(config)
+    history = LatencyHistory(config.model_id)
+    
+    def attempt(remaining: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with span("llm.http", model=config.model_id):
+            response = client.chat.completions.create(**_completion_request(prompt_text, config),
+                                                      timeout=_attempt_timeout(config, remaining))
+        history.record(time.perf_counter() - started)
+        return _parse_response(response)
     
     try:
-        response = client.chat.completions.create(
-            model=config.model_id,
-            messages=messages,
-            max_tokens=500,
-            temperature=0.1,
-            timeout=30
-        )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        content = re.sub(r'^```json\s*', '', content)
-        content = re.sub(r'\s*```$', '', content)
-        
-        # Parse JSON
-        dsl_data = json.loads(content)
-        
-        return dsl_data
-        
+        return call_with_retries(attempt, _retry_policy(config), _is_retryable, _hedge_after(config, history))
+    except json.JSONDecodeError as e:
+        raise Exception(f"Invalid JSON response from OpenAI: {e}")
+    except Exception as e:
+        raise Exception(f"OpenAI API error: {e}")
+
+
+async def _call_openai_async(prompt_text: str, config: Config) -> Dict[str, Any]:
+    """Call OpenAI API asynchronously to convert prompt to DSL."""
+    client = get_async_openai_client(config)
+    history = LatencyHistory(config.model_id)
+    
+    async def attempt(remaining: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with span("llm.http", model=config.model_id):
+            response = await client.chat.completions.create(**_completion_request(prompt_text, config),
+                                                            timeout=_attempt_timeout(config, remaining))
+        history.record(time.perf_counter() - started)
+        return _parse_response(response)
+    
+    try:
+        return await call_with_retries_async(attempt, _retry_policy(config), _is_retryable,
+                                             _hedge_after(config, history))
     except json.JSONDecodeError as e:
         raise Exception(f"Invalid JSON response from OpenAI: {e}")
     except Exception as e:
         raise Exception(f"OpenAI API error: {e}")
 
 
+def _retry_policy(config: Config) -> RetryPolicy:
+    """Build the retry policy for OpenAI calls."""
+    return RetryPolicy(
+        max_retries=config.openai_max_retries,
+        backoff=config.openai_retry_backoff,
+        deadline=config.openai_deadline,
+    )
+
+
+def _attempt_timeout(config: Config, remaining: float) -> Timeout:
+    """Limit one request to the configured timeout and the time left before the deadline."""
+    return Timeout(max(0.1, min(config.openai_timeout, remaining)), connect=config.openai_connect_timeout)
+
+
+def _hedge_after(config: Config, history: LatencyHistory) -> Optional[float]:
+    """Seconds after which a slow request is hedged, or None to never hedge."""
+    if not config.openai_hedge:
+        return None
+    return history.percentile(HEDGE_PERCENTILE)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI call that failed with error may succeed when repeated."""
+    # Timeouts are connection errors; a malformed answer may come out right next time
+    if isinstance(error, (APIConnectionError, json.JSONDecodeError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUSES or error.status_code >= 500
+    return False
+
+
+def _completion_request(prompt_text: str, config: Config) -> Dict[str, Any]:
+    """Build the chat completion arguments for a prompt."""
+    return {
+        "model": config.model_id,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt_text}
+        ],
+        "max_tokens": 500,
+        "temperature": 0.1,
+    }
+
+
+def _parse_response(response) -> Dict[str, Any]:
+    """Extract the DSL JSON from a chat completion response."""
+    content = response.choices[0].message.content.strip()
+    
+    # Remove markdown code blocks if present
+    content = re.sub(r'^```json\s*', '', content)
+    content = re.sub(r'\s*```$', '', content)
+    
+    # Parse JSON
+    return json.loads(content)
+
+
 def _fallback_parser(prompt_text: str, config: Config) -> Dict[str, Any]:
     """Fallback rule-based parser when OpenAI fails."""
     prompt_lower = prompt_text.lower()
@@ -158,7 +416,6 @@ def _fallback_parser(prompt_text: str, config: Config) -> Dict[str, Any]:
         if any(word in prompt_lower for word in ["txt", "text"]):
             record_type = "TXT"
             # Try to extract content from quotes or after "diga"
-            import re
             content_match = re.search(r'(?:diga|contenido|content)["\s]*([^"]+)', prompt_lower)
             if content_match:
                 content = content_match.group(1).strip()
@@ -0,0 +1,172 @@
+"""Structured analysis of Terraform JSON plans for TerraSmart."""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, IO, Iterator, List
+
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+REPLACE = "replace"
+NO_OP = "no-op"
+READ = "read"
+
+# Actions that count as changes, in display order
+CHANGE_ACTIONS = [CREATE, UPDATE, REPLACE, DELETE]
+
+# Exit codes for plan summaries, extending terraform's -detailed-exitcode
+EXIT_NO_CHANGES = 0
+EXIT_CHANGES = 2
+EXIT_DESTRUCTIVE = 3
+
+_RESOURCE_CHANGES_RE = re.compile(r'"resource_changes"\s*:\s*\[')
+
+
+@dataclass
+class PlanSummary:
+    """Change counts per resource type and action."""
+    counts: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    
+    def add(self, resource_type: str, action: str) -> None:
+        """Count one planned action for a resource type."""
+        by_action = self.counts.setdefault(resource_type, {})
+        by_action[action] = by_action.get(action, 0) + 1
+    
+    def totals(self) -> Dict[str, int]:
+        """Get change counts per action across all resource types."""
+        totals = {action: 0 for action in CHANGE_ACTIONS}
+        for by_action in self.counts.values():
+            for action in CHANGE_ACTIONS:
+                totals[action] += by_action.get(action, 0)
+        return totals
+    
+    @property
+    def has_changes(self) -> bool:
+        """Whether the plan changes any resource."""
+        return any(self.totals().values())
+    
+    @property
+    def has_destructive(self) -> bool:
+        """Whether the plan deletes or replaces any resource."""
+        totals = self.totals()
+        return bool(totals[DELETE] or totals[REPLACE])
+    
+    def exit_code(self) -> int:
+        """Exit code for CI: 0 no changes, 2 changes, 3 destructive changes."""
+        if self.has_destructive:
+            return EXIT_DESTRUCTIVE
+        if self.has_changes:
+            return EXIT_CHANGES
+        return EXIT_NO_CHANGES
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable representation."""
+        return {
+            "totals": self.totals(),
+            "resources": {
+                resource_type: {a: n for a, n in by_action.items() if a in CHANGE_ACTIONS}
+                for resource_type, by_action in sorted(self.counts.items())
+                if any(by_action.get(a) for a in CHANGE_ACTIONS)
+            },
+            "has_changes": self.has_changes,
+            "has_destructive": self.has_destructive,
+        }
+    
+    def format_table(self) -> str:
+        """Format the summary as a human-readable table."""
+        if not self.has_changes:
+            return "No changes."
+        
+        rows = [["resource type"] + CHANGE_ACTIONS]
+        for resource_type, by_action in sorted(self.to_dict()["resources"].items()):
+            rows.append([resource_type] + [str(by_action.get(a, 0)) for a in CHANGE_ACTIONS])
+        totals = self.totals()
+        rows.append(["total"] + [str(totals[a]) for a in CHANGE_ACTIONS])
+        
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = []
+        for row in rows:
+            cells = [row[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells))
+        return "\n".join(lines)
+
+
+def classify_actions(actions: List[str]) -> str:
+    """Map a terraform change.actions list to a single action name."""
+    if sorted(actions) == [CREATE, DELETE]:
+        return REPLACE
+    if actions == [CREATE]:
+        return CREATE
+    if actions == [UPDATE]:
+        return UPDATE
+    if actions == [DELETE]:
+        return DELETE
+    if actions == [READ]:
+        return READ
+    return NO_OP
+
+
+def iter_resource_changes(stream: IO[str], chunk_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+    """Yield entries of the top-level resource_changes array of a JSON plan.
+    
+    The plan is read incrementally and only one resource change is decoded at a
+    time, so large plans never have to be held in memory. Reading stops at the
+    end of the array, before prior_state and configuration.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    
+    def read_more() -> bool:
+        nonlocal buffer
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return False
+        buffer += chunk
+        return True
+    
+    # Find the start of the resource_changes array
+    while True:
+        match = _RESOURCE_CHANGES_RE.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        # Keep a tail in case the key is split across chunks
+        buffer = buffer[-64:]
+        if not read_more():
+            return
+    
+    pos = 0
+    while True:
+        # Skip separators between array items
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buffer):
+            buffer, pos = "", 0
+            if not read_more():
+                raise ValueError("Unexpected end of plan JSON inside resource_changes")
+            continue
+        if buffer[pos] == "]":
+            return
+        
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The item is incomplete, read more of it
+            buffer, pos = buffer[pos:], 0
+            if not read_more():
+                raise ValueError("Unexpected end of plan JSON inside resource_changes")
+            continue
+        
+        yield item
+        buffer, pos = buffer[end:], 0
+
+
+def summarize_plan_json(stream: IO[str]) -> PlanSummary:
+    """Build a change summary from `terraform show -json` output."""
+    summary = PlanSummary()
+    for resource_change in iter_resource_changes(stream):
+        actions = resource_change.get("change", {}).get("actions", [])
+        summary.add(resource_change.get("type", "unknown"), classify_actions(actions))
+    return summary
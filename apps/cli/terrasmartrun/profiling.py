@@ -0,0 +1,126 @@
+"""Timing spans for profiling TerraSmart pipelines."""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Open spans of the current thread or asyncio task, innermost last
+_open_spans: contextvars.ContextVar[Tuple["Span", ...]] = contextvars.ContextVar("open_spans", default=())
+
+
+@dataclass
+class Span:
+    """A timed section of work."""
+    name: str
+    start: float
+    end: float = 0.0
+    depth: int = 0
+    thread_id: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def duration(self) -> float:
+        """Seconds the span took."""
+        return self.end - self.start
+
+
+class Tracer:
+    """Collects nested spans from any thread or asyncio task."""
+    
+    def __init__(self):
+        """Initialize an empty trace starting now."""
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+    
+    @contextlib.contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of the innermost open span."""
+        stack = _open_spans.get()
+        current = Span(name=name, start=time.perf_counter(), depth=len(stack),
+                       thread_id=threading.get_ident(), args=args)
+        token = _open_spans.set(stack + (current,))
+        try:
+            yield current
+        finally:
+            current.end = time.perf_counter()
+            _open_spans.reset(token)
+            with self._lock:
+                self.spans.append(current)
+    
+    def ordered_spans(self) -> List[Span]:
+        """Get finished spans in start order, parents before children."""
+        with self._lock:
+            return sorted(self.spans, key=lambda s: (s.start, s.depth))
+    
+    def format_table(self) -> str:
+        """Format the spans as an indented timing table."""
+        spans = self.ordered_spans()
+        if not spans:
+            return "No spans recorded."
+        
+        total = max(s.end for s in spans) - min(s.start for s in spans)
+        rows = [("stage", "ms", "%")]
+        for s in spans:
+            share = 100 * s.duration / total if total else 0.0
+            rows.append(("  " * s.depth + s.name, f"{s.duration * 1000:.1f}", f"{share:.1f}"))
+        
+        name_width = max(len(row[0]) for row in rows)
+        ms_width = max(len(row[1]) for row in rows)
+        return "\n".join(
+            f"{name.ljust(name_width)}  {ms.rjust(ms_width)}  {share.rjust(5)}"
+            for name, ms, share in rows
+        )
+    
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Get the spans in Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name,
+                "ph": "X",
+                "ts": round((s.start - self.origin) * 1e6, 1),
+                "dur": round(s.duration * 1e6, 1),
+                "pid": pid,
+                "tid": s.thread_id,
+                "args": {k: str(v) for k, v in s.args.items()},
+            }
+            for s in self.ordered_spans()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+    
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the trace as JSON to path."""
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f, indent=2)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def start_tracing() -> Tracer:
+    """Start collecting spans for this process."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """Stop collecting spans and return the finished trace."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def span(name: str, **args: Any) -> contextlib.AbstractContextManager:
+    """Time a block when tracing is active; a no-op otherwise."""
+    tracer = _tracer
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, **args)
@@ -0,0 +1,206 @@
+"""Rate limiting of Cloudflare API usage for TerraSmart."""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .utils import get_data_dir
+
+
+# State of the bucket shared by all processes, in the data directory
+STATE_FILE_NAME = "ratelimit.json"
+
+# Seconds everyone pauses after a first 429; doubled on each further one
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+    
+    Tokens refill continuously at rate per second up to capacity. acquire()
+    blocks until enough tokens are available.
+    """
+    
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        """Initialize a full bucket."""
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Token bucket rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update."""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Take tokens if available; otherwise return the seconds to wait for them."""
+        # A request bigger than the bucket could never be served
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+    
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until tokens are taken and return the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(tokens)
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+@dataclass
+class ThrottleStats:
+    """Snapshot of a shared bucket and its throttling counters."""
+    rate: float
+    capacity: float
+    tokens: float
+    paused_for: float
+    backoff: float
+    throttled_seconds: float
+    waits: int
+    rate_limited: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable representation."""
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "paused_for": round(self.paused_for, 3),
+            "backoff": self.backoff,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "waits": self.waits,
+            "rate_limited": self.rate_limited,
+        }
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket shared by all processes through a locked state file.
+    
+    The tokens live in a JSON file guarded by an exclusive flock, so
+    concurrent ts processes and threads draw from one budget. A 429 from
+    Cloudflare empties the bucket and pauses every caller for an adaptive
+    backoff that doubles on repeated 429s and decays on success. Time spent
+    waiting is counted for `ts ratelimit`.
+    """
+    
+    def __init__(self, path: Path, rate: float, capacity: float, clock: Callable[[], float] = time.time):
+        """Initialize a bucket stored at path; a new file starts full."""
+        super().__init__(rate, capacity, clock)
+        self.path = Path(path)
+    
+    @contextlib.contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        """Lock the state file and yield its state for updating."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._lock, os.fdopen(fd, 'r+') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                now = self._clock()
+                state.setdefault("tokens", self.capacity)
+                state.setdefault("updated", now)
+                # Refill at this process's rate; the file only holds the level
+                elapsed = max(0.0, now - state["updated"])
+                state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.rate)
+                state["updated"] = now
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Take tokens if available and not paused; otherwise return the seconds to wait."""
+        tokens = min(tokens, self.capacity)
+        with self._state() as state:
+            paused_for = state.get("paused_until", 0.0) - state["updated"]
+            if paused_for > 0:
+                return paused_for
+            if state["tokens"] >= tokens:
+                state["tokens"] -= tokens
+                return 0.0
+            return (tokens - state["tokens"]) / self.rate
+    
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until tokens are taken and return the seconds spent waiting."""
+        waited = super().acquire(tokens)
+        if waited > 0:
+            with self._state() as state:
+                state["throttled_seconds"] = state.get("throttled_seconds", 0.0) + waited
+                state["waits"] = state.get("waits", 0) + 1
+        return waited
+    
+    def report_rate_limited(self, retry_after: Optional[float] = None) -> float:
+        """Record a 429: empty the bucket and pause everyone; return the pause in seconds."""
+        with self._state() as state:
+            backoff = min(BACKOFF_MAX, max(BACKOFF_BASE, state.get("backoff", 0.0) * 2))
+            pause = max(backoff, retry_after or 0.0)
+            state["backoff"] = backoff
+            state["tokens"] = 0.0
+            state["paused_until"] = max(state.get("paused_until", 0.0), state["updated"] + pause)
+            state["rate_limited"] = state.get("rate_limited", 0) + 1
+        return pause
+    
+    def report_success(self) -> None:
+        """Let the backoff decay after a request that was not rate limited."""
+        with self._state() as state:
+            backoff = state.get("backoff", 0.0) / 2
+            state["backoff"] = backoff if backoff >= BACKOFF_BASE else 0.0
+    
+    def stats(self) -> ThrottleStats:
+        """Get the current level and throttling counters."""
+        with self._state() as state:
+            return ThrottleStats(
+                rate=self.rate,
+                capacity=self.capacity,
+                tokens=state["tokens"],
+                paused_for=max(0.0, state.get("paused_until", 0.0) - state["updated"]),
+                backoff=state.get("backoff", 0.0),
+                throttled_seconds=state.get("throttled_seconds", 0.0),
+                waits=state.get("waits", 0),
+                rate_limited=state.get("rate_limited", 0),
+            )
+    
+    def reset(self) -> None:
+        """Refill the bucket and clear the backoff and counters."""
+        with self._state() as state:
+            state.clear()
+            state.update(tokens=self.capacity, updated=self._clock())
+
+
+def get_rate_limiter(config) -> SharedTokenBucket:
+    """Get the Cloudflare API budget shared by all TerraSmart processes."""
+    return SharedTokenBucket(get_data_dir() / STATE_FILE_NAME, config.cloudflare_rate_limit,
+                             config.cloudflare_burst)
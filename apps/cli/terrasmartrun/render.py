@@ -1,44 +1,75 @@
 """Terraform template rendering for TerraSmart."""
 
+import asyncio
+import hashlib
+import json
 import os
+import threading
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
-from jinja2 import Environment, FileSystemLoader
+from typing import Dict, Any, Iterable, Optional, Tuple
+from jinja2 import (
+    BaseLoader,
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    ModuleLoader,
+)
 
+from .cache import make_key
 from .config import Config
+from .dsl import dns_record_conflict, dns_record_settings, is_multi_resource
+from .runs import get_run_index
 from .utils import get_data_dir, error_exit
 
 
-def render_terraform(dsl_data: Dict[str, Any], config: Config, output_dir: Optional[str] = None) -> Path:
-    """Render Terraform files from DSL data."""
-    # Determine output directory
-    if output_dir:
-        work_dir = Path(output_dir)
-    else:
-        # Generate in current working directory instead of hidden system directory
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        work_dir = Path.cwd() / "terraform" / timestamp
-    
-    work_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Setup Jinja2 environment - try multiple possible locations
-    possible_template_dirs = [
-        Path(__file__).parent.parent.parent.parent / "templates",  # From installed package
-        Path(__file__).parent.parent.parent / "templates",        # From development
-        Path(__file__).parent / "templates",                      # Alternative location
-    ]
-    
-    template_dir = None
-    for path in possible_template_dirs:
-        if path.exists():
-            template_dir = path
-            break
+# Where compile_templates() puts precompiled templates shipped with the package
+PRECOMPILED_TEMPLATE_DIR = Path(__file__).parent / "compiled_templates"
+
+_environment: Optional[Environment] = None
+_environment_lock = threading.Lock()
+
+
+def render_terraform(dsl_data: Dict[str, Any], config: Config, output_dir: Optional[str] = None,
+                     content_addressed: Optional[bool] = None, prompt: Optional[str] = None,
+                     zone_id: Optional[str] = None) -> Path:
+    """Render Terraform files from DSL data.
     
-    if not template_dir:
-        error_exit(f"Templates directory not found in any of these locations: {[str(p) for p in possible_template_dirs]}")
+    With content_addressed (default: config.content_addressed_runs) and no
+    output_dir, identical renders share one run directory. The run is recorded
+    in the run index with its prompt. Pass a zone_id resolved beforehand to
+    spare Terraform the zone lookup.
+    """
+    files = render_files(dsl_data, config, zone_id)
+    work_dir = _resolve_work_dir(output_dir, files, _use_content_addressing(config, content_addressed))
+    _write_files(work_dir, files)
+    get_run_index().record(work_dir, prompt=prompt, dsl_hash=make_key(dsl_data))
+    return work_dir
+
+
+async def render_terraform_async(dsl_data: Dict[str, Any], config: Config,
+                                 output_dir: Optional[str] = None,
+                                 content_addressed: Optional[bool] = None,
+                                 prompt: Optional[str] = None,
+                                 zone_id: Optional[str] = None) -> Path:
+    """Render Terraform files from DSL data without blocking the event loop."""
+    files = await asyncio.to_thread(render_files, dsl_data, config, zone_id)
+    work_dir = _resolve_work_dir(output_dir, files, _use_content_addressing(config, content_addressed))
+    await asyncio.to_thread(_write_files, work_dir, files)
+    await asyncio.to_thread(get_run_index().record, work_dir, prompt, make_key(dsl_data))
+    return work_dir
+
+
+def render_files(dsl_data: Dict[str, Any], config: Config, zone_id: Optional[str] = None) -> Dict[str, str]:
+    """Render all Terraform files for DSL data, keyed by path relative to the run directory.
     
-    env = Environment(loader=FileSystemLoader(template_dir))
+    Rendering never touches the network; without zone_id Terraform looks the
+    zone up by name.
+    """
+    template_dir = _get_template_dir()
+    env = get_environment()
     
     # Prepare template variables
     template_vars = {
@@ -46,51 +77,257 @@ def render_terraform(dsl_data: Dict[str, Any], config: Config, output_dir: Optio
         "config": config
     }
     
+    files = {}
+    
     # Render providers.tf
     providers_template = env.get_template("providers.tf.j2")
-    providers_content = providers_template.render(**template_vars)
-    
-    providers_file = work_dir / "providers.tf"
-    with open(providers_file, 'w') as f:
-        f.write(providers_content)
+    files["providers.tf"] = providers_template.render(**template_vars)
     
     # Render main.tf
     main_template = env.get_template("main.tf.j2")
-    main_content = main_template.render(**template_vars)
+    files["main.tf"] = main_template.render(**template_vars)
     
-    main_file = work_dir / "main.tf"
-    with open(main_file, 'w') as f:
-        f.write(main_content)
+    if is_multi_resource(dsl_data):
+        # One script per worker, named after it
+        tfvars = _generate_tfvars_json(dsl_data, config, zone_id)
+        worker_content = _read_worker_template(template_dir)
+        if worker_content is not None:
+            for worker_name in tfvars["workers"]:
+                files[f"src/{worker_name}.js"] = worker_content
+        files["terraform.tfvars.json"] = json.dumps(tfvars, indent=2) + "\n"
+        return files
     
-    # Create src directory and copy worker.js if needed
+    # Copy worker.js into src/ if needed
     if dsl_data.get("intent") == "create_worker_and_bind_domain":
-        src_dir = work_dir / "src"
-        src_dir.mkdir(exist_ok=True)
-        
-        worker_template_file = template_dir / "worker.js"
-        worker_file = src_dir / "worker.js"
-        
-        if worker_template_file.exists():
-            with open(worker_template_file, 'r') as f:
-                worker_content = f.read()
-            with open(worker_file, 'w') as f:
-                f.write(worker_content)
+        worker_content = _read_worker_template(template_dir)
+        if worker_content is not None:
+            files["src/worker.js"] = worker_content
     
     # Generate terraform.tfvars
-    tfvars_content = _generate_tfvars(dsl_data, config)
-    tfvars_file = work_dir / "terraform.tfvars"
-    with open(tfvars_file, 'w') as f:
-        f.write(tfvars_content)
+    files["terraform.tfvars"] = _generate_tfvars(dsl_data, config, zone_id)
+    
+    return files
+
+
+def render_dns_records(zone_name: str, resources: Iterable[Dict[str, Any]], config: Config,
+                       output_dir: Optional[str] = None, prompt: Optional[str] = None) -> Tuple[Path, int]:
+    """Render create_dns_record resources of one zone into a single for_each configuration.
     
+    Resources are consumed one at a time and streamed into
+    terraform.tfvars.json, so memory does not grow with the record data.
+    Identical records are written once; records that only differ in ttl,
+    proxied or priority raise ValueError. Returns the run directory and the
+    number of records written.
+    """
+    shell = {"version": 2, "zone_name": zone_name, "resources": []}
+    env = get_environment()
+    files = {
+        "providers.tf": env.get_template("providers.tf.j2").render(**shell, config=config),
+        "main.tf": env.get_template("main.tf.j2").render(**shell, config=config),
+    }
+    work_dir = _resolve_work_dir(output_dir, files, content_addressed=False)
+    _write_files(work_dir, files)
+    
+    tfvars = _generate_tfvars_json(shell, config)
+    del tfvars["dns_records"]
+    tfvars_path = work_dir / "terraform.tfvars.json"
+    partial_path = tfvars_path.with_suffix(".json.partial")
+    seen: Dict[str, Tuple[Any, ...]] = {}
+    try:
+        with open(partial_path, 'w') as f:
+            f.write("{\n")
+            for key, value in tfvars.items():
+                f.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+            f.write('  "dns_records": {')
+            for resource in resources:
+                record = _dns_record_vars(resource["hostname"], resource["dns_record"])
+                key = dns_record_key(record)
+                if key in seen:
+                    conflict = dns_record_conflict(record["name"], record, seen[key])
+                    if conflict:
+                        raise ValueError(conflict)
+                    continue
+                f.write(f"{',' if seen else ''}\n    {json.dumps(key)}: {json.dumps(record)}")
+                seen[key] = dns_record_settings(record)
+            f.write("\n  }\n}\n")
+        os.replace(partial_path, tfvars_path)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+    
+    get_run_index().record(work_dir, prompt=prompt)
+    return work_dir, len(seen)
+
+
+def _read_worker_template(template_dir: Path) -> Optional[str]:
+    """Read the worker script template, if present."""
+    worker_template_file = template_dir / "worker.js"
+    if not worker_template_file.exists():
+        return None
+    with open(worker_template_file, 'r') as f:
+        return f.read()
+
+
+def _use_content_addressing(config: Config, content_addressed: Optional[bool]) -> bool:
+    """Resolve the content-addressed layout setting."""
+    if content_addressed is None:
+        return config.content_addressed_runs
+    return content_addressed
+
+
+def _resolve_work_dir(output_dir: Optional[str], files: Dict[str, str], content_addressed: bool) -> Path:
+    """Determine and create the run directory."""
+    if output_dir:
+        work_dir = Path(output_dir)
+    elif content_addressed:
+        # The rendered files capture the DSL, config and template versions
+        work_dir = Path.cwd() / "terraform" / f"ca-{content_hash(files)[:16]}"
+    else:
+        # Generate in current working directory instead of hidden system directory
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        work_dir = _new_run_dir(Path.cwd() / "terraform", timestamp)
+    
+    work_dir.mkdir(parents=True, exist_ok=True)
+    # Mark reused directories as the most recent run
+    os.utime(work_dir)
     return work_dir
 
 
-def _generate_tfvars(dsl_data: Dict[str, Any], config: Config) -> str:
+def _new_run_dir(terraform_dir: Path, name: str) -> Path:
+    """Create a run directory no other render uses, suffixing name if it is taken.
+    
+    Renders started within the same second (e.g. gathered async pipelines)
+    would otherwise share one timestamped directory.
+    """
+    terraform_dir.mkdir(parents=True, exist_ok=True)
+    candidate, counter = terraform_dir / name, 1
+    while True:
+        try:
+            candidate.mkdir()
+            return candidate
+        except FileExistsError:
+            candidate = terraform_dir / f"{name}_{counter}"
+            counter += 1
+
+
+def content_hash(files: Dict[str, str]) -> str:
+    """Hash a set of rendered files."""
+    digest = hashlib.sha256()
+    for relative_path in sorted(files):
+        digest.update(relative_path.encode('utf-8') + b"\0")
+        digest.update(files[relative_path].encode('utf-8') + b"\0")
+    return digest.hexdigest()
+
+
+def _write_files(work_dir: Path, files: Dict[str, str]) -> None:
+    """Write rendered files into the run directory, skipping unchanged ones."""
+    for relative_path, content in files.items():
+        _write_if_changed(work_dir / relative_path, content)
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Write content to path unless it already holds it; return whether it wrote."""
+    try:
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+    return True
+
+
+def get_environment() -> Environment:
+    """Get the Jinja2 environment shared by all renders in this process.
+    
+    Compiled templates are cached in memory and as bytecode under the data
+    directory; templates are recompiled when their source changes.
+    """
+    global _environment
+    with _environment_lock:
+        if _environment is None:
+            _environment = Environment(
+                loader=_build_loader(_get_template_dir()),
+                bytecode_cache=FileSystemBytecodeCache(str(_get_bytecode_cache_dir())),
+                auto_reload=True,
+            )
+        return _environment
+
+
+def compile_templates(target: Path = PRECOMPILED_TEMPLATE_DIR, template_dir: Optional[Path] = None) -> Path:
+    """Precompile the Terraform templates into Python modules in target.
+    
+    Run at build time so a cold process does not pay the compile cost.
+    """
+    env = Environment(loader=FileSystemLoader(template_dir or _get_template_dir()))
+    env.compile_templates(
+        str(target),
+        filter_func=lambda name: name.endswith(".j2"),
+        zip=None,
+        ignore_errors=False,
+    )
+    return target
+
+
+def _build_loader(template_dir: Path) -> BaseLoader:
+    """Use precompiled templates when they are present and current."""
+    if _precompiled_templates_current(template_dir):
+        return ChoiceLoader([
+            ModuleLoader(str(PRECOMPILED_TEMPLATE_DIR)),
+            FileSystemLoader(template_dir),
+        ])
+    return FileSystemLoader(template_dir)
+
+
+def _precompiled_templates_current(template_dir: Path) -> bool:
+    """Check that every template has a compiled module at least as new as its source."""
+    if not PRECOMPILED_TEMPLATE_DIR.is_dir():
+        return False
+    for source in template_dir.glob("*.j2"):
+        compiled = PRECOMPILED_TEMPLATE_DIR / ModuleLoader.get_module_filename(source.name)
+        try:
+            if compiled.stat().st_mtime < source.stat().st_mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _get_bytecode_cache_dir() -> Path:
+    """Get the directory for cached template bytecode."""
+    cache_dir = get_data_dir() / "cache" / "jinja"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+@lru_cache(maxsize=None)
+def _get_template_dir() -> Path:
+    """Find the templates directory - try multiple possible locations."""
+    possible_template_dirs = [
+        Path(__file__).parent.parent.parent.parent / "templates",  # From installed package
+        Path(__file__).parent.parent.parent / "templates",        # From development
+        Path(__file__).parent / "templates",                      # Alternative location
+    ]
+    
+    for path in possible_template_dirs:
+        if path.exists():
+            return path
+    
+    error_exit(f"Templates directory not found in any of these locations: {[str(p) for p in possible_template_dirs]}")
+
+
+def _generate_tfvars(dsl_data: Dict[str, Any], config: Config, zone_id: Optional[str] = None) -> str:
     """Generate terraform.tfvars content."""
     lines = []
     
     # Required variables
     lines.append(f'zone_name = "{dsl_data["zone_name"]}"')
+    if zone_id:
+        # Skips the cloudflare_zones lookup on every plan
+        lines.append(f'zone_id = "{zone_id}"')
     lines.append(f'hostname = "{dsl_data["hostname"]}"')
     
     # Worker name
@@ -105,13 +342,77 @@ def _generate_tfvars(dsl_data: Dict[str, Any], config: Config) -> str:
     lines.append(f'worker_name = "{worker_name}"')
     
     # Account ID
+    lines.append(f'account_id = "{_get_account_id(config)}"')
+    
+    return '\n'.join(lines) + '\n'
+
+
+def _generate_tfvars_json(dsl_data: Dict[str, Any], config: Config,
+                          zone_id: Optional[str] = None) -> Dict[str, Any]:
+    """Generate terraform.tfvars.json content for a multi-resource document."""
+    dns_records = {}
+    workers = {}
+    kv_namespaces = set()
+    d1_databases = set()
+    
+    for resource in dsl_data["resources"]:
+        intent = resource["intent"]
+        bindings = resource.get("bindings", {})
+        kv_namespaces.update(bindings.get("kv", []))
+        d1_databases.update(bindings.get("d1", []))
+        
+        if intent == "create_dns_record":
+            record = _dns_record_vars(resource["hostname"], resource["dns_record"])
+            dns_records[dns_record_key(record)] = record
+        elif intent == "create_worker_and_bind_domain":
+            worker = resource["worker"]
+            workers[worker["name"]] = {
+                "hostname": resource["hostname"],
+                "module": worker["module"],
+                "compatibility_date": worker["compatibility_date"],
+                "routing_mode": resource.get("routing", {}).get("mode", "custom_domain"),
+                "kv": bindings.get("kv", []),
+                "d1": bindings.get("d1", []),
+            }
+    
+    return {
+        "zone_name": dsl_data["zone_name"],
+        "zone_id": zone_id or "",
+        "account_id": _get_account_id(config),
+        "dns_records": dns_records,
+        "workers": workers,
+        "kv_namespaces": sorted(kv_namespaces),
+        "d1_databases": sorted(d1_databases),
+    }
+
+
+def _dns_record_vars(hostname: str, dns_record: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the dns_records entry for a record, filling in defaults."""
+    record = {
+        "name": hostname,
+        "type": dns_record["type"],
+        "content": dns_record["content"],
+        "ttl": dns_record.get("ttl", 300),
+        "proxied": dns_record.get("proxied", False),
+    }
+    if "priority" in dns_record:
+        record["priority"] = dns_record["priority"]
+    return record
+
+
+def dns_record_key(record: Dict[str, Any]) -> str:
+    """Get a stable for_each key for a DNS record."""
+    # Records can share name and type (e.g. several A records), so include the content
+    content_digest = hashlib.sha256(record["content"].encode('utf-8')).hexdigest()[:8]
+    return f"{record['name']}/{record['type']}/{content_digest}"
+
+
+def _get_account_id(config: Config) -> str:
+    """Get the Cloudflare account ID from config or environment."""
     account_id = config.account_id or os.environ.get('CLOUDFLARE_ACCOUNT_ID', '')
     if not account_id:
-        error_exit(
+        raise ValueError(
             "Cloudflare account ID is required but not configured.\n"
             "Set it in 'terrasmart init' or via CLOUDFLARE_ACCOUNT_ID environment variable."
         )
-    
-    lines.append(f'account_id = "{account_id}"')
-    
-    return '\n'.join(lines) + '\n'
+    return account_id
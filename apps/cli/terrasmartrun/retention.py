@@ -0,0 +1,252 @@
+"""Retention and garbage collection of run directories for TerraSmart."""
+
+import hashlib
+import os
+import shutil
+import stat
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import Config
+from .runs import RunIndex
+from .tfexec import STATE_FILE_NAME
+from .utils import get_plugin_cache_dir
+
+
+# Paths inside a run directory that planning again recreates
+DISPOSABLE_PATHS = [".terraform", "tfplan", "tfplan.meta.json", "plan.txt", "dns_api_plan.json"]
+
+
+@dataclass
+class RunDir:
+    """A run directory with its age and size."""
+    path: Path
+    mtime: float
+    size: int
+    
+    @property
+    def has_state(self) -> bool:
+        """Whether terraform keeps local state for applied resources here."""
+        return (self.path / STATE_FILE_NAME).exists()
+
+
+@dataclass
+class GcResult:
+    """Outcome of a garbage collection pass."""
+    removed: List[Path] = field(default_factory=list)
+    pruned: List[Path] = field(default_factory=list)
+    deduplicated: int = 0
+    bytes_reclaimed: int = 0
+    dry_run: bool = False
+
+
+def collect_garbage(
+    terraform_dir: Path,
+    keep_last: int,
+    max_age: int,
+    max_bytes: int = 0,
+    dedupe: bool = True,
+    dry_run: bool = False,
+    keep: Iterable[Path] = (),
+) -> GcResult:
+    """Prune run directories under terraform_dir.
+    
+    The newest keep_last runs and anything in keep are never touched. Other
+    runs are pruned when they are older than max_age seconds, and then oldest
+    first until the total size fits max_bytes (0 for no limit). Runs holding
+    local terraform state only lose what terraform can recreate (.terraform
+    and saved plans); all other runs are deleted. Finally identical provider
+    binaries of the remaining runs are hardlinked to the shared plugin cache
+    or to each other.
+    """
+    result = GcResult(dry_run=dry_run)
+    runs = scan_run_dirs(terraform_dir)
+    protected = {Path(p).resolve() for p in keep}
+    protected.update(run.path for run in runs[:max(keep_last, 1)])
+    
+    now = time.time()
+    victims = []
+    candidates = [run for run in runs if run.path not in protected]
+    for run in candidates:
+        if max_age > 0 and now - run.mtime > max_age:
+            victims.append(run)
+    
+    if max_bytes > 0:
+        total = sum(run.size for run in runs) - sum(_reclaimable(run) for run in victims)
+        for run in reversed(candidates):
+            if total <= max_bytes:
+                break
+            if run not in victims:
+                victims.append(run)
+                total -= _reclaimable(run)
+    
+    index = RunIndex(terraform_dir)
+    for run in victims:
+        if run.has_state:
+            result.bytes_reclaimed += _prune_disposable(run.path, dry_run)
+            result.pruned.append(run.path)
+        else:
+            result.bytes_reclaimed += run.size
+            result.removed.append(run.path)
+            if not dry_run:
+                shutil.rmtree(run.path, ignore_errors=True)
+                index.remove(run.path)
+    
+    if dedupe:
+        survivors = [run.path for run in runs if run not in victims]
+        count, reclaimed = dedupe_providers(survivors, dry_run, cache_dir=get_plugin_cache_dir())
+        result.deduplicated = count
+        result.bytes_reclaimed += reclaimed
+    return result
+
+
+def apply_retention(config: Config, terraform_dir: Optional[Path] = None,
+                    keep: Iterable[Path] = ()) -> GcResult:
+    """Prune run directories according to the configured retention policy."""
+    return collect_garbage(
+        terraform_dir or Path.cwd() / "terraform",
+        keep_last=config.retention_keep_last,
+        max_age=config.retention_max_age,
+        max_bytes=config.retention_max_bytes,
+        keep=keep,
+    )
+
+
+def scan_run_dirs(terraform_dir: Path) -> List[RunDir]:
+    """List run directories, newest first."""
+    runs = []
+    if not terraform_dir.is_dir():
+        return runs
+    for path in terraform_dir.iterdir():
+        if not path.is_dir() or path.is_symlink():
+            continue
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        runs.append(RunDir(path=path.resolve(), mtime=mtime, size=dir_size(path)))
+    runs.sort(key=lambda run: run.mtime, reverse=True)
+    return runs
+
+
+def dir_size(path: Path) -> int:
+    """Get the bytes used by the regular files under path, counting hardlinks once."""
+    seen: Set[Tuple[int, int]] = set()
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode) or (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+    return total
+
+
+def dedupe_providers(run_dirs: Iterable[Path], dry_run: bool = False,
+                     cache_dir: Optional[Path] = None) -> Tuple[int, int]:
+    """Hardlink identical provider binaries across run directories.
+    
+    Runs initialized with TF_PLUGIN_CACHE_DIR only hold symlinks into the
+    cache, which are left alone; copies in runs made before the cache are
+    linked to the cached binary when cache_dir has one, else to each other.
+    Returns the number of files replaced by links and the bytes reclaimed.
+    """
+    by_size: Dict[int, List[Path]] = {}
+    # Cached binaries come first so they are the ones linked to
+    roots = ([Path(cache_dir)] if cache_dir else []) + [Path(d) / ".terraform" / "providers" for d in run_dirs]
+    for root_dir in roots:
+        for root, _, files in os.walk(root_dir):
+            for name in files:
+                path = Path(root) / name
+                if path.is_symlink():
+                    continue
+                try:
+                    by_size.setdefault(path.stat().st_size, []).append(path)
+                except OSError:
+                    continue
+    
+    count = 0
+    reclaimed = 0
+    for size, paths in by_size.items():
+        if len(paths) < 2 or size == 0:
+            continue
+        originals: Dict[str, Path] = {}
+        for path in paths:
+            digest = _file_digest(path)
+            if digest is None:
+                continue
+            original = originals.setdefault(digest, path)
+            if original == path or _same_file(original, path):
+                continue
+            if not dry_run and not _replace_with_link(original, path):
+                continue
+            count += 1
+            reclaimed += size
+    return count, reclaimed
+
+
+def _reclaimable(run: RunDir) -> int:
+    """Get the bytes pruning a run would free."""
+    if run.has_state:
+        return _prune_disposable(run.path, dry_run=True)
+    return run.size
+
+
+def _prune_disposable(run_dir: Path, dry_run: bool) -> int:
+    """Delete the recreatable parts of a run directory and return the bytes freed.
+    
+    'ts apply' runs terraform init again before replanning a pruned run.
+    """
+    freed = 0
+    for name in DISPOSABLE_PATHS:
+        path = run_dir / name
+        if path.is_dir() and not path.is_symlink():
+            freed += dir_size(path)
+            if not dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+        elif path.is_file():
+            freed += path.stat().st_size
+            if not dry_run:
+                path.unlink()
+    return freed
+
+
+def _file_digest(path: Path) -> Optional[str]:
+    """Hash a file, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    """Whether two paths are already links to the same file."""
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _replace_with_link(original: Path, path: Path) -> bool:
+    """Atomically replace path with a hardlink to original."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.link")
+    try:
+        os.link(original, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return False
+    return True
@@ -0,0 +1,188 @@
+"""Retries with backoff and hedged requests for TerraSmart's remote calls."""
+
+import asyncio
+import json
+import os
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from .utils import get_data_dir
+
+
+T = TypeVar("T")
+
+# Latencies kept per key; hedging waits for MIN_HEDGE_SAMPLES of them
+HISTORY_SIZE = 200
+MIN_HEDGE_SAMPLES = 20
+
+LATENCY_FILE_NAME = "latency.json"
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how long to retry a call."""
+    max_retries: int = 3
+    backoff: float = 0.5  # Seconds before the first retry, doubled for each one after
+    backoff_max: float = 8.0
+    deadline: float = 60.0  # Seconds for the call including all retries
+    
+    def delay(self, attempt: int, rng: Callable[[], float] = random.random) -> float:
+        """Seconds to wait before retry number attempt (0-based), with full jitter."""
+        return rng() * min(self.backoff_max, self.backoff * 2 ** attempt)
+
+
+class LatencyHistory:
+    """Recent latencies of successful calls, persisted in the data directory.
+    
+    Kept across processes so a short-lived CLI call can still hedge at the
+    observed p95.
+    """
+    
+    def __init__(self, key: str, path: Optional[Path] = None, size: int = HISTORY_SIZE):
+        """Initialize the history of one kind of call, e.g. a model."""
+        self.key = key
+        self.path = Path(path) if path else get_data_dir() / LATENCY_FILE_NAME
+        self.size = size
+        self._lock = threading.Lock()
+    
+    def samples(self) -> List[float]:
+        """Get the recorded latencies, oldest first."""
+        return self._load().get(self.key, [])
+    
+    def record(self, seconds: float) -> None:
+        """Add a latency; failures to persist it are ignored."""
+        with self._lock:
+            data = self._load()
+            samples = data.get(self.key, []) + [round(seconds, 4)]
+            data[self.key] = samples[-self.size:]
+            try:
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                tmp_path.replace(self.path)
+            except OSError:
+                pass
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Get the q-th percentile latency, or None with too few samples."""
+        samples = sorted(self.samples())
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+    
+    def _load(self) -> dict:
+        """Read all histories from disk."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+def call_with_retries(call: Callable[[float], T], policy: RetryPolicy, is_retryable: Callable[[Exception], bool],
+                      hedge_after: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                      sleep: Callable[[float], None] = time.sleep) -> T:
+    """Call call(seconds_left) until it succeeds, retrying retryable errors.
+    
+    Retries wait a jittered exponential backoff and stop at the policy's
+    deadline; call should use seconds_left as its own timeout. With
+    hedge_after, an attempt still running after that many seconds gets a
+    second, concurrent request and the first success wins.
+    """
+    start = clock()
+    attempt = 0
+    while True:
+        remaining = policy.deadline - (clock() - start)
+        try:
+            return _hedged(call, remaining, hedge_after)
+        except Exception as e:
+            if not is_retryable(e) or attempt >= policy.max_retries:
+                raise
+            delay = policy.delay(attempt)
+            if clock() - start + delay >= policy.deadline:
+                raise TimeoutError(f"Gave up after {policy.deadline:g}s: {e}") from e
+            sleep(delay)
+            attempt += 1
+
+
+async def call_with_retries_async(call: Callable[[float], Awaitable[T]], policy: RetryPolicy,
+                                  is_retryable: Callable[[Exception], bool],
+                                  hedge_after: Optional[float] = None,
+                                  clock: Callable[[], float] = time.monotonic) -> T:
+    """Async version of call_with_retries; the losing hedged request is cancelled."""
+    start = clock()
+    attempt = 0
+    while True:
+        remaining = policy.deadline - (clock() - start)
+        try:
+            return await _hedged_async(call, remaining, hedge_after)
+        except Exception as e:
+            if not is_retryable(e) or attempt >= policy.max_retries:
+                raise
+            delay = policy.delay(attempt)
+            if clock() - start + delay >= policy.deadline:
+                raise TimeoutError(f"Gave up after {policy.deadline:g}s: {e}") from e
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def _hedged(call: Callable[[float], T], remaining: float, hedge_after: Optional[float]) -> T:
+    """Run one attempt, adding a second request if it is slower than hedge_after."""
+    if hedge_after is None or hedge_after >= remaining:
+        return call(remaining)
+    
+    outcomes: "queue.Queue[Tuple[bool, Any]]" = queue.Queue()
+    
+    def run(timeout: float) -> None:
+        try:
+            outcomes.put((True, call(timeout)))
+        except Exception as e:
+            outcomes.put((False, e))
+    
+    # The losing request cannot be interrupted. Daemon threads let the process
+    # exit without waiting for it, which a ThreadPoolExecutor would not.
+    threading.Thread(target=run, args=(remaining,), daemon=True).start()
+    requests = 1
+    try:
+        ok, value = outcomes.get(timeout=hedge_after)
+    except queue.Empty:
+        threading.Thread(target=run, args=(remaining - hedge_after,), daemon=True).start()
+        requests = 2
+        ok, value = outcomes.get()
+    # A failure only counts once the other request cannot succeed either
+    if not ok and requests == 2:
+        ok, value = outcomes.get()
+    if ok:
+        return value
+    raise value
+
+
+async def _hedged_async(call: Callable[[float], Awaitable[T]], remaining: float,
+                        hedge_after: Optional[float]) -> T:
+    """Run one attempt, adding a second request if it is slower than hedge_after."""
+    if hedge_after is None or hedge_after >= remaining:
+        return await call(remaining)
+    
+    pending = {asyncio.ensure_future(call(remaining))}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_after)
+        if not done:
+            pending.add(asyncio.ensure_future(call(remaining - hedge_after)))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,132 @@
+"""Index of run directories for TerraSmart."""
+
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+INDEX_FILE_NAME = "runs.db"
+
+# Run statuses, in pipeline order
+RENDERED = "rendered"
+PLANNED = "planned"
+PLAN_FAILED = "plan_failed"
+APPLIED = "applied"
+APPLY_FAILED = "apply_failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    path TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    prompt TEXT,
+    dsl_hash TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_updated_at ON runs (updated_at);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs (run_id);
+"""
+
+_COLUMNS = ["run_id", "path", "prompt", "dsl_hash", "status", "created_at", "updated_at"]
+
+
+class RunIndex:
+    """SQLite index of run directories, so lookups never scan the filesystem.
+    
+    Writes are best effort: a missing or locked index never fails a run, and
+    readers fall back to scanning when it has no answer.
+    """
+    
+    def __init__(self, terraform_dir: Path):
+        """Initialize the index for a terraform/ directory."""
+        self.terraform_dir = Path(terraform_dir)
+        self.path = self.terraform_dir / INDEX_FILE_NAME
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index, creating it if needed."""
+        self.terraform_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_SCHEMA)
+        return conn
+    
+    def record(self, work_dir: Path, prompt: Optional[str] = None, dsl_hash: Optional[str] = None,
+               status: str = RENDERED) -> None:
+        """Add a run, or refresh it when the directory is reused."""
+        now = time.time()
+        work_dir = Path(work_dir).resolve()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO runs (path, run_id, prompt, dsl_hash, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET prompt = COALESCE(excluded.prompt, prompt), "
+                    "dsl_hash = excluded.dsl_hash, status = excluded.status, updated_at = excluded.updated_at",
+                    (str(work_dir), work_dir.name, prompt, dsl_hash, status, now, now),
+                )
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def set_status(self, work_dir: Path, status: str) -> None:
+        """Update the status of a run."""
+        work_dir = Path(work_dir).resolve()
+        try:
+            with closing(self._connect()) as conn, conn:
+                updated = conn.execute(
+                    "UPDATE runs SET status = ?, updated_at = ? WHERE path = ?",
+                    (status, time.time(), str(work_dir)),
+                ).rowcount
+        except (sqlite3.Error, OSError):
+            return
+        if not updated:
+            # Runs rendered before the index existed
+            self.record(work_dir, status=status)
+    
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Get the most recently updated run."""
+        runs = self.list(limit=1)
+        return runs[0] if runs else None
+    
+    def list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get runs, most recently updated first."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM runs ORDER BY updated_at DESC"
+        params = ()
+        if limit:
+            query += " LIMIT ?"
+            params = (limit,)
+        return self._query(query, params)
+    
+    def get(self, run: str) -> Optional[Dict[str, Any]]:
+        """Get a run by run ID or directory path."""
+        runs = self._query(
+            f"SELECT {', '.join(_COLUMNS)} FROM runs WHERE run_id = ? OR path = ? "
+            "ORDER BY updated_at DESC LIMIT 1",
+            (run, str(Path(run).resolve())),
+        )
+        return runs[0] if runs else None
+    
+    def remove(self, work_dir: Path) -> None:
+        """Forget a run."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM runs WHERE path = ?", (str(Path(work_dir).resolve()),))
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def _query(self, query: str, params: tuple) -> List[Dict[str, Any]]:
+        """Run a read query, treating a missing index as empty."""
+        if not self.path.exists():
+            return []
+        try:
+            with closing(self._connect()) as conn:
+                return [dict(row) for row in conn.execute(query, params)]
+        except sqlite3.Error:
+            return []
+
+
+def get_run_index(base_dir: Optional[Path] = None) -> RunIndex:
+    """Get the run index for the terraform/ directory under base_dir (default: cwd)."""
+    return RunIndex((base_dir or Path.cwd()) / "terraform")
@@ -1,32 +1,374 @@
 """Terraform execution wrapper for TerraSmart."""
 
+import asyncio
+import contextlib
+import filecmp
+import hashlib
+import json
 import os
+import re
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, Optional
 
-from .utils import error_exit
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .plan_analysis import PlanSummary, summarize_plan_json
+from .profiling import span
+from .ratelimit import get_rate_limiter
+from .utils import error_exit, get_plugin_cache_dir, get_shared_lock_file
+
+
+# Seconds before a terraform command is killed
+TERRAFORM_TIMEOUT = 300
+
+LOCK_FILE_NAME = ".terraform.lock.hcl"
+
+# Files whose content decides whether terraform init has to run again
+INIT_INPUTS = ["providers.tf", LOCK_FILE_NAME]
+INIT_FINGERPRINT_FILE = Path(".terraform") / "terrasmart-init.sha256"
+
+
+# Saved plan written by plan() and consumed by apply()
+PLAN_FILE_NAME = "tfplan"
+PLAN_META_FILE_NAME = "tfplan.meta.json"
+
+# Rendered inputs that a saved plan was computed from
+PLAN_INPUT_PATTERNS = ["*.tf", "*.tfvars", "*.tfvars.json", LOCK_FILE_NAME, "src/**/*"]
+
+# Lines of streamed output kept for error messages and return values
+OUTPUT_TAIL_LINES = 200
+
+# Commands that support -json event output, -parallelism and -lock-timeout
+JSON_EVENT_COMMANDS = {"plan", "apply", "destroy"}
+TUNABLE_COMMANDS = {"plan", "apply", "destroy"}
+
+STATE_FILE_NAME = "terraform.tfstate"
+
+# Commands that read or write the Cloudflare resources in the state
+API_COMMANDS = {"plan", "apply", "destroy", "import", "refresh"}
+
+# Terraform error output of a Cloudflare request rejected by the rate limit
+_RATE_LIMITED_RE = re.compile(r'\b429\b|too many requests|rate limit', re.IGNORECASE)
+
+OutputCallback = Callable[[str, str], None]
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+class CommandOutput:
+    """Collects a terraform command's output as it is produced.
+    
+    Lines are forwarded to an optional callback and log file. Only the last
+    OUTPUT_TAIL_LINES lines of each stream are kept, unless keep_all is set.
+    With on_event, stdout lines are parsed as terraform -json events.
+    """
+    
+    def __init__(self, on_output: Optional[OutputCallback] = None, log_file: Optional[IO[str]] = None,
+                 on_event: Optional[EventCallback] = None, keep_all: bool = False):
+        """Initialize an empty output collector."""
+        self.on_output = on_output
+        self.on_event = on_event
+        self.log_file = log_file
+        maxlen = None if keep_all else OUTPUT_TAIL_LINES
+        self.tails = {"stdout": deque(maxlen=maxlen), "stderr": deque(maxlen=maxlen)}
+        self._lock = threading.Lock()
+    
+    def feed(self, stream: str, line: str) -> None:
+        """Handle one line of output from stdout or stderr."""
+        with self._lock:
+            self.tails[stream].append(line)
+            if self.log_file:
+                self.log_file.write(line)
+                self.log_file.flush()
+        
+        if self.on_event and stream == "stdout":
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = None
+            if isinstance(event, dict):
+                self.on_event(event)
+                return
+        if self.on_output:
+            self.on_output(stream, line)
+    
+    def text(self, stream: str) -> str:
+        """Get the kept output of a stream."""
+        with self._lock:
+            return "".join(self.tails[stream])
+
+
+@contextlib.contextmanager
+def plugin_cache_lock() -> Iterator[None]:
+    """Hold an exclusive lock on the shared plugin cache.
+    
+    Terraform does not guard the plugin cache against concurrent installs,
+    so inits in other threads and processes wait for each other.
+    """
+    lock_path = get_plugin_cache_dir().parent / "plugin-cache.lock"
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+async def _enter_in_thread(context: contextlib.AbstractContextManager) -> None:
+    """Enter a blocking context manager in a worker thread.
+    
+    The thread cannot be interrupted, so when the caller is cancelled while
+    it waits, whichever side sees the context entered exits it again.
+    """
+    guard = threading.Lock()
+    state = {"entered": False, "abandoned": False}
+    
+    def enter() -> None:
+        context.__enter__()
+        with guard:
+            if state["abandoned"]:
+                context.__exit__(None, None, None)
+            else:
+                state["entered"] = True
+    
+    try:
+        await asyncio.to_thread(enter)
+    except asyncio.CancelledError:
+        with guard:
+            state["abandoned"] = True
+            entered = state["entered"]
+        if entered:
+            context.__exit__(None, None, None)
+        raise
+
+
+def estimate_api_calls(work_dir: Path) -> int:
+    """Estimate the Cloudflare API requests a command in work_dir makes.
+    
+    Refreshing reads every resource instance in the state, plus the zone
+    lookup when the zone ID is not cached.
+    """
+    try:
+        with open(Path(work_dir) / STATE_FILE_NAME, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 1
+    instances = sum(len(resource.get("instances", [])) for resource in state.get("resources", []))
+    return 1 + instances
+
+
+def hash_files(base_dir: Path, relative_paths: Iterable) -> str:
+    """Hash the names and contents of files, treating missing files as empty."""
+    digest = hashlib.sha256()
+    for relative_path in relative_paths:
+        path = base_dir / relative_path
+        digest.update(str(relative_path).encode('utf-8') + b"\0")
+        if path.is_file():
+            digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _plan_file_arg(plan_file: Path) -> str:
+    """Pass a plan file to terraform, which runs inside the work directory."""
+    return str(Path(plan_file).resolve())
 
 
 class TerraformExecutor:
     """Wrapper for executing Terraform commands."""
     
-    def __init__(self, work_dir: Path):
-        """Initialize with working directory."""
+    def __init__(self, work_dir: Path, on_output: Optional[OutputCallback] = None,
+                 log_file: Optional[Path] = None, on_event: Optional[EventCallback] = None,
+                 parallelism: Optional[int] = None, lock_timeout: Optional[str] = None,
+                 rate_limiter=None):
+        """Initialize with working directory.
+        
+        on_output receives (stream, line) for every line as terraform prints
+        it, possibly from a reader thread, and log_file gets a copy of all
+        output. Commands then return only
+        the last OUTPUT_TAIL_LINES lines instead of their full output. With
+        on_event, plan/apply/destroy run with -json and on_event receives
+        each parsed event.
+        
+        parallelism and lock_timeout (e.g. "30s") are passed to plan, apply
+        and destroy; None keeps terraform's defaults.
+        
+        With a rate_limiter (see ratelimit.SharedTokenBucket), commands that
+        call the Cloudflare API first wait for their estimated share of the
+        budget and report 429s; throttled adds up the seconds waited.
+        """
         self.work_dir = Path(work_dir)
         if not self.work_dir.exists():
             error_exit(f"Working directory does not exist: {work_dir}")
+        self.init_skipped = False
+        self.on_output = on_output
+        self.log_file = Path(log_file) if log_file else None
+        self.on_event = on_event
+        self.parallelism = parallelism
+        self.lock_timeout = lock_timeout
+        self.rate_limiter = rate_limiter
+        self.throttled = 0.0
+    
+    @classmethod
+    def from_config(cls, work_dir: Path, config, parallelism: Optional[int] = None,
+                    lock_timeout: Optional[str] = None, **kwargs) -> "TerraformExecutor":
+        """Create an executor, defaulting parallelism and lock_timeout to the config.
+        
+        The executor draws from the Cloudflare API budget shared by all processes.
+        """
+        kwargs.setdefault("rate_limiter", get_rate_limiter(config))
+        return cls(
+            work_dir,
+            parallelism=parallelism or config.terraform_parallelism or None,
+            lock_timeout=lock_timeout or config.terraform_lock_timeout or None,
+            **kwargs,
+        )
+    
+    def should_refresh(self, config, refresh: Optional[bool] = None, fast: bool = False) -> bool:
+        """Decide whether a plan refreshes state.
+        
+        An explicit refresh wins. In fast mode, refresh is skipped when there is
+        no state yet or it is younger than config.fast_plan_max_state_age.
+        """
+        if refresh is not None:
+            return refresh
+        if fast:
+            age = self.state_age()
+            if age is None or age < config.fast_plan_max_state_age:
+                return False
+        return config.terraform_refresh
+    
+    def init(self, upgrade: bool = False) -> str:
+        """Run terraform init, skipping it when providers are unchanged.
+        
+        Pass upgrade=True to run with -upgrade and pick up newer providers.
+        """
+        self._seed_lock_file()
+        self.init_skipped = not upgrade and self.is_initialized()
+        if self.init_skipped:
+            return ""
+        
+        with plugin_cache_lock():
+            output = self._run_terraform(self._init_args(upgrade))
+        self._record_init()
+        return output
+    
+    def is_initialized(self) -> bool:
+        """Check whether the last successful init matches the current providers."""
+        fingerprint_file = self.work_dir / INIT_FINGERPRINT_FILE
+        try:
+            recorded = fingerprint_file.read_text().strip()
+        except OSError:
+            return False
+        return recorded == self._init_fingerprint()
+    
+    def plan(self, out: Optional[str] = PLAN_FILE_NAME, refresh: bool = True) -> str:
+        """Run terraform plan, saving the plan to out unless it is None.
+        
+        With refresh=False the state is trusted as is and no resources are read
+        from the provider.
+        """
+        output = self._run_terraform(self._plan_args(out, refresh))
+        if out:
+            self._record_plan(out)
+        return output
+    
+    def saved_plan(self, max_age: int) -> Optional[Path]:
+        """Return the saved plan if it matches the current files and is recent enough."""
+        plan_file = self.work_dir / PLAN_FILE_NAME
+        meta_file = self.work_dir / PLAN_META_FILE_NAME
+        try:
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if not plan_file.exists():
+            return None
+        if time.time() - meta.get("created_at", 0) > max_age:
+            return None
+        if meta.get("config_hash") != self.config_fingerprint():
+            return None
+        return plan_file
+    
+    def state_age(self) -> Optional[float]:
+        """Seconds since the local state was last written, or None without state."""
+        try:
+            return time.time() - (self.work_dir / STATE_FILE_NAME).stat().st_mtime
+        except OSError:
+            return None
     
-    def init(self) -> str:
-        """Run terraform init."""
-        return self._run_terraform(["init", "-upgrade"])
+    def config_fingerprint(self) -> str:
+        """Hash the rendered configuration a plan is computed from."""
+        paths = set()
+        for pattern in PLAN_INPUT_PATTERNS:
+            for path in self.work_dir.glob(pattern):
+                if path.is_file():
+                    paths.add(path.relative_to(self.work_dir).as_posix())
+        return hash_files(self.work_dir, sorted(paths))
     
-    def plan(self) -> str:
-        """Run terraform plan."""
-        return self._run_terraform(["plan", "-detailed-exitcode"])
+    def show(self, plan_file: Path) -> str:
+        """Render a saved plan as text without refreshing state."""
+        return self._run_terraform(["show", "-no-color", _plan_file_arg(plan_file)])
     
-    def apply(self, auto_approve: bool = False) -> str:
-        """Run terraform apply."""
+    def summarize_plan(self, plan_file: Path) -> PlanSummary:
+        """Summarize a saved plan by streaming `terraform show -json`."""
+        with span("terraform.show"):
+            return self._summarize_plan(plan_file)
+    
+    def _summarize_plan(self, plan_file: Path) -> PlanSummary:
+        """Run `terraform show -json` and summarize its output as it arrives."""
+        cmd = ["terraform", "show", "-json", _plan_file_arg(plan_file)]
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                cwd=self.work_dir,
+                env=self._build_env(),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except FileNotFoundError:
+            raise Exception(
+                "Terraform not found in PATH. Please install Terraform:\n"
+                "https://terraform.io/downloads"
+            )
+        
+        try:
+            summary = summarize_plan_json(proc.stdout)
+            # Drain the rest (prior state, configuration) without keeping it
+            while proc.stdout.read(64 * 1024):
+                pass
+            stderr = proc.stderr.read()
+            proc.wait(timeout=TERRAFORM_TIMEOUT)
+        except Exception as e:
+            proc.kill()
+            proc.wait()
+            raise Exception(f"Failed to read terraform plan: {e}")
+        
+        if proc.returncode != 0:
+            raise Exception(f"Terraform show failed (exit code {proc.returncode}):\n{stderr}")
+        return summary
+    
+    def apply(self, auto_approve: bool = False, plan_file: Optional[Path] = None) -> str:
+        """Run terraform apply, or apply a saved plan without prompting."""
+        if plan_file:
+            output = self._run_terraform(["apply", "-input=false", _plan_file_arg(plan_file)])
+            # A saved plan can only be applied once
+            self._discard_plan()
+            return output
+        
         cmd = ["apply"]
         if auto_approve:
             cmd.append("-auto-approve")
@@ -41,22 +383,46 @@ class TerraformExecutor:
     
     def _run_terraform(self, args: list) -> str:
         """Run terraform command with given arguments."""
+        with span(f"terraform.{args[0]}"):
+            cost = self._api_cost(args)
+            if cost:
+                with span("throttle"):
+                    self.throttled += self.rate_limiter.acquire(cost)
+            try:
+                output = self._run_terraform_command(args)
+            except Exception as e:
+                self._report_api_result(cost, e)
+                raise
+            self._report_api_result(cost)
+            return output
+    
+    def _api_cost(self, args: list) -> int:
+        """Estimate the API requests of a command, or 0 when it is not rate limited."""
+        if self.rate_limiter is None or args[0] not in API_COMMANDS:
+            return 0
+        if args[0] == "plan" and "-refresh=false" in args:
+            return 0
+        return estimate_api_calls(self.work_dir)
+    
+    def _report_api_result(self, cost: int, error: Optional[Exception] = None) -> None:
+        """Tell the rate limiter whether a command that used the API was throttled."""
+        if not cost:
+            return
+        if error is not None and _RATE_LIMITED_RE.search(str(error)):
+            self.rate_limiter.report_rate_limited()
+        elif error is None:
+            self.rate_limiter.report_success()
+    
+    def _run_terraform_command(self, args: list) -> str:
+        """Run terraform and check its result."""
+        args = self._command_args(args)
         cmd = ["terraform"] + args
-        
-        # Set environment variables
-        env = os.environ.copy()
-        
-        # Ensure Cloudflare provider can find credentials
-        if not env.get('CLOUDFLARE_API_TOKEN'):
-            # Try to get from config
-            from .config import load_config
-            config = load_config()
-            if config.cloudflare_api_token:
-                env['CLOUDFLARE_API_TOKEN'] = config.cloudflare_api_token
+        env = self._build_env()
         
         try:
             # For interactive commands (apply/destroy without auto-approve), don't capture input
-            interactive = (args[0] in ["apply", "destroy"] and "-auto-approve" not in args)
+            interactive = (args[0] in ["apply", "destroy"]
+                           and "-auto-approve" not in args and "-input=false" not in args)
             
             if interactive:
                 result = subprocess.run(
@@ -65,32 +431,14 @@ class TerraformExecutor:
                     env=env,
                     capture_output=False,  # Allow interactive input
                     text=True,
-                    timeout=300  # 5 minute timeout
+                    timeout=TERRAFORM_TIMEOUT
                 )
                 return ""  # No output to capture for interactive commands
-            else:
-                result = subprocess.run(
-                    cmd,
-                    cwd=self.work_dir,
-                    env=env,
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5 minute timeout
-                )
-            
-            # For plan command, exit code 2 means changes are present (not an error)
-            if args[0] == "plan" and result.returncode == 2:
-                return result.stdout
-            
-            if result.returncode != 0:
-                error_msg = f"Terraform {args[0]} failed (exit code {result.returncode})"
-                if result.stderr:
-                    error_msg += f":\n{result.stderr}"
-                if result.stdout:
-                    error_msg += f"\nOutput:\n{result.stdout}"
-                raise Exception(error_msg)
             
-            return result.stdout
+            with self._open_log() as log:
+                output = self._new_output(log)
+                returncode = self._stream_process(cmd, env, output)
+            return self._check_result(args, returncode, output.text("stdout"), output.text("stderr"))
             
         except subprocess.TimeoutExpired:
             raise Exception(f"Terraform {args[0]} timed out after 5 minutes")
@@ -101,3 +449,290 @@ class TerraformExecutor:
             )
         except Exception as e:
             raise Exception(f"Failed to run terraform {args[0]}: {e}")
+    
+    def _stream_process(self, cmd: list, env: Dict[str, str], output: CommandOutput) -> int:
+        """Run cmd, feeding its output line by line as it arrives."""
+        proc = subprocess.Popen(
+            cmd,
+            cwd=self.work_dir,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        
+        def pump(stream: IO[str], name: str) -> None:
+            for line in stream:
+                output.feed(name, line)
+        
+        timed_out = threading.Event()
+        
+        def kill() -> None:
+            timed_out.set()
+            proc.kill()
+        
+        stderr_reader = threading.Thread(target=pump, args=(proc.stderr, "stderr"), daemon=True)
+        stderr_reader.start()
+        timer = threading.Timer(TERRAFORM_TIMEOUT, kill)
+        timer.start()
+        try:
+            pump(proc.stdout, "stdout")
+            stderr_reader.join()
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            proc.stderr.close()
+        
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, TERRAFORM_TIMEOUT)
+        return returncode
+    
+    def _new_output(self, log: Optional[IO[str]]) -> CommandOutput:
+        """Create the output collector for one command."""
+        streaming = bool(self.on_output or self.on_event or log)
+        return CommandOutput(self.on_output, log, self.on_event, keep_all=not streaming)
+    
+    def _open_log(self):
+        """Open the log file for appending, or a null context without one."""
+        if not self.log_file:
+            return contextlib.nullcontext()
+        return open(self.log_file, 'a')
+    
+    def _command_args(self, args: list) -> list:
+        """Add -json and tuning flags for the commands that support them."""
+        flags = []
+        if self.on_event and args[0] in JSON_EVENT_COMMANDS and "-json" not in args:
+            flags.append("-json")
+        if args[0] in TUNABLE_COMMANDS:
+            if self.parallelism:
+                flags.append(f"-parallelism={self.parallelism}")
+            if self.lock_timeout:
+                flags.append(f"-lock-timeout={self.lock_timeout}")
+        # Flags go right after the command so a saved plan file stays last
+        return [args[0]] + flags + args[1:]
+    
+    def _build_env(self) -> Dict[str, str]:
+        """Build the environment for terraform subprocesses."""
+        env = os.environ.copy()
+        
+        # Share downloaded providers between run directories
+        env.setdefault('TF_PLUGIN_CACHE_DIR', str(get_plugin_cache_dir()))
+        
+        # Ensure Cloudflare provider can find credentials
+        if not env.get('CLOUDFLARE_API_TOKEN'):
+            # Try to get from config
+            from .config import load_config
+            config = load_config()
+            if config.cloudflare_api_token:
+                env['CLOUDFLARE_API_TOKEN'] = config.cloudflare_api_token
+        
+        return env
+    
+    @staticmethod
+    def _init_args(upgrade: bool) -> list:
+        """Build terraform init arguments."""
+        args = ["init", "-input=false"]
+        if upgrade:
+            args.append("-upgrade")
+        return args
+    
+    @staticmethod
+    def _plan_args(out: Optional[str], refresh: bool = True) -> list:
+        """Build terraform plan arguments."""
+        args = ["plan", "-detailed-exitcode"]
+        if not refresh:
+            args.append("-refresh=false")
+        if out:
+            args.append(f"-out={out}")
+        return args
+    
+    def _record_plan(self, out: str) -> None:
+        """Store what a saved plan was computed from, to detect stale plans."""
+        if out != PLAN_FILE_NAME:
+            return
+        meta = {"config_hash": self.config_fingerprint(), "created_at": time.time()}
+        with open(self.work_dir / PLAN_META_FILE_NAME, 'w') as f:
+            json.dump(meta, f)
+    
+    def _discard_plan(self) -> None:
+        """Remove the saved plan and its metadata."""
+        for name in (PLAN_FILE_NAME, PLAN_META_FILE_NAME):
+            try:
+                (self.work_dir / name).unlink()
+            except OSError:
+                pass
+    
+    def _init_fingerprint(self) -> str:
+        """Hash the files that affect provider installation."""
+        return hash_files(self.work_dir, INIT_INPUTS)
+    
+    def _record_init(self) -> None:
+        """Remember a successful init and share its lock file."""
+        self._publish_lock_file()
+        fingerprint_file = self.work_dir / INIT_FINGERPRINT_FILE
+        fingerprint_file.parent.mkdir(exist_ok=True)
+        fingerprint_file.write_text(self._init_fingerprint() + "\n")
+    
+    def _seed_lock_file(self) -> None:
+        """Copy the shared lock file into a run directory that has none."""
+        shared_lock = get_shared_lock_file()
+        local_lock = self.work_dir / LOCK_FILE_NAME
+        if shared_lock.exists() and not local_lock.exists():
+            shutil.copyfile(shared_lock, local_lock)
+    
+    def _publish_lock_file(self) -> None:
+        """Share the lock file of a successful init with future runs."""
+        shared_lock = get_shared_lock_file()
+        local_lock = self.work_dir / LOCK_FILE_NAME
+        if not local_lock.exists():
+            return
+        if shared_lock.exists() and filecmp.cmp(local_lock, shared_lock, shallow=False):
+            return
+        
+        # Replace atomically so concurrent runs never read a partial file
+        fd, tmp_lock = tempfile.mkstemp(dir=shared_lock.parent, prefix=f"{shared_lock.name}.")
+        os.close(fd)
+        shutil.copyfile(local_lock, tmp_lock)
+        os.replace(tmp_lock, shared_lock)
+    
+    @staticmethod
+    def _check_result(args: list, returncode: int, stdout: str, stderr: str) -> str:
+        """Return command output, raising if terraform failed."""
+        # For plan command, exit code 2 means changes are present (not an error)
+        if args[0] == "plan" and returncode == 2:
+            return stdout
+        
+        if returncode != 0:
+            error_msg = f"Terraform {args[0]} failed (exit code {returncode})"
+            if stderr:
+                error_msg += f":\n{stderr}"
+            if stdout:
+                error_msg += f"\nOutput:\n{stdout}"
+            raise Exception(error_msg)
+        
+        return stdout
+
+
+class AsyncTerraformExecutor(TerraformExecutor):
+    """Terraform wrapper driving commands with asyncio subprocesses.
+    
+    Commands never prompt, so apply and destroy require auto_approve.
+    """
+    
+    async def init(self, upgrade: bool = False) -> str:
+        """Run terraform init, skipping it when providers are unchanged."""
+        self._seed_lock_file()
+        self.init_skipped = not upgrade and self.is_initialized()
+        if self.init_skipped:
+            return ""
+        
+        # Waiting for the lock would block the event loop, so take it in a thread
+        lock = plugin_cache_lock()
+        await _enter_in_thread(lock)
+        try:
+            output = await self._run_terraform(self._init_args(upgrade))
+        finally:
+            lock.__exit__(None, None, None)
+        self._record_init()
+        return output
+    
+    async def plan(self, out: Optional[str] = PLAN_FILE_NAME, refresh: bool = True) -> str:
+        """Run terraform plan, saving the plan to out unless it is None."""
+        output = await self._run_terraform(self._plan_args(out, refresh))
+        if out:
+            self._record_plan(out)
+        return output
+    
+    async def show(self, plan_file: Path) -> str:
+        """Render a saved plan as text without refreshing state."""
+        return await self._run_terraform(["show", "-no-color", _plan_file_arg(plan_file)])
+    
+    async def apply(self, auto_approve: bool = False, plan_file: Optional[Path] = None) -> str:
+        """Run terraform apply, or apply a saved plan."""
+        if plan_file:
+            output = await self._run_terraform(["apply", "-input=false", _plan_file_arg(plan_file)])
+            self._discard_plan()
+            return output
+        
+        if not auto_approve:
+            raise ValueError("AsyncTerraformExecutor.apply requires auto_approve=True or a plan_file")
+        return await self._run_terraform(["apply", "-auto-approve"])
+    
+    async def destroy(self, auto_approve: bool = False) -> str:
+        """Run terraform destroy."""
+        if not auto_approve:
+            raise ValueError("AsyncTerraformExecutor.destroy requires auto_approve=True")
+        return await self._run_terraform(["destroy", "-auto-approve"])
+    
+    async def _run_terraform(self, args: list) -> str:
+        """Run terraform command with given arguments."""
+        with span(f"terraform.{args[0]}"):
+            cost = self._api_cost(args)
+            if cost:
+                with span("throttle"):
+                    self.throttled += await asyncio.to_thread(self.rate_limiter.acquire, cost)
+            try:
+                output = await self._run_terraform_command(args)
+            except Exception as e:
+                await asyncio.to_thread(self._report_api_result, cost, e)
+                raise
+            await asyncio.to_thread(self._report_api_result, cost)
+            return output
+    
+    async def _run_terraform_command(self, args: list) -> str:
+        """Run terraform and check its result."""
+        args = self._command_args(args)
+        cmd = ["terraform"] + args
+        env = self._build_env()
+        
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=self.work_dir,
+                env=env,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            raise Exception(
+                "Terraform not found in PATH. Please install Terraform:\n"
+                "https://terraform.io/downloads"
+            )
+        
+        async def pump(stream: asyncio.StreamReader, name: str) -> None:
+            while True:
+                line = await stream.readline()
+                if not line:
+                    return
+                output.feed(name, line.decode())
+        
+        with self._open_log() as log:
+            output = self._new_output(log)
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"), proc.wait()),
+                    timeout=TERRAFORM_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                await self._kill(proc)
+                raise Exception(f"Terraform {args[0]} timed out after 5 minutes")
+            except asyncio.CancelledError:
+                # An orphaned terraform would keep running and holding the state lock
+                await self._kill(proc)
+                raise
+        
+        return self._check_result(args, proc.returncode, output.text("stdout"), output.text("stderr"))
+    
+    @staticmethod
+    async def _kill(proc: asyncio.subprocess.Process) -> None:
+        """Kill terraform and wait for it to exit."""
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+        await proc.wait()
@@ -21,6 +21,18 @@ def get_data_dir() -> Path:
     return data_dir
 
 
+def get_plugin_cache_dir() -> Path:
+    """Get the Terraform provider plugin cache shared by all runs."""
+    cache_dir = get_data_dir() / "plugin-cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_shared_lock_file() -> Path:
+    """Get the dependency lock file shared by all runs."""
+    return get_data_dir() / ".terraform.lock.hcl"
+
+
 def check_binary_exists(binary: str) -> bool:
     """Check if a binary exists in PATH."""
     try:
@@ -0,0 +1,285 @@
+"""BIND zone file import for TerraSmart."""
+
+import re
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import Config
+from .dsl import dns_record_conflict, dns_record_identity, dns_record_settings, validate_many
+from .render import render_dns_records
+
+
+# Record types the DSL can express; others (SOA, SRV, CAA, ...) are skipped
+SUPPORTED_TYPES = {"A", "AAAA", "CNAME", "TXT", "MX", "NS"}
+
+CLASSES = {"IN", "CH", "HS", "CS"}
+
+DEFAULT_TTL = 300
+
+# Records validated per validate_many() call
+VALIDATION_CHUNK = 500
+
+# Validation errors kept for reporting; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+_TTL_RE = re.compile(r'^(\d+[smhdw]?)+$', re.IGNORECASE)
+_TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+class ZoneFileError(ValueError):
+    """Malformed zone file entry."""
+    
+    def __init__(self, message: str, line: int):
+        """Initialize with the line number of the entry."""
+        super().__init__(f"line {line}: {message}")
+        self.reason = message
+        self.line = line
+
+
+@dataclass
+class ZoneRecord:
+    """One resource record of a zone file."""
+    name: str
+    ttl: int
+    type: str
+    rdata: List[str]
+    origin: str
+    line: int
+
+
+@dataclass
+class ZoneImport:
+    """Outcome of importing a zone file."""
+    work_dir: Optional[Path] = None
+    imported: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)
+    
+    def add_invalid(self, line: int, messages: List[str]) -> None:
+        """Count an invalid record and keep its errors if there is room."""
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {'; '.join(messages)}")
+
+
+def parse_ttl(token: str) -> Optional[int]:
+    """Parse a TTL in seconds or BIND units (1h30m); None if token is not a TTL."""
+    if not _TTL_RE.match(token):
+        return None
+    if token.isdigit():
+        return int(token)
+    return sum(int(n) * _TTL_UNITS[unit.lower() or "s"]
+               for n, unit in re.findall(r'(\d+)([smhdw]?)', token, re.IGNORECASE))
+
+
+def iter_records(lines: Iterable[str], origin: str, default_ttl: int = DEFAULT_TTL) -> Iterator[ZoneRecord]:
+    """Parse resource records from zone file lines, one entry at a time.
+    
+    Handles $ORIGIN and $TTL, comments, multi-line parenthesized entries,
+    quoted strings and owners inherited from the previous entry.
+    """
+    origin = _absolute(origin, "")
+    owner = None
+    for line, starts_blank, tokens in _iter_entries(lines):
+        values = [value for value, _ in tokens]
+        keyword = values[0].upper()
+        if keyword == "$ORIGIN":
+            origin = _absolute(_argument(values, line), origin)
+            continue
+        if keyword == "$TTL":
+            default_ttl = _require_ttl(_argument(values, line), line)
+            continue
+        if keyword.startswith("$"):
+            raise ZoneFileError(f"unsupported directive {values[0]}", line)
+        
+        if not starts_blank:
+            owner = _absolute(values[0], origin)
+            tokens = tokens[1:]
+        elif owner is None:
+            raise ZoneFileError("record without an owner name", line)
+        
+        # TTL and class may come in either order and are both optional
+        ttl = None
+        while tokens and not tokens[0][1]:
+            value = tokens[0][0]
+            if value.upper() in CLASSES:
+                tokens = tokens[1:]
+            elif ttl is None and parse_ttl(value) is not None:
+                ttl = parse_ttl(value)
+                tokens = tokens[1:]
+            else:
+                break
+        if not tokens:
+            raise ZoneFileError("missing record type", line)
+        
+        record_type = tokens[0][0].upper()
+        rdata = [value for value, _ in tokens[1:]]
+        yield ZoneRecord(name=owner, ttl=ttl if ttl is not None else default_ttl, type=record_type,
+                         rdata=rdata, origin=origin, line=line)
+
+
+def to_resource(record: ZoneRecord, zone_name: str) -> Optional[Dict[str, Any]]:
+    """Convert a zone record to a create_dns_record resource, or None if unsupported."""
+    if record.type not in SUPPORTED_TYPES:
+        return None
+    # Cloudflare manages the zone's own nameservers
+    if record.type == "NS" and record.name == zone_name:
+        return None
+    if record.name != zone_name and not record.name.endswith(f".{zone_name}"):
+        raise ZoneFileError(f"{record.name} is outside zone {zone_name}", record.line)
+    
+    dns_record: Dict[str, Any] = {"type": record.type, "ttl": record.ttl, "proxied": False}
+    try:
+        if record.type == "TXT":
+            dns_record["content"] = "".join(record.rdata)
+        elif record.type == "MX":
+            dns_record["priority"] = int(record.rdata[0])
+            dns_record["content"] = _absolute(record.rdata[1], record.origin)
+        elif record.type in ("CNAME", "NS"):
+            dns_record["content"] = _absolute(record.rdata[0], record.origin)
+        else:
+            dns_record["content"] = record.rdata[0]
+    except (IndexError, ValueError):
+        raise ZoneFileError(f"malformed {record.type} record", record.line)
+    return {"intent": "create_dns_record", "hostname": record.name, "dns_record": dns_record}
+
+
+def import_zone(lines: Iterable[str], zone_name: str, config: Config, output_dir: Optional[str] = None,
+                prompt: Optional[str] = None) -> ZoneImport:
+    """Import a zone file into one rendered configuration.
+    
+    Records are parsed, validated in chunks and streamed into the run
+    directory's tfvars, so memory stays bounded for zones of any size.
+    Unsupported types are skipped and invalid records reported, not fatal.
+    """
+    zone_name = _absolute(zone_name, "")
+    result = ZoneImport()
+    
+    def numbered_resources() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for record in iter_records(lines, zone_name):
+            try:
+                resource = to_resource(record, zone_name)
+            except ZoneFileError as e:
+                result.add_invalid(e.line, [e.reason])
+                continue
+            if resource is None:
+                result.skipped += 1
+            else:
+                yield record.line, resource
+    
+    # Line and settings of the first record per name, type and content
+    first_seen: Dict[Tuple[str, str, Any], Tuple[int, Tuple[Any, ...]]] = {}
+    
+    def valid_resources() -> Iterator[Dict[str, Any]]:
+        numbered = numbered_resources()
+        while True:
+            chunk = list(islice(numbered, VALIDATION_CHUNK))
+            if not chunk:
+                return
+            documents = [{**resource, "zone_name": zone_name} for _, resource in chunk]
+            for (line, resource), messages in zip(chunk, validate_many(documents)):
+                if messages:
+                    result.add_invalid(line, messages)
+                    continue
+                identity = dns_record_identity(resource["hostname"], resource["dns_record"])
+                if identity in first_seen:
+                    first_line, settings = first_seen[identity]
+                    conflict = dns_record_conflict(resource["hostname"], resource["dns_record"], settings)
+                    if conflict:
+                        result.add_invalid(line, [f"{conflict} (see line {first_line})"])
+                        continue
+                else:
+                    first_seen[identity] = (line, dns_record_settings(resource["dns_record"]))
+                yield resource
+    
+    result.work_dir, result.imported = render_dns_records(zone_name, valid_resources(), config,
+                                                          output_dir, prompt=prompt)
+    return result
+
+
+def _iter_entries(lines: Iterable[str]) -> Iterator[Tuple[int, bool, List[Tuple[str, bool]]]]:
+    """Yield (line number, starts with blank, tokens) per logical zone file entry.
+    
+    Tokens are (value, quoted) pairs; parenthesized entries span lines.
+    """
+    tokens: List[Tuple[str, bool]] = []
+    depth = 0
+    start_line = 0
+    starts_blank = False
+    for number, text in enumerate(lines, start=1):
+        if depth == 0:
+            start_line = number
+            starts_blank = text[:1] in (" ", "\t")
+        depth = _tokenize(text, tokens, depth, number)
+        if depth == 0 and tokens:
+            yield start_line, starts_blank, tokens
+            tokens = []
+    if depth:
+        raise ZoneFileError("unbalanced parentheses", start_line)
+
+
+def _tokenize(text: str, tokens: List[Tuple[str, bool]], depth: int, line: int) -> int:
+    """Append the tokens of one physical line and return the parenthesis depth."""
+    i = 0
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if char == ";":
+            break
+        if char.isspace():
+            i += 1
+        elif char == "(":
+            depth += 1
+            i += 1
+        elif char == ")":
+            if depth == 0:
+                raise ZoneFileError("unbalanced parentheses", line)
+            depth -= 1
+            i += 1
+        elif char == '"':
+            value = []
+            i += 1
+            while i < length and text[i] != '"':
+                if text[i] == "\\" and i + 1 < length:
+                    i += 1
+                value.append(text[i])
+                i += 1
+            if i >= length:
+                raise ZoneFileError("unterminated quoted string", line)
+            tokens.append(("".join(value), True))
+            i += 1
+        else:
+            start = i
+            while i < length and not text[i].isspace() and text[i] not in ';()"':
+                i += 1
+            tokens.append((text[start:i], False))
+    return depth
+
+
+def _argument(values: List[str], line: int) -> str:
+    """Get the argument of a directive."""
+    if len(values) < 2:
+        raise ZoneFileError(f"{values[0]} needs an argument", line)
+    return values[1]
+
+
+def _require_ttl(token: str, line: int) -> int:
+    """Parse a TTL that must be valid."""
+    ttl = parse_ttl(token)
+    if ttl is None:
+        raise ZoneFileError(f"invalid TTL {token}", line)
+    return ttl
+
+
+def _absolute(name: str, origin: str) -> str:
+    """Resolve a possibly relative name against origin, without the trailing dot."""
+    if name == "@":
+        return origin
+    if name.endswith("."):
+        return name[:-1].lower()
+    if not origin:
+        return name.lower()
+    return f"{name}.{origin}".lower()
@@ -0,0 +1,86 @@
+"""Tests for batch prompt processing."""
+
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+from terrasmartrun import batch
+from terrasmartrun.batch import load_prompts, run_batch
+from terrasmartrun.cli import main
+from terrasmartrun.config import Config
+from terrasmartrun.plan_analysis import EXIT_CHANGES
+
+from .test_tfexec import fake_terraform  # noqa: F401
+
+
+def test_load_prompts_mixed_formats():
+    """Test plain lines and JSONL entries can be mixed."""
+    stream = io.StringIO(
+        "# DNS changes\n"
+        "Add a DNS record for blog.example.com\n"
+        "\n"
+        '{"prompt": "Create a Worker for api.example.com"}\n'
+        '"Add KV storage for cache.example.com"\n'
+        '"Blog" CNAME to example.com\n'
+    )
+    
+    assert load_prompts(stream) == [
+        "Add a DNS record for blog.example.com",
+        "Create a Worker for api.example.com",
+        "Add KV storage for cache.example.com",
+        '"Blog" CNAME to example.com',
+    ]
+
+
+def test_load_prompts_rejects_objects_without_prompt():
+    """Test JSONL objects must carry a prompt."""
+    with pytest.raises(ValueError):
+        load_prompts(io.StringIO('{"text": "missing"}\n'))
+
+
+DSL = {
+    "intent": "create_dns_record",
+    "zone_name": "example.com",
+    "hostname": "blog.example.com",
+    "dns_record": {"type": "CNAME", "content": "example.com"},
+}
+
+
+def fake_to_dsl(prompt, config, use_cache=True):
+    if "fail" in prompt:
+        raise ValueError("cannot translate")
+    return dict(DSL)
+
+
+def test_run_batch_plans_each_prompt(fake_terraform, tmp_path, monkeypatch):
+    """Test every prompt gets its own planned run directory and failures stay per prompt."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(batch, "to_dsl", fake_to_dsl)
+    config = Config(account_id="test-account")
+    
+    results = run_batch(["blog", "fail", "blog again"], config, jobs=2, output_dir=str(tmp_path / "out"),
+                        parallelism=5, refresh=False)
+    
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[1].stage == "translate"
+    assert results[0].work_dir == tmp_path / "out" / "001"
+    plan_output = (results[0].work_dir / "plan.txt").read_text()
+    assert "-parallelism=5" in plan_output and "-refresh=false" in plan_output
+    assert results[0].exit_code == EXIT_CHANGES
+    assert results[0].to_dict()["summary"]["totals"]["create"] == 1
+
+
+def test_batch_summary_json_and_exit_code(fake_terraform, tmp_path, monkeypatch):
+    """Test --summary-json and --detailed-exitcode work with --batch."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(batch, "to_dsl", fake_to_dsl)
+    Config(openai_api_key="key", account_id="test-account").save()
+    (tmp_path / "prompts.txt").write_text("blog\nblog again\n")
+    
+    result = CliRunner().invoke(main, ["plan", "--batch", "prompts.txt", "--summary-json", "summary.json",
+                                       "--detailed-exitcode"])
+    
+    assert result.exit_code == EXIT_CHANGES, result.output
+    entries = json.loads((tmp_path / "summary.json").read_text())
+    assert [entry["exit_code"] for entry in entries] == [EXIT_CHANGES, EXIT_CHANGES]
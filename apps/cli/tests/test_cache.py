@@ -0,0 +1,112 @@
+"""Tests for the disk-backed caches."""
+
+import os
+import time
+
+from terrasmartrun import llm
+from terrasmartrun.cache import DiskCache, make_key, normalize_prompt
+from terrasmartrun.config import Config
+
+
+def test_disk_cache_roundtrip(tmp_path):
+    """Test values survive a set/get roundtrip."""
+    cache = DiskCache(tmp_path, ttl=60, max_entries=10)
+    cache.set("abc", {"intent": "create_dns_record"})
+    
+    assert cache.get("abc") == {"intent": "create_dns_record"}
+    assert cache.get("missing") is None
+
+
+def test_disk_cache_ttl_expiry(tmp_path):
+    """Test expired entries are dropped."""
+    cache = DiskCache(tmp_path, ttl=1, max_entries=10)
+    cache.set("abc", 1)
+    
+    # Backdate the entry past the TTL
+    entry = tmp_path / "abc.json"
+    entry.write_text('{"created_at": %f, "value": 1}' % (time.time() - 10))
+    
+    assert cache.get("abc") is None
+    assert not entry.exists()
+
+
+def test_disk_cache_lru_eviction(tmp_path):
+    """Test least recently used entries are evicted first."""
+    cache = DiskCache(tmp_path, ttl=0, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    
+    # Make "a" the most recently used entry
+    past = time.time() - 100
+    os.utime(tmp_path / "b.json", (past, past))
+    os.utime(tmp_path / "a.json", (past - 50, past - 50))
+    cache.get("a")
+    
+    cache.set("c", 3)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_make_key_normalizes_prompt():
+    """Test whitespace-only prompt changes produce the same key."""
+    assert normalize_prompt("  create  a\nworker ") == "create a worker"
+    assert make_key(normalize_prompt("a  b"), "m") == make_key(normalize_prompt("a b"), "m")
+    assert make_key("a", "m1") != make_key("a", "m2")
+
+
+def test_to_dsl_uses_cache(tmp_path, monkeypatch):
+    """Test to_dsl skips the OpenAI call on a cache hit."""
+    monkeypatch.setattr(llm, "get_dsl_cache", lambda config: DiskCache(tmp_path, 60, 10))
+    
+    calls = []
+    
+    def fake_call(prompt_text, config):
+        calls.append(prompt_text)
+        return {"intent": "create_dns_record", "zone_name": "example.com", "hostname": "www.example.com"}
+    
+    monkeypatch.setattr(llm, "_call_openai", fake_call)
+    config = Config()
+    
+    first = llm.to_dsl("Add a DNS record for www.example.com", config)
+    second = llm.to_dsl("Add a DNS  record for www.example.com", config)
+    llm.to_dsl("Add a DNS record for www.example.com", config, use_cache=False)
+    
+    assert first == second
+    assert len(calls) == 2
+
+
+def test_to_dsl_does_not_cache_invalid_answers(tmp_path, monkeypatch):
+    """Test an answer that fails validation is asked for again instead of replayed."""
+    cache = DiskCache(tmp_path, 60, 10)
+    monkeypatch.setattr(llm, "get_dsl_cache", lambda config: cache)
+    
+    answers = [
+        {"intent": "create_everything", "zone_name": "example.com", "hostname": "www.example.com"},
+        {"intent": "create_dns_record", "zone_name": "example.com", "hostname": "www.example.com"},
+    ]
+    monkeypatch.setattr(llm, "_call_openai", lambda prompt_text, config: answers.pop(0))
+    config = Config()
+    prompt = "Add a DNS record for www.example.com"
+    
+    assert llm.to_dsl(prompt, config)["intent"] == "create_everything"
+    assert cache.get(llm._cache_key(prompt, config)) is None
+    assert llm.to_dsl(prompt, config)["intent"] == "create_dns_record"
+    assert llm.to_dsl(prompt, config)["intent"] == "create_dns_record"
+    assert not answers
+
+
+def test_to_dsl_skips_invalid_cache_entries(tmp_path, monkeypatch):
+    """Test an invalid entry already in the cache is not replayed."""
+    cache = DiskCache(tmp_path, 60, 10)
+    monkeypatch.setattr(llm, "get_dsl_cache", lambda config: cache)
+    config = Config()
+    prompt = "Add a DNS record for www.example.com"
+    cache.set(llm._cache_key(prompt, config), {"intent": "create_everything"})
+    
+    answer = {"intent": "create_dns_record", "zone_name": "example.com", "hostname": "www.example.com"}
+    monkeypatch.setattr(llm, "_call_openai", lambda prompt_text, config: answer)
+    
+    assert llm.to_dsl(prompt, config)["intent"] == "create_dns_record"
+    assert cache.get(llm._cache_key(prompt, config)) == answer
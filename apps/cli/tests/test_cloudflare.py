@@ -0,0 +1,112 @@
+"""Tests for the Cloudflare API client and zone ID cache."""
+
+import pytest
+
+from terrasmartrun import cloudflare, ratelimit
+from terrasmartrun.cloudflare import CloudflareAPIError, CloudflareClient, resolve_zone_id
+from terrasmartrun.config import Config
+
+
+class FakeResponse:
+    """Canned HTTP response."""
+    
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = "Error"
+        self.headers = {}
+    
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Session recording requests and answering with a fixed response."""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+    
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+@pytest.fixture(autouse=True)
+def fresh_environment(tmp_path, monkeypatch):
+    """Keep the zone cache and token out of the real home directory."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.delenv("CLOUDFLARE_API_TOKEN", raising=False)
+
+
+def zone_session(zone_id="zone123"):
+    return FakeSession(FakeResponse({"success": True, "result": [{"id": zone_id}]}))
+
+
+def test_client_returns_result():
+    """Test successful responses return their result."""
+    session = zone_session()
+    client = CloudflareClient("token", session=session)
+    
+    assert client.get_zone_id("example.com") == "zone123"
+    method, url, kwargs = session.calls[0]
+    assert url.endswith("/zones")
+    assert kwargs["params"] == {"name": "example.com"}
+    assert kwargs["headers"]["Authorization"] == "Bearer token"
+
+
+def test_client_raises_api_errors():
+    """Test error responses carry the API message and status."""
+    body = {"success": False, "errors": [{"message": "Invalid token"}]}
+    client = CloudflareClient("token", session=FakeSession(FakeResponse(body, 403)))
+    
+    with pytest.raises(CloudflareAPIError, match="Invalid token") as excinfo:
+        client.request("GET", "/zones")
+    assert excinfo.value.status_code == 403
+
+
+def test_resolve_zone_id_caches(monkeypatch):
+    """Test the zone ID is looked up once and then served from the cache."""
+    session = zone_session()
+    monkeypatch.setattr(cloudflare, "get_session", lambda: session)
+    config = Config(cloudflare_api_token="token")
+    
+    assert resolve_zone_id("example.com", config) == "zone123"
+    assert resolve_zone_id("example.com", config) == "zone123"
+    assert len(session.calls) == 1
+    
+    # Another token may see a different zone
+    assert resolve_zone_id("example.com", Config(cloudflare_api_token="other")) == "zone123"
+    assert len(session.calls) == 2
+
+
+def test_resolve_zone_id_without_token(monkeypatch):
+    """Test resolution is skipped without an API token."""
+    monkeypatch.setattr(cloudflare, "get_session", lambda: pytest.fail("no request expected"))
+    
+    assert resolve_zone_id("example.com", Config()) is None
+
+
+def test_resolve_zone_id_falls_back_on_errors(monkeypatch):
+    """Test API failures leave the lookup to Terraform."""
+    session = FakeSession(FakeResponse({"success": True, "result": []}))
+    monkeypatch.setattr(cloudflare, "get_session", lambda: session)
+    
+    assert resolve_zone_id("missing.com", Config(cloudflare_api_token="token")) is None
+
+
+def test_rate_limited_requests_back_off_and_retry(tmp_path, monkeypatch):
+    """Test a 429 pauses the shared bucket and the request is retried."""
+    now = [0.0]
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda seconds: now.__setitem__(0, now[0] + seconds))
+    limiter = ratelimit.SharedTokenBucket(tmp_path / "ratelimit.json", rate=10, capacity=10, clock=lambda: now[0])
+    session = FakeSession(FakeResponse({"success": False, "errors": []}, 429),
+                          FakeResponse({"success": True, "result": [{"id": "zone123"}]}))
+    client = CloudflareClient("token", session=session, rate_limiter=limiter)
+    
+    assert client.get_zone_id("example.com") == "zone123"
+    assert len(session.calls) == 2
+    stats = limiter.stats()
+    assert stats.rate_limited == 1
+    assert stats.throttled_seconds == ratelimit.BACKOFF_BASE
@@ -0,0 +1,110 @@
+"""Tests for the TerraSmart daemon."""
+
+import io
+import json
+import os
+import socket
+import threading
+
+import pytest
+from terrasmartrun import daemon, render
+from terrasmartrun.daemon import DaemonServer, forward, get_socket_path, should_forward
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Run a daemon in a background thread."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("CLOUDFLARE_ACCOUNT_ID", "test-account")
+    monkeypatch.delenv(daemon.NO_DAEMON_ENV, raising=False)
+    monkeypatch.setattr(render, "_environment", None)
+    server = DaemonServer(get_socket_path())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_should_forward(server, monkeypatch):
+    """Test which command lines go to the daemon."""
+    assert should_forward(["plan", "Add a CNAME"])
+    assert should_forward(["apply", "--approve"])
+    assert not should_forward(["apply"])
+    assert not should_forward(["doctor"])
+    assert not should_forward(["plan", "--help"])
+    assert not should_forward(["plan", "--batch", "-"])
+    assert not should_forward(["plan", "--batch=-"])
+    assert should_forward(["plan", "--batch", "prompts.txt"])
+    
+    monkeypatch.setenv(daemon.NO_DAEMON_ENV, "1")
+    assert not should_forward(["plan", "Add a CNAME"])
+
+
+def test_forward_runs_command_in_client_cwd(server, tmp_path, monkeypatch):
+    """Test a forwarded dryrun renders into the client's directory and streams output."""
+    project = tmp_path / "project"
+    project.mkdir()
+    dsl_file = project / "dsl.json"
+    dsl_file.write_text(json.dumps({
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com"}
+    }))
+    stdout, stderr = io.StringIO(), io.StringIO()
+    
+    monkeypatch.chdir(project)
+    code = forward(["dryrun", "--dsl", "dsl.json", "--dir", "out"], stdout, stderr)
+    
+    assert code == 0, stderr.getvalue()
+    assert "Dry run completed" in stdout.getvalue()
+    assert (project / "out" / "main.tf").exists()
+
+
+def test_forward_reports_failures(server):
+    """Test exit codes of failing commands reach the client."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    
+    assert forward(["dryrun"], stdout, stderr) == 1
+    assert "Missing PROMPT" in stderr.getvalue()
+
+
+def test_forward_without_daemon(tmp_path, monkeypatch):
+    """Test the client falls back when nothing listens on the socket."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    
+    assert forward(["plan", "x"]) is None
+
+
+def test_command_runs_with_client_environment(server, tmp_path, monkeypatch):
+    """Test commands see the client's environment, not the daemon's."""
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "dsl.json").write_text(json.dumps({
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com"}
+    }))
+    env = dict(os.environ, CLOUDFLARE_ACCOUNT_ID="client-account")
+    stdout, stderr = io.StringIO(), io.StringIO()
+    
+    code = server.run_command(["dryrun", "--dsl", "dsl.json", "--dir", "out"], str(project), env, stdout, stderr)
+    
+    assert code == 0, stderr.getvalue()
+    tfvars = "".join(path.read_text() for path in (project / "out").glob("*.tfvars*"))
+    assert "client-account" in tfvars
+    assert os.environ["CLOUDFLARE_ACCOUNT_ID"] == "test-account"
+
+
+def test_request_without_environment_is_rejected(server):
+    """Test the daemon refuses requests that do not carry the client's environment."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(get_socket_path()))
+        sock.sendall((json.dumps({"argv": ["plan", "x"], "cwd": "/"}) + "\n").encode('utf-8'))
+        with sock.makefile('r', encoding='utf-8') as responses:
+            messages = [json.loads(line) for line in responses]
+    
+    assert messages[-1] == {"exit": 2}
+    assert "Invalid request" in messages[0]["stderr"]
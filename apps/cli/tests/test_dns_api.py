@@ -0,0 +1,125 @@
+"""Tests for the direct Cloudflare API engine."""
+
+import pytest
+from click.testing import CliRunner
+
+from terrasmartrun import cloudflare
+from terrasmartrun.cli import main
+from terrasmartrun.config import Config
+from terrasmartrun.dns_api import (
+    IMPORT_FILE_NAME,
+    DnsApiPlan,
+    apply_dns_plan,
+    plan_dns_change,
+    supports_api_engine,
+)
+
+
+class FakeClient:
+    """In-memory stand-in for CloudflareClient's DNS record calls."""
+    
+    def __init__(self, records=()):
+        self.records = [dict(r) for r in records]
+        self.calls = []
+    
+    def list_dns_records(self, zone_id, name, record_type, content=None):
+        return [r for r in self.records
+                if r["name"] == name and r["type"] == record_type and content in (None, r["content"])]
+    
+    def create_dns_record(self, zone_id, record):
+        self.calls.append(("create", record))
+        created = {**record, "id": f"rec{len(self.records) + 1}"}
+        self.records.append(created)
+        return created
+    
+    def update_dns_record(self, zone_id, record_id, record):
+        self.calls.append(("update", record_id, record))
+    
+    def delete_dns_record(self, zone_id, record_id):
+        self.calls.append(("delete", record_id))
+
+
+def create_dsl(**dns_record):
+    return {
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "api.example.com",
+        "dns_record": {"type": "A", "content": "192.0.2.1", **dns_record},
+    }
+
+
+EXISTING = {"id": "rec1", "name": "api.example.com", "type": "A", "content": "192.0.2.1",
+            "ttl": 300, "proxied": False}
+
+
+def test_supports_only_single_dns_intents():
+    """Test the engine is limited to single DNS record documents."""
+    assert supports_api_engine(create_dsl())
+    assert not supports_api_engine({"intent": "create_kv_namespace"})
+    assert not supports_api_engine({"version": 2, "resources": []})
+
+
+def test_create_plans_and_applies(tmp_path):
+    """Test a missing record is created and adopted with an import block."""
+    client = FakeClient()
+    plan = plan_dns_change(create_dsl(), client, "zone1", import_block=True)
+    assert plan.summary().to_dict()["totals"]["create"] == 1
+    
+    applied = apply_dns_plan(plan, client, tmp_path)
+    
+    assert client.calls[0][0] == "create"
+    assert applied[0].record_id == "rec1"
+    assert 'id = "zone1/rec1"' in (tmp_path / IMPORT_FILE_NAME).read_text()
+
+
+def test_create_existing_record_is_no_op():
+    """Test an identical record needs no change and a different TTL is updated."""
+    client = FakeClient([EXISTING])
+    
+    assert not plan_dns_change(create_dsl(), client, "zone1").summary().has_changes
+    change = plan_dns_change(create_dsl(ttl=60), client, "zone1").changes[0]
+    assert (change.action, change.record_id) == ("update", "rec1")
+
+
+def test_delete_finds_record_by_name_and_type(tmp_path):
+    """Test deletes look the record up and refuse ambiguous matches."""
+    dsl = {"intent": "delete_dns_record", "zone_name": "example.com", "hostname": "api.example.com",
+           "dns_record": {"type": "A"}}
+    client = FakeClient([EXISTING])
+    
+    plan = plan_dns_change(dsl, client, "zone1")
+    assert plan.summary().has_destructive
+    apply_dns_plan(plan, client, tmp_path)
+    assert client.calls == [("delete", "rec1")]
+    
+    client = FakeClient([EXISTING, {**EXISTING, "id": "rec2", "content": "192.0.2.2"}])
+    with pytest.raises(ValueError, match="specify the record content"):
+        plan_dns_change(dsl, client, "zone1")
+
+
+def test_plan_roundtrip(tmp_path):
+    """Test saved plans load back unchanged."""
+    plan = plan_dns_change(create_dsl(), FakeClient(), "zone1", import_block=True)
+    plan.save(tmp_path)
+    
+    assert DnsApiPlan.load(tmp_path) == plan
+    assert DnsApiPlan.load(tmp_path / "missing") is None
+
+
+def test_apply_twice_does_not_replay_plan(tmp_path, monkeypatch):
+    """Test a second apply plans again instead of repeating the create."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.chdir(tmp_path)
+    Config(openai_api_key="key").save()
+    client = FakeClient()
+    monkeypatch.setattr(cloudflare, "get_cloudflare_client", lambda config: client)
+    plan_dns_change(create_dsl(), client, "zone1").save(tmp_path)
+    
+    first = CliRunner().invoke(main, ["apply", "--dir", str(tmp_path), "--approve"])
+    assert first.exit_code == 0, first.output
+    assert DnsApiPlan.load(tmp_path).applied
+    
+    second = CliRunner().invoke(main, ["apply", "--dir", str(tmp_path), "--approve"])
+    assert second.exit_code == 0, second.output
+    assert "No changes to apply" in second.output
+    assert [call[0] for call in client.calls] == ["create"]
@@ -1,7 +1,7 @@
 """Tests for DSL validation and parsing."""
 
 import pytest
-from terrasmartrun.dsl import validate_dsl
+from terrasmartrun.dsl import get_validator, validate_dsl, validate_many
 from terrasmartrun.llm import _fallback_parser
 from terrasmartrun.config import Config
 
@@ -95,3 +95,98 @@ def test_fallback_parser_kv():
     assert result["intent"] == "create_kv_namespace"
     assert result["zone_name"] == "example.com"
     assert result["hostname"] == "cache.example.com"
+
+
+def _multi_resource_dsl():
+    """Build a valid multi-resource (version 2) document."""
+    return {
+        "version": 2,
+        "zone_name": "example.com",
+        "resources": [
+            {
+                "intent": "create_dns_record",
+                "hostname": "www.example.com",
+                "dns_record": {"type": "CNAME", "content": "example.com"}
+            },
+            {
+                "intent": "create_worker_and_bind_domain",
+                "hostname": "api.example.com",
+                "worker": {
+                    "name": "api-example-com",
+                    "module": True,
+                    "compatibility_date": "2024-01-01"
+                },
+                "bindings": {"kv": ["cache"]}
+            },
+            {"intent": "create_d1_database", "bindings": {"d1": ["appdb"]}}
+        ]
+    }
+
+
+def test_validate_multi_resource_dsl():
+    """Test DSL validation for a version 2 document."""
+    # Should not raise any exception
+    validate_dsl(_multi_resource_dsl())
+
+
+def test_invalid_multi_resource_dsl():
+    """Test version 2 documents reject unsupported or incomplete resources."""
+    dsl = _multi_resource_dsl()
+    dsl["resources"].append({"intent": "delete_dns_record", "hostname": "old.example.com"})
+    with pytest.raises(ValueError, match="not supported"):
+        validate_dsl(dsl)
+    
+    dsl = _multi_resource_dsl()
+    del dsl["resources"][0]["dns_record"]["content"]
+    with pytest.raises(ValueError, match="content"):
+        validate_dsl(dsl)
+    
+    dsl = _multi_resource_dsl()
+    dsl["resources"][0]["zone_name"] = "example.com"
+    with pytest.raises(ValueError):
+        validate_dsl(dsl)
+
+
+def test_conflicting_duplicate_dns_records():
+    """Test repeated records must agree on ttl, proxied and priority."""
+    dsl = _multi_resource_dsl()
+    dsl["resources"].append({"intent": "create_dns_record", "hostname": "www.example.com",
+                             "dns_record": {"type": "CNAME", "content": "example.com", "ttl": 300}})
+    validate_dsl(dsl)
+    
+    dsl["resources"][-1]["dns_record"]["proxied"] = True
+    with pytest.raises(ValueError, match=r"listed twice with different proxied \(see resources\[0\]\)"):
+        validate_dsl(dsl)
+
+
+def test_validator_is_cached():
+    """Test the compiled validator is built once and reused."""
+    assert get_validator() is get_validator()
+
+
+def test_validate_many_reports_all_errors():
+    """Test batch validation reports every error of every document."""
+    valid = {
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com"
+    }
+    schema_errors = {
+        "intent": "create_dns_record",
+        "zone_name": "Example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "SRV"}
+    }
+    rule_errors = {
+        "intent": "create_worker_and_bind_domain",
+        "zone_name": "example.com",
+        "hostname": "-bad-.example.com",
+        "worker": {"name": "a" * 70, "module": True, "compatibility_date": "2024-1-1"}
+    }
+    
+    results = validate_many([valid, schema_errors, rule_errors])
+    
+    assert results[0] == []
+    assert len(results[1]) == 2
+    assert results[1][0].startswith("dns_record/type:")
+    assert len(results[2]) == 3
@@ -0,0 +1,92 @@
+"""Tests for planning many run directories."""
+
+import json
+
+from terrasmartrun.fleet import DirPlanResult, aggregate_exit_code
+from terrasmartrun.plan_analysis import PlanSummary
+from terrasmartrun.ratelimit import BACKOFF_BASE, SharedTokenBucket, TokenBucket
+from terrasmartrun.tfexec import estimate_api_calls
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_over_time():
+    """Test tokens are spent and refilled at the configured rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=4, clock=clock)
+    
+    assert bucket.try_acquire(3) == 0
+    assert bucket.try_acquire(3) == 1.0
+    clock.now = 1.0
+    assert bucket.try_acquire(3) == 0
+    # Oversized requests are capped at the capacity
+    clock.now = 10.0
+    assert bucket.try_acquire(100) == 0
+
+
+def test_estimate_api_calls(tmp_path):
+    """Test the API estimate counts resource instances in the state."""
+    assert estimate_api_calls(tmp_path) == 1
+    (tmp_path / "terraform.tfstate").write_text(json.dumps({
+        "resources": [{"instances": [{}, {}]}, {"instances": [{}]}]
+    }))
+    assert estimate_api_calls(tmp_path) == 4
+
+
+def test_aggregate_exit_code(tmp_path):
+    """Test errors win over destructive changes, which win over changes."""
+    changes = PlanSummary()
+    changes.add("cloudflare_dns_record", "create")
+    destructive = PlanSummary()
+    destructive.add("cloudflare_dns_record", "delete")
+    
+    clean = DirPlanResult(tmp_path, summary=PlanSummary())
+    changed = DirPlanResult(tmp_path, summary=changes)
+    destroyed = DirPlanResult(tmp_path, summary=destructive)
+    failed = DirPlanResult(tmp_path, error="boom")
+    
+    assert aggregate_exit_code([clean]) == 0
+    assert aggregate_exit_code([clean, changed]) == 2
+    assert aggregate_exit_code([changed, destroyed]) == 3
+    assert aggregate_exit_code([destroyed, failed]) == 1
+
+
+def test_shared_bucket_spans_instances(tmp_path):
+    """Test buckets on the same file draw from one budget."""
+    clock = FakeClock()
+    first = SharedTokenBucket(tmp_path / "ratelimit.json", rate=1, capacity=2, clock=clock)
+    second = SharedTokenBucket(tmp_path / "ratelimit.json", rate=1, capacity=2, clock=clock)
+    
+    assert first.try_acquire(2) == 0
+    assert second.try_acquire(1) == 1.0
+    clock.now = 1.0
+    assert second.try_acquire(1) == 0
+
+
+def test_shared_bucket_backs_off_on_429(tmp_path):
+    """Test 429s pause every caller with a growing backoff that decays on success."""
+    clock = FakeClock()
+    bucket = SharedTokenBucket(tmp_path / "ratelimit.json", rate=10, capacity=10, clock=clock)
+    
+    assert bucket.report_rate_limited() == BACKOFF_BASE
+    assert bucket.try_acquire() == BACKOFF_BASE
+    assert bucket.report_rate_limited() == 2 * BACKOFF_BASE
+    assert bucket.report_rate_limited(retry_after=30) == 30
+    
+    stats = bucket.stats()
+    assert stats.rate_limited == 3
+    assert stats.backoff == 4 * BACKOFF_BASE
+    bucket.report_success()
+    assert bucket.stats().backoff == 2 * BACKOFF_BASE
+    
+    bucket.reset()
+    assert bucket.stats().rate_limited == 0
+    assert bucket.try_acquire() == 0
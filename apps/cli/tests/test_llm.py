@@ -0,0 +1,69 @@
+"""Tests for the OpenAI integration helpers."""
+
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from terrasmartrun import llm
+from terrasmartrun.config import Config
+
+
+def test_openai_client_is_reused():
+    """Test the pooled client is shared between calls with equal settings."""
+    config = Config(openai_api_key="test-key")
+    
+    try:
+        client = llm.get_openai_client(config)
+        assert llm.get_openai_client(Config(openai_api_key="test-key")) is client
+        
+        # Different pool settings get their own client
+        other = llm.get_openai_client(Config(openai_api_key="test-key", openai_pool_size=2))
+        assert other is not client
+    finally:
+        llm.close_openai_clients()
+
+
+class FakeCompletions:
+    """Chat completions endpoint failing with the given errors first."""
+    
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.timeouts = []
+    
+    def create(self, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        if self.errors:
+            raise self.errors.pop(0)
+        message = SimpleNamespace(content='{"intent": "create_dns_record"}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def fake_client(monkeypatch, errors):
+    completions = FakeCompletions(errors)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm, "get_openai_client", lambda config: client)
+    return completions
+
+
+def test_call_openai_retries_transient_errors(tmp_path, monkeypatch):
+    """Test connection errors are retried before giving up on the model."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    completions = fake_client(monkeypatch, [openai.APIConnectionError(request=None)])
+    config = Config(openai_api_key="test-key", openai_retry_backoff=0.01)
+    
+    assert llm._call_openai("add a record", config) == {"intent": "create_dns_record"}
+    assert len(completions.timeouts) == 2
+    assert completions.timeouts[0].read <= config.openai_timeout
+
+
+def test_call_openai_does_not_retry_client_errors(tmp_path, monkeypatch):
+    """Test errors that cannot succeed on retry fail at once."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    response = SimpleNamespace(status_code=401, request=None, headers={})
+    error = openai.AuthenticationError("bad key", response=response, body=None)
+    completions = fake_client(monkeypatch, [error])
+    
+    with pytest.raises(Exception, match="bad key"):
+        llm._call_openai("add a record", Config(openai_api_key="test-key"))
+    assert len(completions.timeouts) == 1
@@ -0,0 +1,73 @@
+"""Tests for Terraform plan analysis."""
+
+import io
+import json
+
+import pytest
+from terrasmartrun.plan_analysis import (
+    PlanSummary,
+    classify_actions,
+    iter_resource_changes,
+    summarize_plan_json,
+)
+
+
+def _plan_json(changes):
+    """Build a plan document shaped like `terraform show -json` output."""
+    return json.dumps({
+        "format_version": "1.2",
+        "planned_values": {"root_module": {}},
+        "resource_drift": [{"type": "cloudflare_dns_record", "change": {"actions": ["delete"]}}],
+        "resource_changes": [
+            {"address": f"{t}.r{i}", "type": t, "change": {"actions": actions}}
+            for i, (t, actions) in enumerate(changes)
+        ],
+        "prior_state": {"values": {"note": "destroy everything"}},
+    })
+
+
+def test_classify_actions():
+    """Test terraform action lists map to single actions."""
+    assert classify_actions(["create"]) == "create"
+    assert classify_actions(["delete", "create"]) == "replace"
+    assert classify_actions(["create", "delete"]) == "replace"
+    assert classify_actions(["no-op"]) == "no-op"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_resource_changes_streams_across_chunks(chunk_size):
+    """Test resource changes are decoded regardless of chunk boundaries."""
+    plan = _plan_json([("cloudflare_dns_record", ["create"]), ("cloudflare_workers_script", ["update"])])
+    
+    items = list(iter_resource_changes(io.StringIO(plan), chunk_size=chunk_size))
+    
+    assert [item["address"] for item in items] == [
+        "cloudflare_dns_record.r0",
+        "cloudflare_workers_script.r1",
+    ]
+
+
+def test_summarize_plan_json():
+    """Test summaries count changes and ignore drift and prior state."""
+    plan = _plan_json([
+        ("cloudflare_dns_record", ["create"]),
+        ("cloudflare_dns_record", ["create"]),
+        ("cloudflare_workers_script", ["delete", "create"]),
+        ("cloudflare_zones", ["read"]),
+    ])
+    
+    summary = summarize_plan_json(io.StringIO(plan))
+    
+    assert summary.totals() == {"create": 2, "update": 0, "replace": 1, "delete": 0}
+    assert summary.has_destructive
+    assert summary.exit_code() == 3
+    assert "cloudflare_zones" not in summary.to_dict()["resources"]
+
+
+def test_empty_plan_has_no_changes():
+    """Test a plan without resource changes."""
+    summary = summarize_plan_json(io.StringIO('{"format_version": "1.2"}'))
+    
+    assert summary.exit_code() == 0
+    assert summary.format_table() == "No changes."
+    assert PlanSummary().to_dict()["has_changes"] is False
@@ -0,0 +1,70 @@
+"""Tests for stage timing spans."""
+
+import json
+import threading
+
+from click.testing import CliRunner
+from terrasmartrun import profiling, render
+from terrasmartrun.cli import main
+from terrasmartrun.profiling import Tracer, span, start_tracing, stop_tracing
+
+
+def test_spans_nest_per_thread():
+    """Test spans nest within a thread and start at depth 0 in new threads."""
+    tracer = Tracer()
+    
+    def work():
+        with tracer.span("worker"):
+            pass
+    
+    with tracer.span("plan"):
+        with tracer.span("terraform.plan", args="x"):
+            pass
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+    
+    depths = {s.name: s.depth for s in tracer.ordered_spans()}
+    assert depths == {"plan": 0, "terraform.plan": 1, "worker": 0}
+    
+    table = tracer.format_table()
+    assert "  terraform.plan" in table
+    
+    events = tracer.to_chrome_trace()["traceEvents"]
+    assert [e["name"] for e in events] == ["plan", "terraform.plan", "worker"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert events[1]["args"] == {"args": "x"}
+
+
+def test_span_is_noop_without_tracer():
+    """Test module-level spans record nothing unless tracing is on."""
+    with span("ignored"):
+        pass
+    
+    tracer = start_tracing()
+    with span("recorded"):
+        pass
+    assert stop_tracing() is tracer
+    assert [s.name for s in tracer.spans] == ["recorded"]
+    assert profiling._tracer is None
+
+
+def test_dryrun_trace_file(tmp_path, monkeypatch):
+    """Test --trace-file writes the dry run stages."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("CLOUDFLARE_ACCOUNT_ID", "test-account")
+    monkeypatch.setattr(render, "_environment", None)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dsl.json").write_text(json.dumps({
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com"}
+    }))
+    
+    result = CliRunner().invoke(main, ["dryrun", "--dsl", "dsl.json", "--profile",
+                                       "--trace-file", "trace.json"])
+    
+    assert result.exit_code == 0, result.output
+    names = [e["name"] for e in json.loads((tmp_path / "trace.json").read_text())["traceEvents"]]
+    assert names == ["dryrun", "load_dsl", "validate", "render"]
@@ -0,0 +1,162 @@
+"""Tests for Terraform rendering."""
+
+import asyncio
+import json
+
+import pytest
+from terrasmartrun import aio, cloudflare, render
+from terrasmartrun.config import Config
+from terrasmartrun.render import render_files
+
+
+@pytest.fixture(autouse=True)
+def fresh_environment(tmp_path, monkeypatch):
+    """Give each test its own data directory and Jinja2 environment."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setattr(render, "_environment", None)
+
+
+def test_render_multi_resource_dsl():
+    """Test a version 2 document renders into for_each variables."""
+    dsl = {
+        "version": 2,
+        "zone_name": "example.com",
+        "resources": [
+            {"intent": "create_dns_record", "hostname": "example.com",
+             "dns_record": {"type": "A", "content": "192.0.2.1"}},
+            {"intent": "create_dns_record", "hostname": "example.com",
+             "dns_record": {"type": "A", "content": "192.0.2.2", "ttl": 60}},
+            {"intent": "create_worker_and_bind_domain", "hostname": "api.example.com",
+             "routing": {"mode": "route"},
+             "worker": {"name": "api-worker", "module": True, "compatibility_date": "2024-01-01"},
+             "bindings": {"kv": ["cache"]}},
+        ]
+    }
+    
+    files = render_files(dsl, Config(account_id="test-account"))
+    tfvars = json.loads(files["terraform.tfvars.json"])
+    
+    assert "terraform.tfvars" not in files
+    assert "src/api-worker.js" in files
+    assert 'for_each = var.dns_records' in files["main.tf"]
+    assert 'variable "dns_records"' in files["providers.tf"]
+    
+    assert len(tfvars["dns_records"]) == 2
+    assert sorted(r["ttl"] for r in tfvars["dns_records"].values()) == [60, 300]
+    assert tfvars["workers"]["api-worker"]["routing_mode"] == "route"
+    assert tfvars["kv_namespaces"] == ["cache"]
+    assert tfvars["account_id"] == "test-account"
+
+
+def test_render_single_intent_dsl():
+    """Test single-intent documents keep the terraform.tfvars layout."""
+    dsl = {
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com", "ttl": 300, "proxied": False}
+    }
+    
+    files = render_files(dsl, Config(account_id="test-account"))
+    
+    assert 'hostname = "blog.example.com"' in files["terraform.tfvars"]
+    assert 'resource "cloudflare_dns_record" "record"' in files["main.tf"]
+    assert 'variable "worker_name"' in files["providers.tf"]
+
+
+def test_render_mx_priority_is_formatted():
+    """Test the optional priority leaves no blank indented lines in the record block."""
+    for dns_record, priority_line in [({"type": "MX", "content": "mail.example.com", "priority": 10},
+                                       "  priority = 10\n"),
+                                      ({"type": "A", "content": "192.0.2.1"}, None)]:
+        dsl = {"intent": "create_dns_record", "zone_name": "example.com", "hostname": "example.com",
+               "dns_record": dns_record}
+        main_tf = render_files(dsl, Config(account_id="test-account"))["main.tf"]
+        block = main_tf[main_tf.index('resource "cloudflare_dns_record"'):]
+        block = block[:block.index("\n}\n") + 3]
+        
+        assert not any(line.strip() == "" and line for line in block.split("\n"))
+        if priority_line:
+            assert priority_line in block
+        else:
+            assert "priority" not in block
+
+
+def test_environment_is_shared():
+    """Test the Jinja2 environment is built once per process."""
+    assert render.get_environment() is render.get_environment()
+
+
+def test_precompiled_templates_are_used(tmp_path, monkeypatch):
+    """Test renders load precompiled templates when they are current."""
+    compiled_dir = render.compile_templates(tmp_path / "compiled")
+    monkeypatch.setattr(render, "PRECOMPILED_TEMPLATE_DIR", compiled_dir)
+    
+    assert render._precompiled_templates_current(render._get_template_dir())
+    template = render.get_environment().get_template("main.tf.j2")
+    assert template.filename.startswith(str(compiled_dir))
+
+
+def test_content_addressed_run_dirs_are_reused(tmp_path, monkeypatch):
+    """Test identical renders share a run directory and skip unchanged writes."""
+    monkeypatch.chdir(tmp_path)
+    dsl = {
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com"}
+    }
+    config = Config(account_id="test-account")
+    
+    first = render.render_terraform(dsl, config, content_addressed=True)
+    main_tf = first / "main.tf"
+    mtime = main_tf.stat().st_mtime_ns
+    second = render.render_terraform(dsl, config, content_addressed=True)
+    
+    assert first == second
+    assert first.name.startswith("ca-")
+    assert main_tf.stat().st_mtime_ns == mtime
+    
+    dsl["hostname"] = "www.example.com"
+    assert render.render_terraform(dsl, config, content_addressed=True) != first
+
+
+def test_gathered_pipelines_get_separate_run_dirs(tmp_path, monkeypatch):
+    """Test async pipelines started in the same second do not share a run directory."""
+    monkeypatch.chdir(tmp_path)
+    dsl = {
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com"}
+    }
+    
+    async def fake_to_dsl_async(prompt, config, use_cache=True):
+        return dict(dsl)
+    
+    monkeypatch.setattr(aio, "to_dsl_async", fake_to_dsl_async)
+    config = Config(account_id="test-account", content_addressed_runs=False)
+    
+    async def run():
+        return await asyncio.gather(aio.dryrun_async("a", config), aio.dryrun_async("b", config))
+    
+    first, second = asyncio.run(run())
+    
+    assert first.work_dir != second.work_dir
+    assert (first.work_dir / "main.tf").exists()
+    assert (second.work_dir / "main.tf").exists()
+
+
+def test_render_does_not_resolve_zone(monkeypatch):
+    """Test rendering stays offline and only writes a zone ID it is given."""
+    monkeypatch.setattr(cloudflare, "get_session", lambda: pytest.fail("no request expected"))
+    dsl = {
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com"}
+    }
+    config = Config(account_id="test-account", cloudflare_api_token="token")
+    
+    assert "zone_id" not in render_files(dsl, config)["terraform.tfvars"]
+    assert 'zone_id = "zone123"' in render_files(dsl, config, zone_id="zone123")["terraform.tfvars"]
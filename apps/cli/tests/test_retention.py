@@ -0,0 +1,90 @@
+"""Tests for run directory retention."""
+
+import os
+import time
+
+from terrasmartrun.retention import collect_garbage, dedupe_providers
+from terrasmartrun.runs import RunIndex
+
+
+def _make_run(terraform_dir, name, age, provider=b"provider-binary", state=False):
+    """Create a run directory with a provider binary, aged by age seconds."""
+    run_dir = terraform_dir / name
+    provider_dir = run_dir / ".terraform" / "providers" / "cloudflare"
+    provider_dir.mkdir(parents=True)
+    (provider_dir / "terraform-provider-cloudflare").write_bytes(provider)
+    (run_dir / "main.tf").write_text("# main\n")
+    if state:
+        (run_dir / "terraform.tfstate").write_text("{}")
+    past = time.time() - age
+    os.utime(run_dir, (past, past))
+    return run_dir
+
+
+def test_gc_removes_old_runs_and_keeps_state(tmp_path):
+    """Test old runs are removed, but runs with state only lose .terraform."""
+    terraform_dir = tmp_path / "terraform"
+    newest = _make_run(terraform_dir, "newest", age=10)
+    old = _make_run(terraform_dir, "old", age=1000)
+    applied = _make_run(terraform_dir, "applied", age=2000, state=True)
+    RunIndex(terraform_dir).record(old)
+    
+    result = collect_garbage(terraform_dir, keep_last=1, max_age=100, dedupe=False)
+    
+    assert newest.exists()
+    assert not old.exists()
+    assert (applied / "terraform.tfstate").exists()
+    assert not (applied / ".terraform").exists()
+    assert result.removed == [old.resolve()]
+    assert result.pruned == [applied.resolve()]
+    assert result.bytes_reclaimed > 0
+    assert RunIndex(terraform_dir).get("old") is None
+
+
+def test_gc_size_budget_and_dry_run(tmp_path):
+    """Test the size budget prunes oldest first and dry runs change nothing."""
+    terraform_dir = tmp_path / "terraform"
+    for age in (1, 2, 3):
+        _make_run(terraform_dir, f"run{age}", age=age, provider=os.urandom(1000))
+    
+    result = collect_garbage(terraform_dir, keep_last=1, max_age=0, max_bytes=2500, dedupe=False,
+                             dry_run=True)
+    
+    assert [p.name for p in result.removed] == ["run3"]
+    assert (terraform_dir / "run3").exists()
+
+
+def test_dedupe_providers_hardlinks_identical_files(tmp_path):
+    """Test identical provider binaries end up sharing one inode."""
+    first = _make_run(tmp_path, "first", age=0)
+    second = _make_run(tmp_path, "second", age=0)
+    
+    count, reclaimed = dedupe_providers([first, second])
+    
+    binary = ".terraform/providers/cloudflare/terraform-provider-cloudflare"
+    assert count == 1
+    assert reclaimed == len(b"provider-binary")
+    assert os.path.samefile(first / binary, second / binary)
+    assert dedupe_providers([first, second]) == (0, 0)
+
+
+def test_dedupe_providers_with_plugin_cache(tmp_path):
+    """Test runs linked into the plugin cache are skipped and older copies link to the cache."""
+    package = "registry.terraform.io/cloudflare/cloudflare/5.0.0/linux_amd64"
+    cached = tmp_path / "plugin-cache" / package
+    cached.mkdir(parents=True)
+    (cached / "terraform-provider-cloudflare").write_bytes(b"provider-binary")
+    
+    # terraform init with TF_PLUGIN_CACHE_DIR symlinks the package directory
+    cached_run = tmp_path / "cached" / ".terraform" / "providers" / package
+    cached_run.parent.mkdir(parents=True)
+    cached_run.symlink_to(cached, target_is_directory=True)
+    legacy = _make_run(tmp_path, "legacy", age=0)
+    
+    count, reclaimed = dedupe_providers([tmp_path / "cached", legacy], cache_dir=tmp_path / "plugin-cache")
+    
+    assert (count, reclaimed) == (1, len(b"provider-binary"))
+    assert cached_run.is_symlink()
+    assert os.path.samefile(cached / "terraform-provider-cloudflare",
+                            legacy / ".terraform/providers/cloudflare/terraform-provider-cloudflare")
+    assert dedupe_providers([tmp_path / "cached"], cache_dir=tmp_path / "plugin-cache") == (0, 0)
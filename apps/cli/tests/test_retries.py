@@ -0,0 +1,154 @@
+"""Tests for retries and hedged requests."""
+
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from terrasmartrun.retries import (
+    MIN_HEDGE_SAMPLES,
+    LatencyHistory,
+    RetryPolicy,
+    call_with_retries,
+    call_with_retries_async,
+)
+
+
+class Flaky(Exception):
+    """Retryable test error."""
+
+
+def is_flaky(error):
+    return isinstance(error, Flaky)
+
+
+def test_retries_until_success():
+    """Test retryable errors are retried with growing backoff."""
+    calls = []
+    sleeps = []
+    
+    def call(remaining):
+        calls.append(remaining)
+        if len(calls) < 3:
+            raise Flaky()
+        return "ok"
+    
+    policy = RetryPolicy(max_retries=3, backoff=1.0, deadline=60)
+    assert call_with_retries(call, policy, is_flaky, sleep=sleeps.append) == "ok"
+    assert len(calls) == 3
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+
+
+def test_non_retryable_errors_and_exhausted_retries_raise():
+    """Test other errors fail at once and retries stop at max_retries."""
+    def fail(remaining):
+        raise ValueError("bad request")
+    
+    with pytest.raises(ValueError):
+        call_with_retries(fail, RetryPolicy(), is_flaky, sleep=lambda s: None)
+    
+    calls = []
+    
+    def flaky(remaining):
+        calls.append(remaining)
+        raise Flaky()
+    
+    with pytest.raises(Flaky):
+        call_with_retries(flaky, RetryPolicy(max_retries=2), is_flaky, sleep=lambda s: None)
+    assert len(calls) == 3
+
+
+def test_deadline_stops_retries():
+    """Test no retry starts if its backoff would pass the deadline."""
+    def flaky(remaining):
+        raise Flaky()
+    
+    policy = RetryPolicy(max_retries=10, backoff=100, backoff_max=100, deadline=1)
+    policy.delay = lambda attempt: 5.0
+    with pytest.raises(TimeoutError):
+        call_with_retries(flaky, policy, is_flaky, sleep=lambda s: None)
+
+
+def test_slow_request_is_hedged():
+    """Test a second request is sent after hedge_after and the first answer wins."""
+    release = threading.Event()
+    calls = []
+    
+    def call(remaining):
+        calls.append(remaining)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+    
+    try:
+        assert call_with_retries(call, RetryPolicy(), is_flaky, hedge_after=0.05) == "fast"
+    finally:
+        release.set()
+    assert len(calls) == 2
+
+
+HEDGED_SCRIPT = """
+import threading
+from terrasmartrun.retries import RetryPolicy, call_with_retries
+
+calls = []
+
+def call(remaining):
+    calls.append(remaining)
+    if len(calls) == 1:
+        threading.Event().wait(30)
+    return "fast"
+
+print(call_with_retries(call, RetryPolicy(), lambda e: False, hedge_after=0.05))
+"""
+
+
+def test_losing_hedge_does_not_delay_exit():
+    """Test the process exits once the hedge wins, without waiting for the slow request."""
+    start = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", HEDGED_SCRIPT], capture_output=True, text=True, timeout=20)
+    
+    assert result.stdout.strip() == "fast", result.stderr
+    assert time.monotonic() - start < 10
+
+
+def test_async_hedge_cancels_loser():
+    """Test the async hedge returns the faster request and cancels the other."""
+    cancelled = []
+    
+    async def call(remaining):
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+            return "slow"
+        return "fast"
+    
+    async def run():
+        result = await call_with_retries_async(call, RetryPolicy(), is_flaky, hedge_after=0.05)
+        await asyncio.sleep(0)
+        return result
+    
+    assert asyncio.run(run()) == "fast"
+    assert cancelled == [True]
+
+
+def test_latency_history_percentile(tmp_path):
+    """Test the percentile needs enough samples and keeps only the newest."""
+    history = LatencyHistory("model", tmp_path / "latency.json", size=50)
+    for i in range(MIN_HEDGE_SAMPLES - 1):
+        history.record(1.0)
+    assert history.percentile(95) is None
+    
+    for i in range(100):
+        history.record(i / 100)
+    assert len(history.samples()) == 50
+    assert history.percentile(95) == pytest.approx(0.97)
+    assert LatencyHistory("other", tmp_path / "latency.json").samples() == []
@@ -0,0 +1,48 @@
+"""Tests for the run directory index."""
+
+import time
+
+from terrasmartrun.runs import APPLIED, PLANNED, RENDERED, RunIndex
+
+
+def test_run_index_records_and_updates_runs(tmp_path):
+    """Test runs are recorded once and their status is updated in place."""
+    index = RunIndex(tmp_path / "terraform")
+    run_dir = tmp_path / "terraform" / "20240101_000000"
+    run_dir.mkdir(parents=True)
+    
+    index.record(run_dir, prompt="Add a CNAME", dsl_hash="abc")
+    index.set_status(run_dir, PLANNED)
+    
+    runs = index.list()
+    assert len(runs) == 1
+    assert runs[0]["run_id"] == "20240101_000000"
+    assert runs[0]["prompt"] == "Add a CNAME"
+    assert runs[0]["status"] == PLANNED
+    assert index.get("20240101_000000")["path"] == str(run_dir.resolve())
+
+
+def test_run_index_latest(tmp_path):
+    """Test the most recently updated run is the latest."""
+    index = RunIndex(tmp_path / "terraform")
+    first = tmp_path / "terraform" / "first"
+    second = tmp_path / "terraform" / "second"
+    
+    index.record(first)
+    time.sleep(0.01)
+    index.record(second)
+    assert index.latest()["run_id"] == "second"
+    
+    time.sleep(0.01)
+    index.set_status(first, APPLIED)
+    assert index.latest()["run_id"] == "first"
+    assert index.get("second")["status"] == RENDERED
+
+
+def test_run_index_missing_is_empty(tmp_path):
+    """Test reading an index that was never written."""
+    index = RunIndex(tmp_path / "terraform")
+    
+    assert index.latest() is None
+    assert index.list() == []
+    assert not index.path.exists()
@@ -0,0 +1,35 @@
+"""Import-time regression checks for the CLI."""
+
+import subprocess
+import sys
+
+# Cumulative import time of terrasmartrun.cli in microseconds. Generous
+# compared to the ~100 ms target so slow CI machines do not flake.
+IMPORT_BUDGET_US = 300_000
+
+HEAVY_MODULES = ["openai", "httpx", "pydantic", "jinja2", "jsonschema", "yaml"]
+
+
+def _import_times(module: str) -> dict:
+    """Import module in a fresh interpreter and parse -X importtime output."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_skips_heavy_dependencies():
+    """Test importing the CLI does not load the SDKs used by the pipeline."""
+    times = _import_times("terrasmartrun.cli")
+    
+    loaded = [m for m in HEAVY_MODULES if m in times]
+    assert loaded == []
+    assert times["terrasmartrun.cli"] < IMPORT_BUDGET_US
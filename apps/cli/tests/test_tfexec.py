@@ -0,0 +1,360 @@
+"""Tests for the Terraform execution wrapper."""
+
+import asyncio
+import json
+import os
+import stat
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+from terrasmartrun import cloudflare, tfexec
+from terrasmartrun.cli import main
+from terrasmartrun.config import Config
+from terrasmartrun.retention import collect_garbage
+from terrasmartrun.tfexec import TerraformExecutor, AsyncTerraformExecutor
+from terrasmartrun.utils import get_plugin_cache_dir, get_shared_lock_file
+
+
+FAKE_TERRAFORM = """#!/bin/sh
+echo "terraform $*"
+echo "plugin cache: $TF_PLUGIN_CACHE_DIR"
+case "$1" in
+  init) [ -f .terraform.lock.hcl ] || echo "# lock" > .terraform.lock.hcl ;;
+  plan)
+    case "$*" in *-json*) echo '{"type": "change_summary", "@message": "Plan: 1 to add"}' ;; esac
+    for arg in "$@"; do
+      case "$arg" in -out=*) echo "saved plan" > "${arg#-out=}" ;; esac
+    done
+    exit 2 ;;
+  apply)
+    case "$*" in *-input=false*) exit 0 ;; esac
+    echo "boom" >&2; exit 1 ;;
+  destroy) echo "Error: 429 Too Many Requests" >&2; exit 1 ;;
+  show)
+    for plan_file; do :; done
+    [ -f "$plan_file" ] || { echo "Error: no plan file $plan_file" >&2; exit 1; }
+    case "$*" in
+      *-json*) echo '{"resource_changes": [{"type": "cloudflare_dns_record", "change": {"actions": ["create"]}}]}' ;;
+      *) echo '  + resource "cloudflare_dns_record" "record"' ;;
+    esac ;;
+esac
+exit 0
+"""
+
+
+@pytest.fixture
+def fake_terraform(tmp_path, monkeypatch):
+    """Put a fake terraform binary first on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "terraform"
+    script.write_text(FAKE_TERRAFORM)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("CLOUDFLARE_API_TOKEN", "test-token")
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.delenv("TF_PLUGIN_CACHE_DIR", raising=False)
+    
+    work_dir = tmp_path / "run"
+    work_dir.mkdir()
+    return work_dir
+
+
+def test_plan_changes_exit_code_is_not_an_error(fake_terraform):
+    """Test exit code 2 from plan is treated as success."""
+    executor = TerraformExecutor(fake_terraform)
+    
+    assert "terraform plan" in executor.plan()
+
+
+def test_init_shares_plugin_cache_and_lock_file(fake_terraform, tmp_path):
+    """Test init uses the shared plugin cache and lock file."""
+    output = TerraformExecutor(fake_terraform).init()
+    
+    assert f"plugin cache: {get_plugin_cache_dir()}" in output
+    assert get_shared_lock_file().read_text() == "# lock\n"
+    
+    # A new run directory starts from the shared lock file
+    get_shared_lock_file().write_text("# shared\n")
+    other_dir = tmp_path / "other"
+    other_dir.mkdir()
+    TerraformExecutor(other_dir).init()
+    
+    assert (other_dir / ".terraform.lock.hcl").read_text() == "# shared\n"
+
+
+def test_init_skipped_when_providers_unchanged(fake_terraform):
+    """Test init only reruns when providers.tf or the lock file change."""
+    (fake_terraform / "providers.tf").write_text("terraform {}\n")
+    executor = TerraformExecutor(fake_terraform)
+    
+    assert "terraform init -input=false" in executor.init()
+    assert not executor.init_skipped
+    
+    assert executor.init() == ""
+    assert executor.init_skipped
+    
+    (fake_terraform / "providers.tf").write_text("terraform { required_version = \">= 1.5\" }\n")
+    executor.init()
+    assert not executor.init_skipped
+    
+    assert "-upgrade" in executor.init(upgrade=True)
+
+
+def test_saved_plan_reused_until_config_changes(fake_terraform):
+    """Test apply only reuses a saved plan that matches the rendered files."""
+    (fake_terraform / "main.tf").write_text("# v1\n")
+    executor = TerraformExecutor(fake_terraform)
+    executor.plan()
+    
+    plan_file = executor.saved_plan(max_age=60)
+    assert plan_file == fake_terraform / "tfplan"
+    assert executor.saved_plan(max_age=-1) is None
+    
+    (fake_terraform / "main.tf").write_text("# v2\n")
+    assert executor.saved_plan(max_age=60) is None
+    
+    (fake_terraform / "main.tf").write_text("# v1\n")
+    assert "terraform apply -input=false" in executor.apply(plan_file=plan_file)
+    assert not plan_file.exists()
+
+
+def test_async_executor(fake_terraform):
+    """Test the asyncio executor runs commands and surfaces failures."""
+    executor = AsyncTerraformExecutor(fake_terraform)
+    
+    async def run():
+        assert "terraform init" in await executor.init()
+        assert "terraform plan" in await executor.plan()
+        with pytest.raises(Exception, match="boom"):
+            await executor.apply(auto_approve=True)
+    
+    asyncio.run(run())
+
+
+def test_async_executor_kills_terraform_when_cancelled(fake_terraform, tmp_path):
+    """Test cancelling a running command kills terraform instead of orphaning it."""
+    pid_file = tmp_path / "terraform.pid"
+    script = tmp_path / "bin" / "terraform"
+    script.write_text(f"#!/bin/sh\necho $$ > {pid_file}\nexec sleep 30\n")
+    executor = AsyncTerraformExecutor(fake_terraform)
+    
+    async def run():
+        task = asyncio.ensure_future(executor.plan())
+        while not pid_file.exists() or not pid_file.read_text().strip():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(run())
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_async_init_cancelled_while_waiting_releases_plugin_cache_lock(fake_terraform):
+    """Test a cancelled init does not keep the plugin cache lock once it gets it."""
+    fcntl = pytest.importorskip("fcntl")
+    held, release = threading.Event(), threading.Event()
+    
+    def hold_lock():
+        with tfexec.plugin_cache_lock():
+            held.set()
+            release.wait()
+    
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    held.wait()
+    
+    async def run():
+        task = asyncio.ensure_future(AsyncTerraformExecutor(fake_terraform).init())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        # Keep the traceback alive, as error reporting would
+        with pytest.raises(asyncio.CancelledError) as excinfo:
+            await task
+        release.set()
+        return excinfo
+    
+    try:
+        excinfo = asyncio.run(run())
+    finally:
+        release.set()
+        holder.join()
+    
+    # The abandoned waiter gets the lock once the holder lets go and must release it
+    with open(get_plugin_cache_dir().parent / "plugin-cache.lock", 'a') as lock_file:
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                assert time.monotonic() < deadline, "plugin cache lock was leaked"
+                time.sleep(0.05)
+    assert excinfo.value is not None
+
+
+def test_output_streams_to_callback_and_log(fake_terraform, monkeypatch):
+    """Test streamed output reaches the callback and log while only a tail is kept."""
+    monkeypatch.setattr(tfexec, "OUTPUT_TAIL_LINES", 1)
+    lines = []
+    log_file = fake_terraform / "terraform.log"
+    executor = TerraformExecutor(fake_terraform, on_output=lambda stream, line: lines.append((stream, line)),
+                                 log_file=log_file)
+    
+    output = executor.plan()
+    
+    assert lines[0] == ("stdout", "terraform plan -detailed-exitcode -out=tfplan\n")
+    assert log_file.read_text() == "".join(line for _, line in lines)
+    assert output == lines[-1][1]
+
+
+def test_json_events(fake_terraform):
+    """Test on_event runs plan with -json and receives parsed events."""
+    events = []
+    lines = []
+    executor = TerraformExecutor(fake_terraform, on_output=lambda stream, line: lines.append(line),
+                                 on_event=events.append)
+    
+    executor.plan()
+    
+    assert events == [{"type": "change_summary", "@message": "Plan: 1 to add"}]
+    assert lines[0].startswith("terraform plan -json ")
+
+
+def test_async_executor_streams_output(fake_terraform):
+    """Test the async executor forwards lines as well."""
+    lines = []
+    executor = AsyncTerraformExecutor(fake_terraform, on_output=lambda stream, line: lines.append(line))
+    
+    asyncio.run(executor.plan())
+    
+    assert lines[0].startswith("terraform plan")
+
+
+def test_tuning_flags_precede_saved_plan(fake_terraform):
+    """Test parallelism and lock timeout are passed to plan and apply only."""
+    executor = TerraformExecutor(fake_terraform, parallelism=20, lock_timeout="30s")
+    
+    assert executor._command_args(["apply", "-input=false", "tfplan"]) == [
+        "apply", "-parallelism=20", "-lock-timeout=30s", "-input=false", "tfplan"
+    ]
+    assert executor._command_args(["init", "-input=false"]) == ["init", "-input=false"]
+    assert "-refresh=false" in executor.plan(refresh=False)
+
+
+def test_fast_mode_skips_refresh_for_fresh_state(fake_terraform):
+    """Test fast plans only refresh when the state is older than the limit."""
+    config = Config(fast_plan_max_state_age=60)
+    executor = TerraformExecutor(fake_terraform)
+    
+    assert executor.should_refresh(config)
+    assert not executor.should_refresh(config, fast=True)
+    assert executor.should_refresh(config, refresh=True, fast=True)
+    
+    state = fake_terraform / "terraform.tfstate"
+    state.write_text("{}")
+    assert not executor.should_refresh(config, fast=True)
+    os.utime(state, (0, 0))
+    assert executor.should_refresh(config, fast=True)
+
+
+def test_api_commands_draw_from_shared_rate_limit(fake_terraform):
+    """Test refreshing commands take API budget and 429s trigger a shared backoff."""
+    config = Config(cloudflare_rate_limit=1.0, cloudflare_burst=10)
+    executor = TerraformExecutor.from_config(fake_terraform, config)
+    limiter = executor.rate_limiter
+    
+    executor.init()
+    executor.plan(refresh=False)
+    assert limiter.stats().tokens == pytest.approx(10, abs=0.5)
+    executor.plan()
+    assert limiter.stats().tokens == pytest.approx(9, abs=0.5)
+    
+    with pytest.raises(Exception, match="429"):
+        executor.destroy(auto_approve=True)
+    stats = limiter.stats()
+    assert stats.rate_limited == 1
+    assert stats.paused_for > 0
+
+
+def run_apply(monkeypatch, work_dir, args, input=None, **config):
+    """Run 'ts apply' on a run directory with the given config saved."""
+    monkeypatch.chdir(work_dir.parent)
+    Config(openai_api_key="key", **config).save()
+    return CliRunner().invoke(main, ["apply", "--dir", str(work_dir), *args], input=input)
+
+
+def test_apply_initializes_before_planning(fake_terraform, monkeypatch):
+    """Test apply on a never-initialized run directory runs init before planning."""
+    result = run_apply(monkeypatch, fake_terraform, ["--approve"])
+    
+    assert result.exit_code == 0, result.output
+    assert (fake_terraform / tfexec.INIT_FINGERPRINT_FILE).exists()
+
+
+def test_apply_without_plan_reuse(fake_terraform, monkeypatch):
+    """Test apply uses its fresh plan when saved plans are never reused."""
+    result = run_apply(monkeypatch, fake_terraform, ["--approve"], plan_max_age=0)
+    
+    assert result.exit_code == 0, result.output
+    assert "No fresh saved plan found" in result.output
+
+
+def test_apply_shows_diff_before_confirming(fake_terraform, monkeypatch):
+    """Test apply prints terraform's diff before asking for approval."""
+    result = run_apply(monkeypatch, fake_terraform, [], input="n\n")
+    
+    assert result.exit_code == 0, result.output
+    diff = result.output.index('+ resource "cloudflare_dns_record" "record"')
+    assert diff < result.output.index("Apply these changes?")
+    assert "Apply cancelled" in result.output
+
+
+def test_apply_after_gc_pruned_run(fake_terraform, monkeypatch):
+    """Test a run that gc stripped of .terraform and its plan can still be applied."""
+    executor = TerraformExecutor(fake_terraform)
+    executor.init()
+    executor.plan()
+    (fake_terraform / "terraform.tfstate").write_text("{}")
+    os.utime(fake_terraform, (0, 0))
+    (fake_terraform.parent / "newer").mkdir()
+    
+    result = collect_garbage(fake_terraform.parent, keep_last=1, max_age=60, dedupe=False)
+    assert result.pruned == [fake_terraform.resolve()]
+    assert not (fake_terraform / ".terraform").exists()
+    
+    result = run_apply(monkeypatch, fake_terraform, ["--approve"])
+    assert result.exit_code == 0, result.output
+    assert executor.is_initialized()
+
+
+def test_plan_passes_resolved_zone_id(fake_terraform, monkeypatch):
+    """Test plan resolves the zone ID before rendering and writes it to the tfvars."""
+    monkeypatch.setattr(cloudflare, "resolve_zone_id", lambda zone_name, config: "zone123")
+    monkeypatch.chdir(fake_terraform)
+    Config(openai_api_key="key", account_id="test-account").save()
+    (fake_terraform / "dsl.json").write_text(json.dumps({
+        "intent": "create_dns_record",
+        "zone_name": "example.com",
+        "hostname": "blog.example.com",
+        "dns_record": {"type": "CNAME", "content": "example.com"}
+    }))
+    
+    result = CliRunner().invoke(main, ["plan", "--dsl", "dsl.json", "--dir", "out"])
+    
+    assert result.exit_code == 0, result.output
+    assert 'zone_id = "zone123"' in (fake_terraform / "out" / "terraform.tfvars").read_text()
+
+
+def test_apply_with_relative_dir(fake_terraform, monkeypatch):
+    """Test the saved plan is found when --dir is relative to the caller."""
+    monkeypatch.chdir(fake_terraform.parent)
+    Config(openai_api_key="key").save()
+    
+    result = CliRunner().invoke(main, ["apply", "--dir", fake_terraform.name, "--approve"])
+    
+    assert result.exit_code == 0, result.output
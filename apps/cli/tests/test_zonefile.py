@@ -0,0 +1,111 @@
+"""Tests for BIND zone file import."""
+
+import json
+
+import pytest
+
+from terrasmartrun import render
+from terrasmartrun.config import Config
+from terrasmartrun.zonefile import ZoneFileError, import_zone, iter_records, parse_ttl, to_resource
+
+
+ZONE = """\
+$ORIGIN example.com.
+$TTL 1h
+@       IN  SOA ns1.example.com. admin.example.com. (
+                2024010101 ; serial
+                7200 3600 1209600 300 )
+        IN  NS  ns1.example.com.
+        IN  MX  10 mail
+@           A   192.0.2.1
+www     300 IN  CNAME @
+mail    IN  A   192.0.2.2
+            A   192.0.2.3 ; second address
+_dmarc      TXT "v=DMARC1; p=none" " rua=mailto:d@example.com"
+*.dev       A   192.0.2.4
+sub     IN  NS  ns.other.net.
+srv     IN  SRV 10 5 5060 sip
+"""
+
+
+@pytest.fixture(autouse=True)
+def fresh_environment(tmp_path, monkeypatch):
+    """Give each test its own data directory, run index and Jinja2 environment."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CLOUDFLARE_API_TOKEN", raising=False)
+    monkeypatch.setattr(render, "_environment", None)
+
+
+def test_parse_ttl():
+    """Test TTLs in seconds and BIND units."""
+    assert parse_ttl("300") == 300
+    assert parse_ttl("1h30m") == 5400
+    assert parse_ttl("1W") == 604800
+    assert parse_ttl("A") is None
+
+
+def test_iter_records():
+    """Test owners, TTLs, comments and multi-line entries are parsed."""
+    records = list(iter_records(ZONE.splitlines(True), "example.com"))
+    
+    assert [r.type for r in records] == ["SOA", "NS", "MX", "A", "CNAME", "A", "A", "TXT", "A", "NS", "SRV"]
+    soa, ns, mx, apex, www, mail, mail2, dmarc = records[:8]
+    assert soa.rdata[2:] == ["2024010101", "7200", "3600", "1209600", "300"]
+    assert (ns.name, ns.ttl) == ("example.com", 3600)
+    assert (www.name, www.ttl) == ("www.example.com", 300)
+    assert mail2.name == "mail.example.com"
+    assert dmarc.rdata == ["v=DMARC1; p=none", " rua=mailto:d@example.com"]
+
+
+def test_to_resource():
+    """Test records become create_dns_record resources with absolute names."""
+    records = {(r.name, r.type): r for r in iter_records(ZONE.splitlines(True), "example.com")}
+    
+    mx = to_resource(records["example.com", "MX"], "example.com")
+    assert mx["dns_record"] == {"type": "MX", "ttl": 3600, "proxied": False, "priority": 10,
+                                "content": "mail.example.com"}
+    assert to_resource(records["www.example.com", "CNAME"], "example.com")["dns_record"]["content"] == "example.com"
+    assert to_resource(records["example.com", "NS"], "example.com") is None
+    assert to_resource(records["srv.example.com", "SRV"], "example.com") is None
+
+
+def test_unbalanced_parentheses():
+    """Test malformed entries report their line."""
+    with pytest.raises(ZoneFileError, match="line 2"):
+        list(iter_records(["$TTL 300\n", "@ IN SOA a. b. ( 1 2\n"], "example.com"))
+
+
+def test_import_zone(tmp_path):
+    """Test a zone renders into one for_each configuration."""
+    result = import_zone(ZONE.splitlines(True), "example.com", Config(account_id="acct"), str(tmp_path / "run"))
+    tfvars = json.loads((result.work_dir / "terraform.tfvars.json").read_text())
+    
+    assert result.imported == 8
+    assert result.skipped == 3
+    assert result.invalid == 0
+    assert len(tfvars["dns_records"]) == 8
+    assert tfvars["zone_name"] == "example.com"
+    assert 'for_each = var.dns_records' in (result.work_dir / "main.tf").read_text()
+
+
+def test_import_zone_reports_invalid_records(tmp_path):
+    """Test invalid and out-of-zone records are reported and left out."""
+    lines = ["$ORIGIN example.com.\n", "ok A 192.0.2.1\n", "ok A 192.0.2.1\n",
+             "bad..name A 192.0.2.2\n", "other.net. A 192.0.2.3\n"]
+    result = import_zone(lines, "example.com", Config(account_id="acct"), str(tmp_path / "run"))
+    
+    assert result.imported == 1
+    assert result.invalid == 2
+    assert "line 4: Invalid hostname format: bad..name.example.com" in result.errors
+    assert "line 5: other.net is outside zone example.com" in result.errors
+
+
+def test_import_zone_rejects_conflicting_duplicates(tmp_path):
+    """Test a record repeated with a different TTL is reported instead of silently dropped."""
+    lines = ["$ORIGIN example.com.\n", "ok 300 A 192.0.2.1\n", "ok 60 A 192.0.2.1\n", "ok 300 A 192.0.2.1\n"]
+    result = import_zone(lines, "example.com", Config(account_id="acct"), str(tmp_path / "run"))
+    
+    assert result.imported == 1
+    assert result.errors == ["line 3: A record ok.example.com -> 192.0.2.1 is listed twice with different ttl "
+                             "(see line 2)"]
@@ -44,6 +44,9 @@ source "${BUILD_DIR}/venv/bin/activate"
 pip install --upgrade pip
 pip install ../apps/cli/
 
+# Precompile templates into the installed package so the first render skips Jinja2 compilation
+python -c "from terrasmartrun.render import compile_templates; compile_templates(template_dir='../templates')"
+
 # Copy the installed terrasmart script
 cp "${BUILD_DIR}/venv/bin/terrasmart" "${PACKAGE_DIR}/usr/bin/"
 